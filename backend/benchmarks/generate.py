@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Synthetic Tenant Generator
+Writes large benchmark tenants in the data/tenants/<id>/ layout
+
+Usage:
+    python3 -m benchmarks.generate --out /tmp/bench-data [--tenants 1]
+        [--users 10000] [--equipment 100000] [--customers 50000]
+        [--productions 5000] [--seed 42]
+
+Every tenant gets users.json, equipment.json, crm.json, production.json and
+dashboard-config.json plus an entry in tenants.json, so the output can be
+used directly as DATA_DIR (or imported with migrate_to_sqlite.py). Data is
+deterministic for a given seed. All users share one bcrypt hash so logins
+cost the same as in production without hashing every record.
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Any
+
+from utils import codec
+from utils.auth import pwd_context
+
+ADMIN_PASSWORD = "Bench2025!Admin"
+USER_PASSWORD = "Bench2025!User"
+
+EQUIPMENT_CATEGORIES = ["cameras", "streaming", "audio", "lighting", "accessories", "displays"]
+
+EQUIPMENT_TYPES = {
+    "cameras": ["Camera", "PTZ Camera", "Lens"],
+    "streaming": ["Encoder", "Video Mixer", "Streaming Kit"],
+    "audio": ["Microphone", "Audio Mixer", "Speaker"],
+    "lighting": ["LED Panel", "Spotlight", "Lighting Kit"],
+    "accessories": ["Tripod", "Cable Set", "Battery Pack"],
+    "displays": ["LED Wall", "LED Trailer", "Monitor"],
+}
+
+MANUFACTURERS = ["Sony", "Blackmagic", "Panasonic", "Sennheiser", "Aputure", "Manfrotto", "Absen", "Canon"]
+LOCATIONS = ["Hauptlager", "Hamburg", "Berlin", "München", "Köln", "Außenlager Süd"]
+CITIES = ["Hamburg", "Berlin", "München", "Köln", "Jesteburg", "Zeven", "Lüneburg", "Osnabrück", "Münster", "Verden"]
+FIRST_NAMES = ["Anna", "Jonas", "Lena", "Lukas", "Marie", "Felix", "Sophie", "Jürgen", "Sören", "Käthe", "Mia", "Paul"]
+LAST_NAMES = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schäfer", "Köhler"]
+CLUB_WORDS = ["Reit", "Fahr", "Turnier", "Pferde", "Sport", "Zucht", "Voltigier", "Dressur", "Spring", "Reiter"]
+CLUB_SUFFIXES = ["verein", "gemeinschaft", "club", "freunde", "zentrum"]
+
+ROLES = [
+    {
+        "role_id": "admin",
+        "role_name": "Administrator",
+        "default_permissions": [
+            "equipment_booking",
+            "equipment_management",
+            "user_management",
+            "rental_management",
+            "project_access",
+            "financial_overview",
+            "internal_resources"
+        ]
+    },
+    {
+        "role_id": "operator",
+        "role_name": "Operator",
+        "default_permissions": ["equipment_booking", "equipment_maintenance", "project_access", "internal_resources"]
+    },
+    {
+        "role_id": "editor",
+        "role_name": "Editor",
+        "default_permissions": ["equipment_booking", "project_access", "internal_resources"]
+    },
+]
+PERMISSIONS = {role["role_id"]: role["default_permissions"] for role in ROLES}
+
+EPOCH = date(2025, 1, 1)
+
+
+def _day(rng: random.Random, span: int = 730) -> date:
+    return EPOCH + timedelta(days=rng.randrange(span))
+
+
+def _user(rng: random.Random, tenant_id: str, user_id: int, password_hash: str) -> Dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    role = rng.choices(["operator", "editor"], cum_weights=[1, 4])[0]
+    user_type = rng.choices(["employee", "customer", "freelancer"], cum_weights=[6, 9, 10])[0]
+    username = f"{first.lower()}.{last.lower()}{user_id}"
+    return {
+        "user_id": user_id,
+        "tenant_id": tenant_id,
+        "user_type": user_type,
+        "personal_info": {
+            "first_name": first,
+            "last_name": last,
+            "position": rng.choice(["Kamera", "Regie", "Technik", "Produktion", "Vertrieb"]),
+            "department": rng.choice(["Production", "Technology", "Sales", "Management"]),
+            "employee_number": f"{tenant_id.upper()}-{user_id:06d}"
+        },
+        "contact_info": {
+            "email": f"{username}@example.com",
+            "phone": f"+49 40 {rng.randrange(10**7):07d}",
+            "mobile": None
+        },
+        "access_credentials": {
+            "username": f"{username}@{tenant_id}",
+            "password": password_hash,
+            "role": role,
+            "permissions": PERMISSIONS[role],
+            "is_active": True,
+            "created_at": f"{_day(rng).isoformat()}T09:00:00"
+        },
+        "notes": ""
+    }
+
+
+def _admin(tenant_id: str, password_hash: str) -> Dict:
+    return {
+        "user_id": 1,
+        "tenant_id": tenant_id,
+        "user_type": "employee",
+        "personal_info": {"first_name": "Admin", "last_name": "Benchmark", "position": "System Administrator"},
+        "contact_info": {"email": f"admin@{tenant_id}.example.com", "phone": "+49 40 0000000"},
+        "access_credentials": {
+            "username": f"admin@{tenant_id}",
+            "password": password_hash,
+            "role": "admin",
+            "permissions": PERMISSIONS["admin"],
+            "is_active": True,
+            "created_at": "2025-01-01T00:00:00"
+        },
+        "notes": ""
+    }
+
+
+def _equipment(rng: random.Random, tenant_id: str, equipment_id: int, user_count: int) -> Dict:
+    category = rng.choice(EQUIPMENT_CATEGORIES)
+    equipment_type = rng.choice(EQUIPMENT_TYPES[category])
+    manufacturer = rng.choice(MANUFACTURERS)
+    rate = float(rng.randrange(20, 1500, 10))
+    usage_info = []
+    for _ in range(rng.choices([0, 1, 2, 4, 8], cum_weights=[3, 6, 8, 9, 10])[0]):
+        start = _day(rng)
+        usage_info.append({
+            "usage_type": rng.choice(["rental", "internal", "production"]),
+            "is_active": rng.random() < 0.9,
+            "user_id": rng.randint(1, max(user_count, 1)),
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=rng.randrange(1, 8))).isoformat(),
+            "price_per_day": rate
+        })
+    return {
+        "id": equipment_id,
+        "tenant_id": tenant_id,
+        "name": f"{manufacturer} {equipment_type} {equipment_id}",
+        "type": equipment_type,
+        "category": category,
+        "manufacturer": manufacturer,
+        "model": f"{manufacturer[:3].upper()}-{rng.randrange(100, 999)}",
+        "serial_number": f"SN-{tenant_id[-3:].upper()}-{equipment_id:07d}",
+        "status": rng.choices(["available", "in_use", "maintenance"], cum_weights=[7, 9, 10])[0],
+        "location": rng.choice(LOCATIONS),
+        "description": f"{equipment_type} für Produktionen und Vermietung",
+        "purchase_date": _day(rng, 1500).isoformat(),
+        "purchase_price": rate * rng.randrange(20, 80),
+        "daily_rental_rate": rate,
+        "usage_info": usage_info,
+        "technical_data": {"weight_kg": rng.randrange(1, 1500), "power_w": rng.randrange(5, 3000)}
+    }
+
+
+def _customer(rng: random.Random, number: int) -> Dict:
+    name = f"{rng.choice(CLUB_WORDS)}- und {rng.choice(CLUB_WORDS)}{rng.choice(CLUB_SUFFIXES)}"
+    city = rng.choice(CITIES)
+    return {
+        "id": f"cust_{number:06d}",
+        "company_name": f"{name} {city} e.V.",
+        "contact_person": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "address": {
+            "street": f"Am Turnierplatz {rng.randrange(1, 200)}",
+            "city": city,
+            "postal_code": f"{rng.randrange(10000, 99999)}",
+            "country": "Germany"
+        },
+        "phone": "",
+        "email": f"info{number}@example.com",
+        "notes": rng.choice(["Reitverein", "Regelmäßige Veranstaltungen", "Turnierveranstalter", ""]),
+        "status": rng.choices(["active", "inactive", "lead"], cum_weights=[8, 9, 10])[0],
+        "customer_since": _day(rng).isoformat(),
+        "created_at": "2025-01-01T10:00:00Z",
+        "updated_at": "2025-01-01T10:00:00Z"
+    }
+
+
+def _crm(rng: random.Random, customers: int) -> Dict:
+    records = [_customer(rng, n) for n in range(1, customers + 1)]
+    ids = [c["id"] for c in records]
+    communications, quotes, invoices = [], [], []
+    for n in range(1, customers * 2 + 1):
+        communications.append({
+            "id": f"comm_{n:07d}",
+            "customer_id": rng.choice(ids),
+            "channel": rng.choice(["email", "phone", "meeting"]),
+            "subject": rng.choice(["Angebot", "Rückfrage", "Terminabstimmung", "Rechnung"]),
+            "date": _day(rng).isoformat()
+        })
+    for n in range(1, customers // 2 + 1):
+        amount = float(rng.randrange(300, 20000))
+        quotes.append({
+            "id": f"quote_{n:06d}",
+            "customer_id": rng.choice(ids),
+            "status": rng.choice(["draft", "sent", "accepted", "rejected"]),
+            "total": amount,
+            "date": _day(rng).isoformat()
+        })
+        invoices.append({
+            "id": f"inv_{n:06d}",
+            "customer_id": rng.choice(ids),
+            "status": rng.choice(["open", "paid", "overdue"]),
+            "total": amount * 1.19,
+            "date": _day(rng).isoformat()
+        })
+    return {"customers": records, "communications": communications, "quotes": quotes, "invoices": invoices}
+
+
+def _productions(rng: random.Random, count: int, customer_ids: List[str], equipment_count: int) -> Dict:
+    productions = []
+    for n in range(1, count + 1):
+        start = _day(rng)
+        subtotal = float(rng.randrange(500, 30000))
+        productions.append({
+            "id": f"prod_{n:06d}",
+            "production_number": f"PROD-{start.year}-{n:06d}",
+            "customer_id": rng.choice(customer_ids) if customer_ids else None,
+            "event_name": f"Turnier {n}",
+            "event_type": rng.choice(["Reitturnier", "Konzert", "Messe", "Sportevent"]),
+            "event_location": rng.choice(CITIES),
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=rng.randrange(1, 5))).isoformat(),
+            "equipment_ids": [rng.randint(1, equipment_count) for _ in range(rng.randrange(1, 6))] if equipment_count else [],
+            "staff_ids": [],
+            "pricing": {"subtotal": subtotal, "tax_rate": 19, "total": round(subtotal * 1.19, 2), "currency": "EUR"},
+            "status": rng.choice(["planned", "confirmed", "completed", "cancelled"])
+        })
+    return {"productions": productions}
+
+
+def _tenant_entry(tenant_id: str, number: int) -> Dict:
+    return {
+        "tenant_id": tenant_id,
+        "tenant_name": f"Benchmark Tenant {number}",
+        "company_info": {"legal_name": f"Benchmark Tenant {number}", "country": "Germany", "city": "Hamburg"},
+        "subscription": {"plan": "elite", "plan_name": "Elite", "status": "active"},
+        "data_path": f"tenants/{tenant_id}",
+        "is_active": True,
+        "created_at": "2025-01-01T00:00:00Z"
+    }
+
+
+def _write(path: Path, document: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(codec.dumps_document(document))
+
+
+def generate(
+    out_dir: Path,
+    tenants: int = 1,
+    users: int = 10000,
+    equipment: int = 100000,
+    customers: int = 50000,
+    productions: int = 5000,
+    seed: int = 42
+) -> List[str]:
+    """
+    Write synthetic tenants bench_001..bench_NNN into out_dir
+    
+    Returns:
+        The generated tenant IDs
+    """
+    rng = random.Random(seed)
+    admin_hash = pwd_context.hash(ADMIN_PASSWORD)
+    user_hash = pwd_context.hash(USER_PASSWORD)
+    tenant_ids = [f"bench_{n:03d}" for n in range(1, tenants + 1)]
+    
+    for number, tenant_id in enumerate(tenant_ids, start=1):
+        tenant_dir = out_dir / "tenants" / tenant_id
+        name = f"Benchmark Tenant {number}"
+        
+        user_records = [_admin(tenant_id, admin_hash)]
+        user_records += [_user(rng, tenant_id, user_id, user_hash) for user_id in range(2, users + 1)]
+        _write(tenant_dir / "users.json", {
+            "tenant_id": tenant_id,
+            "tenant_name": name,
+            "config": {"roles": ROLES},
+            "users": user_records
+        })
+        
+        _write(tenant_dir / "equipment.json", {
+            "tenant_id": tenant_id,
+            "tenant_name": name,
+            "config": {
+                "allow_rental": True,
+                "currency": "EUR",
+                "tax_rate": 19.0,
+                "equipment_categories": EQUIPMENT_CATEGORIES
+            },
+            "equipment": [_equipment(rng, tenant_id, n, users) for n in range(1, equipment + 1)]
+        })
+        
+        crm = _crm(rng, customers)
+        _write(tenant_dir / "crm.json", crm)
+        customer_ids = [c["id"] for c in crm["customers"]]
+        _write(tenant_dir / "production.json", _productions(rng, productions, customer_ids, equipment))
+        _write(tenant_dir / "dashboard-config.json", {"tenant_id": tenant_id, "company_name": name})
+        print(f"✅ {tenant_id}: {users} users, {equipment} equipment, {customers} customers, {productions} productions")
+    
+    _write(out_dir / "tenants.json", {
+        "tenants": [_tenant_entry(tenant_id, n) for n, tenant_id in enumerate(tenant_ids, start=1)],
+        "config": {"api_version": "1.0.0", "multi_tenant_enabled": True}
+    })
+    return tenant_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic benchmark tenants")
+    parser.add_argument("--out", required=True, help="Output data directory (becomes DATA_DIR)")
+    parser.add_argument("--tenants", type=int, default=1, help="Number of tenants")
+    parser.add_argument("--users", type=int, default=10000, help="Users per tenant")
+    parser.add_argument("--equipment", type=int, default=100000, help="Equipment items per tenant")
+    parser.add_argument("--customers", type=int, default=50000, help="CRM customers per tenant")
+    parser.add_argument("--productions", type=int, default=5000, help="Productions per tenant")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+    
+    from config import settings
+    codec.configure(settings.JSON_CODEC, compact_storage=settings.JSON_STORAGE_COMPACT)
+    generate(
+        Path(args.out),
+        tenants=args.tenants,
+        users=max(args.users, 1),
+        equipment=args.equipment,
+        customers=args.customers,
+        productions=args.productions,
+        seed=args.seed
+    )
+    print(f"📦 Benchmark data written to {args.out} (login admin@bench_001 / {ADMIN_PASSWORD})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+Drives every API endpoint in-process with concurrent clients and gates on a baseline
+
+Usage:
+    python3 -m benchmarks.run [--data-dir DIR | --users 10000 --equipment 100000 ...]
+        [--storage json] [--concurrency 16] [--requests 200]
+        [--scenarios login,search] [--read-only]
+        [--output results.json] [--save-baseline benchmarks/baseline.json]
+        [--baseline benchmarks/baseline.json] [--threshold 0.25]
+
+The app runs in this process behind httpx's ASGI transport, so numbers
+measure the application (routing, auth, storage, serialization) without
+network noise. Each scenario runs on its own: warm-up requests first (index
+builds, caches), then --requests requests spread over --concurrency client
+tasks. The data directory is copied to a temporary directory first, so
+write scenarios never touch the source data.
+
+With --baseline the run exits with status 1 when a scenario's p95 latency
+or throughput is worse than the baseline by more than --threshold, or when
+any request failed.
+"""
+
+import argparse
+import asyncio
+import importlib
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any
+
+import httpx
+
+from utils import codec
+from benchmarks.generate import ADMIN_PASSWORD, generate
+from benchmarks.scenarios import BenchContext, Scenario, Upload, select_scenarios
+from utils.events import sse_stream
+
+# Latency differences below this are noise, whatever the relative change
+MIN_REGRESSION_MS = 1.0
+# Throughput differences below this are noise, whatever the relative change
+MIN_REGRESSION_RPS = 1.0
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Throughput and latency percentiles (ms) for one scenario"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "name": name,
+        "requests": count,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+# =====================================================
+# RUNNING
+# =====================================================
+
+async def prepare_context(client: httpx.AsyncClient, tenant_id: str, username: str, password: str) -> BenchContext:
+    """Log in and sample record IDs used by the scenarios"""
+    ctx = BenchContext(tenant_id=tenant_id, username=username, password=password)
+    response = await client.post("/api/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    ctx.token = response.json()["access_token"]
+    
+    async def sample(path: str, key: str) -> List[Any]:
+        response = await client.get(ctx.tenant_path(path), headers=ctx.headers)
+        response.raise_for_status()
+        return [record[key] for record in response.json()["data"] if key in record]
+    
+    ctx.user_ids = await sample("/users?limit=1000&fields=user_id", "user_id")
+    ctx.equipment_ids = await sample("/equipment?limit=1000&fields=id", "id")
+    ctx.customer_ids = await sample("/crm/customers?limit=1000&fields=id", "id")
+    return ctx
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    ctx: BenchContext,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int
+) -> Dict:
+    """Warm up, then issue requests from concurrent client tasks"""
+    if scenario.max_requests is not None:
+        requests = min(requests, scenario.max_requests)
+    
+    async def send(rng: random.Random) -> bool:
+        method, path, body = scenario.build(ctx, rng)
+        if isinstance(body, Upload):
+            files = {"file": (body.filename, body.content, body.content_type)}
+            response = await client.request(method, path, files=files, headers=ctx.headers)
+        else:
+            response = await client.request(method, path, json=body, headers=ctx.headers)
+        await response.aread()
+        return response.status_code < 400
+    
+    warmup_rng = random.Random(seed)
+    for _ in range(min(warmup, requests)):
+        await send(warmup_rng)
+    
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+    
+    async def client_task(index: int) -> None:
+        nonlocal remaining, errors
+        rng = random.Random(seed + index + 1)
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            ok = await send(rng)
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(client_task(i) for i in range(min(concurrency, requests))))
+    return summarize(scenario.name, latencies, errors, time.perf_counter() - started)
+
+
+async def listen(feed: Any, tenant_id: str) -> None:
+    """Consume the tenant's change feed like a connected dashboard (until cancelled)"""
+    async for _ in sse_stream(feed, tenant_id, keepalive=3600):
+        pass
+
+
+async def stop_listeners(tasks: List[asyncio.Task]) -> None:
+    """Cancel listeners, again if a cancellation raced a delivered event (wait_for drops it)"""
+    pending = set(tasks)
+    while pending:
+        for task in pending:
+            task.cancel()
+        _, pending = await asyncio.wait(pending, timeout=0.1)
+
+
+async def run_benchmarks(
+    scenarios: List[Scenario],
+    tenant_id: str,
+    username: str,
+    password: str,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int
+) -> List[Dict]:
+    # Imported here (not at module level, and config only through it) so the
+    # DATA_DIR / STORAGE_MODE set by prepare_data apply
+    app_module = importlib.import_module("main")
+    transport = httpx.ASGITransport(app=app_module.app)
+    results = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            ctx = await prepare_context(client, tenant_id, username, password)
+            for scenario in scenarios:
+                missing = [sample for sample in scenario.requires if not getattr(ctx, sample)]
+                if missing:
+                    print(f"{scenario.name.ljust(COLUMNS[0][2])} skipped (no {', '.join(missing)} in tenant)")
+                    continue
+                # SSE responses never end, which the in-process transport cannot
+                # stream: listeners consume the same event stream directly
+                listeners = [
+                    asyncio.create_task(listen(app_module.data_manager.changes, tenant_id))
+                    for _ in range(scenario.listeners)
+                ]
+                try:
+                    result = await run_scenario(client, scenario, ctx, requests, concurrency, warmup, seed)
+                finally:
+                    await stop_listeners(listeners)
+                results.append(result)
+                print_row(result)
+    finally:
+        await app_module.data_manager.close()
+        app_module.auth_manager.close()
+    return results
+
+
+# =====================================================
+# REPORTING & BASELINE
+# =====================================================
+
+COLUMNS = [
+    ("scenario", "name", 26),
+    ("reqs", "requests", 6),
+    ("errors", "errors", 6),
+    ("req/s", "throughput_rps", 9),
+    ("p50 ms", "p50_ms", 9),
+    ("p95 ms", "p95_ms", 9),
+    ("p99 ms", "p99_ms", 9),
+    ("max ms", "max_ms", 9),
+]
+
+
+def print_header() -> None:
+    print(" ".join(title.ljust(width) if i == 0 else title.rjust(width)
+                   for i, (title, _, width) in enumerate(COLUMNS)))
+
+
+def print_row(result: Dict) -> None:
+    print(" ".join(str(result[key]).ljust(width) if i == 0 else str(result[key]).rjust(width)
+                   for i, (_, key, width) in enumerate(COLUMNS)), flush=True)
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> List[str]:
+    """
+    Regressions against a baseline report
+    
+    A scenario regresses when its p95 grew or its throughput fell by more
+    than threshold (0.25 = 25%), each checked on its own; p95 changes under
+    MIN_REGRESSION_MS and throughput changes under MIN_REGRESSION_RPS are
+    ignored. Any failed request is a regression too.
+    """
+    previous = {entry["name"]: entry for entry in baseline.get("scenarios", [])}
+    problems = []
+    for result in results:
+        name = result["name"]
+        if result["errors"]:
+            problems.append(f"{name}: {result['errors']} failed requests")
+        base = previous.get(name)
+        if base is None:
+            continue
+        p95, base_p95 = result["p95_ms"], base["p95_ms"]
+        if p95 > base_p95 * (1 + threshold) and p95 - base_p95 > MIN_REGRESSION_MS:
+            problems.append(f"{name}: p95 {p95:.2f} ms vs baseline {base_p95:.2f} ms")
+        rps, base_rps = result["throughput_rps"], base["throughput_rps"]
+        if base_rps and rps * (1 + threshold) < base_rps and base_rps - rps > MIN_REGRESSION_RPS:
+            problems.append(f"{name}: {rps:.1f} req/s vs baseline {base_rps:.1f} req/s")
+    return problems
+
+
+def load_report(path: Path) -> Dict:
+    return codec.loads(path.read_bytes())
+
+
+def save_report(path: Path, report: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(codec.dumps(report, indent=True))
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+def prepare_data(args: argparse.Namespace, work_dir: Path) -> Path:
+    """Copy (or generate) the dataset into work_dir and point the app at it"""
+    data_dir = work_dir / "data"
+    if args.data_dir:
+        shutil.copytree(args.data_dir, data_dir)
+    else:
+        generate(
+            data_dir,
+            tenants=1,
+            users=args.users,
+            equipment=args.equipment,
+            customers=args.customers,
+            productions=args.productions,
+            seed=args.seed
+        )
+    
+    os.environ["DATA_DIR"] = str(data_dir)
+    os.environ["TENANTS_FILE"] = str(data_dir / "tenants.json")
+    os.environ["STORAGE_MODE"] = args.storage
+    os.environ["SQLITE_PATH"] = str(data_dir / "production.db")
+    # The login scenario measures bcrypt cost, not the per-IP rate limit
+    os.environ["LOGIN_ADMISSION_ENABLED"] = "false"
+    if args.storage == "sqlite":
+        import migrate_to_sqlite
+        asyncio.run(migrate_to_sqlite.migrate(data_dir, str(data_dir / "production.db")))
+    return data_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run API benchmarks against a synthetic or copied dataset")
+    parser.add_argument("--data-dir", help="Existing data directory to copy (default: generate one)")
+    parser.add_argument("--users", type=int, default=10000, help="Generated users")
+    parser.add_argument("--equipment", type=int, default=100000, help="Generated equipment items")
+    parser.add_argument("--customers", type=int, default=50000, help="Generated CRM customers")
+    parser.add_argument("--productions", type=int, default=5000, help="Generated productions")
+    parser.add_argument("--tenant", default="bench_001", help="Tenant to benchmark")
+    parser.add_argument("--username", help="Login (default: admin@<tenant>)")
+    parser.add_argument("--password", default=ADMIN_PASSWORD, help="Password for --username")
+    parser.add_argument("--storage", default="json", choices=["json", "journal", "sqlite"], help="STORAGE_MODE")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client tasks")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario (some scenarios cap lower)")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests per scenario")
+    parser.add_argument("--scenarios", help="Comma-separated scenario names (default: all)")
+    parser.add_argument("--read-only", action="store_true", help="Skip write scenarios")
+    parser.add_argument("--list", action="store_true", help="List scenarios and exit")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (data and requests)")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--save-baseline", help="Write the report as the new baseline")
+    parser.add_argument("--baseline", help="Baseline report to gate against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    args = parser.parse_args()
+    
+    try:
+        names = [n.strip() for n in args.scenarios.split(",") if n.strip()] if args.scenarios else None
+        scenarios = select_scenarios(names, include_writes=not args.read_only)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.list:
+        for scenario in scenarios:
+            print(f"{scenario.name}{'  (write)' if scenario.write else ''}")
+        return
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="vbs-bench-"))
+    try:
+        data_dir = prepare_data(args, work_dir)
+        print(f"📁 Benchmark data: {data_dir} ({args.storage})")
+        print_header()
+        results = asyncio.run(run_benchmarks(
+            scenarios,
+            args.tenant,
+            args.username or f"admin@{args.tenant}",
+            args.password,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            seed=args.seed
+        ))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "storage_mode": args.storage,
+        "json_codec": codec.codec_info()["codec"],
+        "concurrency": args.concurrency,
+        "dataset": args.data_dir or {
+            "users": args.users,
+            "equipment": args.equipment,
+            "customers": args.customers,
+            "productions": args.productions,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        save_report(Path(args.output), report)
+    if args.save_baseline:
+        save_report(Path(args.save_baseline), report)
+        print(f"💾 Baseline saved to {args.save_baseline}")
+    
+    failed = [r["name"] for r in results if r["errors"]]
+    if args.baseline:
+        baseline = load_report(Path(args.baseline))
+        for key in ("storage_mode", "concurrency", "dataset"):
+            if baseline.get(key) != report[key]:
+                print(f"⚠️  Baseline {key} differs: {baseline.get(key)} vs {report[key]}")
+        problems = compare(results, baseline, args.threshold)
+        if problems:
+            print(f"❌ {len(problems)} regression(s) beyond {args.threshold:.0%}:")
+            for problem in problems:
+                print(f"   {problem}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    elif failed:
+        print(f"❌ Failed requests in: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Benchmark Scenarios
+One scenario per API endpoint (or endpoint variant) driven by benchmarks.run
+
+A scenario builds one request at a time from the shared context (token,
+sampled record IDs) and a per-client random generator. Expensive endpoints
+(bcrypt logins, full exports, whole-collection writes in json mode) carry
+a lower request cap so a run finishes in reasonable time at 100k records.
+The SSE change feed (/events) is a never-ending stream; events_fanout
+measures writes while dashboards are connected to it instead.
+"""
+
+import itertools
+import random
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Any, Callable, Iterator, Tuple, Union
+
+
+@dataclass
+class Upload:
+    """A file sent as the multipart "file" field instead of a JSON body"""
+    filename: str
+    content: bytes
+    content_type: str = "text/csv"
+
+
+Request = Tuple[str, str, Union[Dict, Upload, None]]  # (method, path, json body or upload)
+
+
+@dataclass
+class BenchContext:
+    """State shared by all clients of a run"""
+    tenant_id: str
+    username: str
+    password: str
+    token: str = ""
+    user_ids: List[Any] = field(default_factory=list)
+    equipment_ids: List[Any] = field(default_factory=list)
+    customer_ids: List[str] = field(default_factory=list)
+    sequence: Iterator[int] = field(default_factory=itertools.count)  # unique names for creates
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+    
+    def tenant_path(self, suffix: str) -> str:
+        return f"/api/tenants/{self.tenant_id}{suffix}"
+
+
+@dataclass
+class Scenario:
+    """A named request generator"""
+    name: str
+    build: Callable[[BenchContext, random.Random], Request]
+    max_requests: Optional[int] = None  # cap for expensive endpoints
+    write: bool = False
+    requires: Tuple[str, ...] = ()  # BenchContext samples that must be non-empty
+    listeners: int = 0  # change feed streams consumed while the scenario runs
+
+
+SEARCH_QUERIES = ["reit", "fahrverein", "sony cam", "müller", "led", "hamburg", "turnier", "kamera"]
+
+
+def _new_equipment(ctx: BenchContext, rng: random.Random) -> Dict:
+    return {
+        "name": f"Bench Camera {next(ctx.sequence)}",
+        "type": "Camera",
+        "location": rng.choice(["Hamburg", "Berlin"]),
+        "description": "Benchmark item"
+    }
+
+
+def _availability(ctx: BenchContext, month: int) -> Request:
+    query = f"start_date=2025-{month:02d}-10&end_date=2025-{month:02d}-28&type=Camera"
+    return ("GET", ctx.tenant_path(f"/equipment/availability?{query}"), None)
+
+
+def _analytics(ctx: BenchContext, rng: random.Random) -> Request:
+    month = rng.randint(1, 10)
+    query = f"start_date=2025-{month:02d}-01&end_date=2025-{month + 2:02d}-28"
+    return ("GET", ctx.tenant_path(f"/equipment/analytics?{query}&group_by={rng.choice(['category', 'month', 'item'])}"), None)
+
+
+IMPORT_ROWS = 500
+
+
+def _import_csv(ctx: BenchContext, rng: random.Random) -> Upload:
+    lines = ["name,type,location,description"]
+    for _ in range(IMPORT_ROWS):
+        item = _new_equipment(ctx, rng)
+        lines.append(f"{item['name']},{item['type']},{item['location']},{item['description']}")
+    return Upload("equipment.csv", ("\n".join(lines) + "\n").encode('utf-8'))
+
+
+def _new_user(ctx: BenchContext) -> Dict:
+    number = next(ctx.sequence)
+    return {
+        "username": f"bench{number}",
+        "password": "Bench2025!User",
+        "personal_info": {"first_name": "Bench", "last_name": f"User {number}"},
+        "contact_info": {"email": f"bench{number}@example.com", "phone": "+49 40 1"}
+    }
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("health", lambda ctx, rng: ("GET", "/api/health", None)),
+    Scenario(
+        "login",
+        lambda ctx, rng: ("POST", "/api/auth/login", {"username": ctx.username, "password": ctx.password}),
+        max_requests=100
+    ),
+    Scenario("auth_me", lambda ctx, rng: ("GET", "/api/auth/me", None)),
+    Scenario("admin_tenants", lambda ctx, rng: ("GET", "/api/admin/tenants", None)),
+    Scenario("tenant_info", lambda ctx, rng: ("GET", ctx.tenant_path(""), None)),
+    
+    # Users
+    Scenario("list_users_page", lambda ctx, rng: ("GET", ctx.tenant_path("/users?limit=100"), None)),
+    Scenario("list_users_filtered", lambda ctx, rng: (
+        "GET", ctx.tenant_path(f"/users?role={rng.choice(['editor', 'operator'])}&limit=100&fields=user_id,personal_info"), None
+    )),
+    Scenario(
+        "get_user",
+        lambda ctx, rng: ("GET", ctx.tenant_path(f"/users/{rng.choice(ctx.user_ids)}"), None),
+        requires=("user_ids",)
+    ),
+    
+    # Equipment
+    Scenario("list_equipment_page", lambda ctx, rng: ("GET", ctx.tenant_path("/equipment?limit=100"), None)),
+    Scenario("list_equipment_filtered", lambda ctx, rng: (
+        "GET", ctx.tenant_path(f"/equipment?status={rng.choice(['available', 'in_use'])}&limit=100"), None
+    )),
+    Scenario("list_equipment_full", lambda ctx, rng: ("GET", ctx.tenant_path("/equipment"), None), max_requests=10),
+    Scenario("get_equipment", lambda ctx, rng: (
+        "GET", ctx.tenant_path(f"/equipment/{rng.choice(ctx.equipment_ids)}"), None
+    ), requires=("equipment_ids",)),
+    Scenario("equipment_availability", lambda ctx, rng: _availability(ctx, rng.randint(1, 12))),
+    
+    # Search
+    Scenario("search", lambda ctx, rng: (
+        "GET", ctx.tenant_path(f"/search?q={rng.choice(SEARCH_QUERIES)}&limit=20"), None
+    )),
+    
+    # CRM and documents
+    Scenario("crm_full", lambda ctx, rng: ("GET", ctx.tenant_path("/crm"), None), max_requests=10),
+    Scenario("crm_customers_page", lambda ctx, rng: ("GET", ctx.tenant_path("/crm/customers?limit=100&status=active"), None)),
+    Scenario("crm_customer", lambda ctx, rng: (
+        "GET", ctx.tenant_path(f"/crm/customers/{rng.choice(ctx.customer_ids)}"), None
+    ), requires=("customer_ids",)),
+    Scenario("crm_customer_invoices", lambda ctx, rng: (
+        "GET", ctx.tenant_path(f"/crm/customers/{rng.choice(ctx.customer_ids)}/invoices"), None
+    ), requires=("customer_ids",)),
+    Scenario("productions", lambda ctx, rng: ("GET", ctx.tenant_path("/productions"), None), max_requests=50),
+    Scenario("dashboard_config", lambda ctx, rng: ("GET", ctx.tenant_path("/dashboard-config"), None)),
+    Scenario("kpis", lambda ctx, rng: ("GET", ctx.tenant_path("/kpis"), None)),
+    Scenario("equipment_analytics", _analytics, max_requests=50),
+    
+    # Import (validation only, nothing is created)
+    Scenario("import_equipment_dry_run", lambda ctx, rng: (
+        "POST", ctx.tenant_path("/import/equipment?dry_run=true"), _import_csv(ctx, rng)
+    ), max_requests=20),
+    
+    # Exports
+    Scenario("export_full_data", lambda ctx, rng: ("GET", ctx.tenant_path("/export/full"), None), max_requests=5),
+    Scenario("export_full_ndjson", lambda ctx, rng: (
+        "GET", ctx.tenant_path("/export/full?format=ndjson"), None
+    ), max_requests=5),
+    Scenario("export_users", lambda ctx, rng: ("GET", ctx.tenant_path("/export/users"), None), max_requests=10),
+    Scenario("export_equipment", lambda ctx, rng: ("GET", ctx.tenant_path("/export/equipment"), None), max_requests=10),
+    
+    # Writes
+    Scenario("create_equipment", lambda ctx, rng: (
+        "POST", ctx.tenant_path("/equipment"), _new_equipment(ctx, rng)
+    ), max_requests=20, write=True),
+    Scenario("bulk_create_equipment", lambda ctx, rng: (
+        "POST", ctx.tenant_path("/equipment/bulk"), {"items": [_new_equipment(ctx, rng) for _ in range(50)]}
+    ), max_requests=20, write=True),
+    Scenario("bulk_update_equipment", lambda ctx, rng: (
+        "PUT", ctx.tenant_path("/equipment/bulk"), {"items": [
+            {"id": equipment_id, "status": rng.choice(["available", "in_use"])}
+            for equipment_id in rng.sample(ctx.equipment_ids, min(50, len(ctx.equipment_ids)))
+        ]}
+    ), max_requests=20, write=True, requires=("equipment_ids",)),
+    Scenario("create_user", lambda ctx, rng: (
+        "POST", ctx.tenant_path("/users"), _new_user(ctx)
+    ), max_requests=20, write=True),
+    Scenario("update_user", lambda ctx, rng: (
+        "PUT", ctx.tenant_path(f"/users/{rng.choice(ctx.user_ids)}"), {"notes": f"bench {rng.random():.6f}"}
+    ), max_requests=20, write=True, requires=("user_ids",)),
+    Scenario("events_fanout", lambda ctx, rng: (
+        "PUT", ctx.tenant_path("/equipment/bulk"), {"items": [
+            {"id": equipment_id, "status": rng.choice(["available", "in_use"])}
+            for equipment_id in rng.sample(ctx.equipment_ids, min(10, len(ctx.equipment_ids)))
+        ]}
+    ), max_requests=20, write=True, requires=("equipment_ids",), listeners=50),
+]
+
+
+def select_scenarios(names: Optional[List[str]] = None, include_writes: bool = True) -> List[Scenario]:
+    """
+    Scenarios by name (all by default)
+    
+    Raises:
+        ValueError: On an unknown scenario name
+    """
+    if names:
+        by_name = {scenario.name: scenario for scenario in SCENARIOS}
+        unknown = [name for name in names if name not in by_name]
+        if unknown:
+            raise ValueError(f"Unknown scenario: {', '.join(unknown)}")
+        selected = [by_name[name] for name in names]
+    else:
+        selected = list(SCENARIOS)
+    return [s for s in selected if include_writes or not s.write]
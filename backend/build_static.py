@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Static Asset Build
+Precompresses the login page and tenant dashboards into STATIC_CACHE_DIR
+
+Usage:
+    python3 build_static.py [--root ..] [--cache-dir ../data/static_cache]
+
+Run at deploy time: servers started with the same STATIC_CACHE_DIR then
+read the gzip/brotli variants instead of compressing every file on
+startup. Variants are named by content hash, so a directory shared by
+several deploys never serves stale files; delete it to reclaim space.
+"""
+
+import argparse
+from pathlib import Path
+
+from config import settings
+from utils.static_assets import AssetTable
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompress static assets")
+    parser.add_argument("--root", default=settings.STATIC_ROOT, help="Directory holding index.html and dashboards/")
+    parser.add_argument("--cache-dir", default=settings.STATIC_CACHE_DIR, help="Target directory for compressed variants")
+    args = parser.parse_args()
+    if not args.cache_dir:
+        parser.error("--cache-dir (or STATIC_CACHE_DIR) is required")
+    
+    table = AssetTable(Path(args.root), cache_dir=Path(args.cache_dir)).build()
+    stats = table.stats()
+    print(f"✅ {stats['files']} files, {table.compressed} variants compressed into {args.cache_dir}")
+    for encoding, size in stats['bytes'].items():
+        print(f"   {encoding}: {size / 1024:.1f} KB")
+    if not stats['brotli']:
+        print("⚠️  brotli is not installed: gzip variants only")
+
+
+if __name__ == "__main__":
+    main()
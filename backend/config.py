@@ -14,11 +14,13 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     ENVIRONMENT: str = "development"
+    WORKERS: int = 1  # uvicorn worker processes when run via `python main.py` (> 1 disables auto-reload)
     
     # JWT
     JWT_SECRET_KEY: str = "dev-secret-key-change-in-production-min-32-chars"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    TOKEN_CACHE_SIZE: int = 1024  # verified tokens kept in the LRU cache (0 disables)
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -30,6 +32,22 @@ class Settings(BaseSettings):
     # Data Paths
     DATA_DIR: str = "../data"
     TENANTS_FILE: str = "../data/tenants.json"
+    TENANT_REGISTRY_CHECK_INTERVAL: float = 2.0  # seconds between tenants.json stat checks
+    
+    # Storage
+    STORAGE_MODE: str = "json"  # json | journal | sqlite
+    JOURNAL_COMPACT_THRESHOLD: int = 1000  # journal entries before background compaction
+    JOURNAL_FSYNC: bool = True  # fsync each journal append (false: faster, last writes may be lost on power loss)
+    SQLITE_PATH: str = "../data/production.db"  # used when STORAGE_MODE=sqlite
+    DOCUMENT_CACHE_CHECK_INTERVAL: float = 1.0  # seconds between crm/production/config file checks
+    JSON_CODEC: str = "auto"  # auto | orjson | stdlib (storage files and API responses)
+    JSON_STORAGE_COMPACT: bool = False  # write data files without indentation
+    STORAGE_LOCK_TIMEOUT: float = 30.0  # seconds to wait for another worker's write lock
+    COMPACT_RECORDS: bool = True  # keep cached users/equipment packed, parse per response
+    WARMUP_ENABLED: bool = True  # preload tenant data in the background after startup (/api/ready)
+    WARMUP_CONCURRENCY: int = 4  # tenants loaded at the same time during warm-up
+    WARMUP_MAX_TENANTS: int = 50  # most recently active tenants preloaded (0 = all)
+    TENANT_MEMORY_BUDGET_MB: int = 2048  # estimated cached tenant data per worker before cold tenants are evicted (0 = no limit)
     
     # Exchange Rates (Reference)
     THB_TO_USD: float = 35.0
@@ -37,6 +55,41 @@ class Settings(BaseSettings):
     
     # Security
     BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4  # threads for bcrypt hashing/verification
+    
+    # Login admission control (429 before any password check)
+    LOGIN_ADMISSION_ENABLED: bool = True
+    LOGIN_IP_PER_MINUTE: float = 10  # sustained login attempts per client IP
+    LOGIN_IP_BURST: int = 20  # attempts a client IP may make at once
+    LOGIN_TENANT_PER_MINUTE: float = 300  # sustained login attempts per tenant
+    LOGIN_TENANT_BURST: int = 100
+    LOGIN_MAX_VERIFYING: int = 16  # login attempts being checked before rejecting
+    
+    # Bulk endpoints
+    BULK_MAX_ITEMS: int = 5000  # items per bulk create/update request
+    
+    # Change feed (Server-Sent Events)
+    CHANGE_FEED_HISTORY: int = 1000  # events kept per tenant for Last-Event-ID resume
+    CHANGE_FEED_QUEUE_SIZE: int = 256  # pending events per client before it must resync
+    CHANGE_FEED_KEEPALIVE: float = 15.0  # seconds between keepalive comments
+    CHANGE_FEED_POLL_INTERVAL: float = 0.1  # seconds between checks for other workers' events
+    CHANGE_FEED_LOG_MAX_MB: int = 4  # per-tenant event log size that triggers a trim
+    
+    # Metrics
+    METRICS_ENABLED: bool = True  # request timing middleware, spans and /api/metrics
+    METRICS_TOKEN: str = ""  # bearer token required by /api/metrics (empty = not served)
+    METRICS_SERVER_TIMING: bool = False  # add a Server-Timing span breakdown to every response
+    METRICS_MAX_TENANTS: int = 256  # distinct tenant labels before grouping as "_other"
+    
+    # Spreadsheet import (CSV/XLSX)
+    IMPORT_BATCH_SIZE: int = 1000  # rows validated and committed per write
+    IMPORT_MAX_ROWS: int = 100000  # rows per upload; the rest is not imported
+    IMPORT_MAX_ERRORS: int = 1000  # failed rows listed in the report (all are counted)
+    
+    # Static assets (login page, tenant dashboards)
+    STATIC_ENABLED: bool = True  # serve index.html, frontend_js/, frontend_css/ and dashboards/
+    STATIC_ROOT: str = ".."  # directory holding those trees
+    STATIC_CACHE_DIR: str = ""  # precompressed variants by content hash (empty = compress on startup)
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -7,33 +7,55 @@ Version: 1.0.0
 Date: October 2025
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Path as PathParam, Query, Request, UploadFile, File, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
+from functools import partial
+import asyncio
+import secrets
 import uvicorn
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
 # Import custom modules
+from utils import codec, metrics
+from utils.codec import CodecJSONResponse
 from utils.data_manager import DataManager
-from utils.auth import AuthManager
-from utils.validators import validate_tenant_access
+from utils.auth import AuthManager, Principal
+from utils.storage import project
+from utils.crm import CRM_SECTIONS, CUSTOMER_SECTIONS
+from utils.search import SEARCH_TYPES
+from utils.events import sse_stream
+from utils.locking import LockTimeout
+from utils.export import ExportSection, EXPORT_FORMATS, MEDIA_TYPES, stream_export
+from utils.static_assets import AssetTable, choose_encoding, not_modified
+from utils.warmup import Warmup
+from utils.admission import LoginAdmission, LoginRejected
+from utils.importer import IMPORT_FORMATS, check_template, detect_format, run_import
 from models.tenant import Tenant, TenantCreate
-from models.user import User, UserCreate, UserLogin
-from models.equipment import Equipment, EquipmentCreate
+from models.user import CREDENTIAL_FIELDS, User, UserCreate, UserLogin, UserUpdate
+from models.equipment import Equipment, EquipmentCreate, EquipmentUpdate
+from models.bulk import BulkRequest, BulkItemResult
+from models.crm import CustomerCreate
+from models.imports import ImportTemplate
 from config import settings
 
+# JSON codec for storage and responses (must be set before any data is read)
+codec.configure(settings.JSON_CODEC, compact_storage=settings.JSON_STORAGE_COMPACT)
+metrics.configure(settings.METRICS_ENABLED, max_tenants=settings.METRICS_MAX_TENANTS)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Production Management Platform API",
     description="VBS Multi-Tenant Production & Resource Management System",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=CodecJSONResponse
 )
 
 # CORS Configuration
@@ -45,10 +67,271 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms (/api/metrics); not installed when disabled
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+
 # Initialize managers
-data_manager = DataManager(settings.DATA_DIR)
-auth_manager = AuthManager(settings.JWT_SECRET_KEY)
+data_manager = DataManager(
+    settings.DATA_DIR,
+    registry_check_interval=settings.TENANT_REGISTRY_CHECK_INTERVAL,
+    storage_mode=settings.STORAGE_MODE,
+    journal_compact_threshold=settings.JOURNAL_COMPACT_THRESHOLD,
+    journal_fsync=settings.JOURNAL_FSYNC,
+    sqlite_path=settings.SQLITE_PATH,
+    document_check_interval=settings.DOCUMENT_CACHE_CHECK_INTERVAL,
+    change_feed_history=settings.CHANGE_FEED_HISTORY,
+    change_feed_queue_size=settings.CHANGE_FEED_QUEUE_SIZE,
+    change_feed_poll_interval=settings.CHANGE_FEED_POLL_INTERVAL,
+    change_feed_max_log_bytes=settings.CHANGE_FEED_LOG_MAX_MB * 1024 * 1024,
+    lock_timeout=settings.STORAGE_LOCK_TIMEOUT,
+    compact_records=settings.COMPACT_RECORDS,
+    memory_budget=settings.TENANT_MEMORY_BUDGET_MB * 1024 * 1024
+)
+auth_manager = AuthManager(
+    settings.JWT_SECRET_KEY,
+    algorithm=settings.JWT_ALGORITHM,
+    hash_workers=settings.PASSWORD_HASH_WORKERS,
+    token_cache_size=settings.TOKEN_CACHE_SIZE
+)
+static_assets = AssetTable(
+    Path(settings.STATIC_ROOT),
+    cache_dir=Path(settings.STATIC_CACHE_DIR) if settings.STATIC_CACHE_DIR else None
+)
+warmup = Warmup()
+login_admission = LoginAdmission(
+    ip_per_minute=settings.LOGIN_IP_PER_MINUTE,
+    ip_burst=settings.LOGIN_IP_BURST,
+    tenant_per_minute=settings.LOGIN_TENANT_PER_MINUTE,
+    tenant_burst=settings.LOGIN_TENANT_BURST,
+    max_verifying=settings.LOGIN_MAX_VERIFYING,
+    enabled=settings.LOGIN_ADMISSION_ENABLED
+)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Component counters exported on /api/metrics
+for name, help_text, metric_type, callback in (
+    ("token_cache_hits_total", "Verified-token cache hits.", "counter", lambda: auth_manager.token_cache.hits),
+    ("token_cache_misses_total", "Verified-token cache misses (JWT decoded).", "counter", lambda: auth_manager.token_cache.misses),
+    ("document_cache_hits_total", "Tenant document cache hits.", "counter", lambda: data_manager.documents.hits),
+    ("document_cache_misses_total", "Tenant document cache (re)loads.", "counter", lambda: data_manager.documents.misses),
+    ("storage_lock_contended_total", "Storage lock acquisitions that had to wait for another worker.", "counter", lambda: data_manager.locks.contended),
+    ("change_feed_events_total", "Change events published.", "counter", lambda: data_manager.changes.published),
+    ("change_feed_subscribers", "Open change feed streams.", "gauge", lambda: data_manager.changes.stats()["subscribers"]),
+    ("tenants_resident", "Tenants with data cached in memory.", "gauge", lambda: data_manager.residency.stats()["tenants"]),
+    ("tenant_resident_bytes", "Estimated memory of cached tenant data.", "gauge", data_manager.residency.resident_bytes),
+    ("tenant_evictions_total", "Cold tenants evicted to stay within TENANT_MEMORY_BUDGET_MB.", "counter", lambda: data_manager.residency.evictions),
+    ("login_admitted_total", "Login attempts admitted by the rate limits.", "counter", lambda: login_admission.admitted),
+    ("login_rejected_ip_total", "Login attempts rejected by the per-IP rate limit.", "counter", lambda: login_admission.rejected["ip"]),
+    ("login_rejected_tenant_total", "Login attempts rejected by the per-tenant rate limit.", "counter", lambda: login_admission.rejected["tenant"]),
+    ("login_rejected_busy_total", "Login attempts rejected because LOGIN_MAX_VERIFYING checks were pending.", "counter", lambda: login_admission.rejected["busy"]),
+    ("login_verifications_in_flight", "Admitted login attempts still being checked.", "gauge", lambda: login_admission.verifying),
+):
+    metrics.registry.add_collector(name, help_text, metric_type, callback)
+
+
+async def get_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """Verified caller for the bearer token (served from the token cache)"""
+    try:
+        principal = auth_manager.authenticate(credentials.credentials)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    metrics.tag_tenant(principal.tenant_id)
+    return principal
+
+
+async def require_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Operator endpoints (metrics, cross-tenant stats): Bearer METRICS_TOKEN
+    
+    Not served at all while no token is configured, so they are never open.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+
+def tenant_access(permission: Optional[str] = None):
+    """
+    Dependency factory for tenant-scoped endpoints
+    
+    The caller must belong to the {tenant_id} in the path and, if given,
+    hold the required permission.
+    """
+    async def dependency(tenant_id: str, principal: Principal = Depends(get_principal)) -> Principal:
+        if principal.tenant_id != tenant_id:
+            raise HTTPException(status_code=403, detail="Access denied to this tenant")
+        if permission and not principal.has_permission(permission):
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
+        return principal
+    return dependency
+
+
+require_tenant = tenant_access()
+require_user_management = tenant_access('user_management')
+require_equipment_management = tenant_access('equipment_management')
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a ?fields=a,b.c projection parameter"""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(',') if f.strip()]
+
+
+async def paginated_listing(
+    list_page: Callable[..., Awaitable[Tuple[List[Dict], Optional[str]]]],
+    filters: Dict[str, Optional[str]],
+    limit: Optional[int],
+    cursor: Optional[str],
+    fields: Optional[str]
+) -> Dict:
+    """
+    Shared body of the filtered/paginated listing endpoints
+    
+    Args:
+        list_page: DataManager listing, called as list_page(filters, limit=, cursor=)
+    """
+    active_filters = {name: value for name, value in filters.items() if value is not None}
+    try:
+        records, next_cursor = await list_page(active_filters, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    projection = parse_fields(fields)
+    if projection:
+        records = [project(record, projection) for record in records]
+    return {"records": records, "next_cursor": next_cursor}
+
+
+def validation_message(error: ValidationError) -> str:
+    """One-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+
+def check_bulk_size(request: BulkRequest) -> None:
+    if len(request.items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items ({len(request.items)}), maximum is {settings.BULK_MAX_ITEMS}"
+        )
+
+
+def bulk_response(results: List[BulkItemResult]) -> CodecJSONResponse:
+    succeeded = sum(1 for result in results if result.success)
+    return CodecJSONResponse({
+        "success": True,
+        "summary": {"total": len(results), "succeeded": succeeded, "failed": len(results) - succeeded},
+        "results": [result.dict(exclude_none=True) for result in results]
+    })
+
+
+async def bulk_create(
+    request: BulkRequest,
+    model: type,
+    create: Callable[[List[Dict]], Awaitable[List[Dict]]],
+    check: Optional[Callable[[Any], Awaitable[Optional[str]]]] = None,
+    present: Callable[[Dict], Dict] = lambda record: record
+) -> CodecJSONResponse:
+    """
+    Validate items individually, then create all valid ones in one write
+    
+    Args:
+        model: Pydantic create model for each item
+        create: DataManager batch create (list of item dicts -> records)
+        check: Optional per-item check returning an error message
+        present: Shapes a created record for the response
+    """
+    check_bulk_size(request)
+    results: List[Optional[BulkItemResult]] = [None] * len(request.items)
+    valid: List[Tuple[int, Dict]] = []
+    
+    for index, item in enumerate(request.items):
+        try:
+            with metrics.span('validation'):
+                parsed = model(**item)
+        except ValidationError as e:
+            results[index] = BulkItemResult(index=index, success=False, error=validation_message(e))
+            continue
+        error = await check(parsed) if check else None
+        if error:
+            results[index] = BulkItemResult(index=index, success=False, error=error)
+            continue
+        valid.append((index, parsed.dict()))
+    
+    created = await create([data for _, data in valid]) if valid else []
+    for (index, _), record in zip(valid, created):
+        results[index] = BulkItemResult(index=index, success=True, data=present(record))
+    return bulk_response(results)
+
+
+async def bulk_update(
+    request: BulkRequest,
+    model: type,
+    key_field: str,
+    key_types: Tuple[type, ...],
+    update: Callable[[List[Tuple[Any, Dict]]], Awaitable[List[Optional[Dict]]]],
+    fixed: Tuple[str, ...] = (),
+    present: Callable[[Dict], Dict] = lambda record: record
+) -> CodecJSONResponse:
+    """
+    Apply per-item shallow updates ({key_field: ..., <changes>}) in one write
+    
+    Args:
+        model: Partial model (models.bulk.partial_model) the changes are
+            validated against; unknown fields are rejected per item
+        fixed: Fields that cannot be changed this way (besides tenant_id)
+    """
+    check_bulk_size(request)
+    results: List[Optional[BulkItemResult]] = [None] * len(request.items)
+    valid: List[Tuple[int, Tuple[Any, Dict]]] = []
+    
+    for index, item in enumerate(request.items):
+        key = item.get(key_field)
+        changes = {k: v for k, v in item.items() if k != key_field}
+        blocked = [field for field in ('tenant_id',) + fixed if field in changes]
+        if not isinstance(key, key_types) or isinstance(key, bool):
+            error = f"{key_field} is required"
+        elif blocked:
+            error = f"{', '.join(blocked)} cannot be changed in a bulk update"
+        elif not changes:
+            error = "No changes given"
+        else:
+            try:
+                with metrics.span('validation'):
+                    parsed = model(**changes)
+            except ValidationError as e:
+                error = validation_message(e)
+            else:
+                # Only the given fields (nested models with their defaults)
+                data = parsed.dict()
+                valid.append((index, (key, {field: data[field] for field in parsed.model_fields_set})))
+                continue
+        results[index] = BulkItemResult(index=index, success=False, error=error)
+    
+    updated = await update([update_item for _, update_item in valid]) if valid else []
+    for (index, (key, _)), record in zip(valid, updated):
+        if record is None:
+            results[index] = BulkItemResult(index=index, success=False, error=f"{key} not found")
+        else:
+            results[index] = BulkItemResult(index=index, success=True, data=present(record))
+    return bulk_response(results)
+
+
+def strip_password(user: Dict) -> Dict:
+    """Copy of a user record without the password (stored records stay intact)"""
+    public_user = dict(user)
+    if 'password' in user.get('access_credentials', {}):
+        public_user['access_credentials'] = {
+            k: v for k, v in user['access_credentials'].items() if k != 'password'
+        }
+    return public_user
 
 # =====================================================
 # HEALTH & INFO ENDPOINTS
@@ -71,20 +354,50 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "json": codec.codec_info(),
+        "storage_locks": data_manager.locks.stats(),
+        "ready": warmup.ready
     }
 
+@app.get("/api/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 until the startup warm-up has loaded tenant data
+    
+    Use /api/health for liveness; it answers while warming up.
+    """
+    body = {"status": "ready" if warmup.ready else "warming", "warmup": warmup.stats()}
+    return CodecJSONResponse(body, status_code=200 if warmup.ready else 503)
+
+@app.get("/api/metrics", include_in_schema=False)
+async def prometheus_metrics(_: None = Depends(require_metrics_token)):
+    """
+    Prometheus metrics (text exposition format)
+    
+    Request latency per route template/tenant/status, time spent in
+    instrumented steps (app_span_duration_seconds{span=...}) and cache and
+    lock counters. Requires METRICS_TOKEN; not served without one.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 # =====================================================
 # AUTHENTICATION ENDPOINTS
 # =====================================================
 
 @app.post("/api/auth/login")
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, request: Request):
     """
     Login endpoint for multi-tenant authentication
     
     Username format: username@tenant_id
     Returns JWT token and user information
+    
+    Attempts are rate-limited per client IP and per tenant, and attempts
+    being checked are capped (LOGIN_MAX_VERIFYING); rejected attempts get
+    a 429 with Retry-After before anything is read or hashed.
     """
     try:
         # Parse username@tenant_id
@@ -95,37 +408,32 @@ async def login(credentials: UserLogin):
             )
         
         username_part, tenant_id = credentials.username.split('@', 1)
-        
-        # Validate tenant exists and is active
-        tenant = await data_manager.get_tenant(tenant_id)
-        if not tenant:
-            raise HTTPException(status_code=404, detail="Tenant not found")
-        
-        if not tenant.get('is_active'):
-            raise HTTPException(status_code=403, detail="Tenant account is inactive")
-        
-        # Load tenant users
-        users_data = await data_manager.get_tenant_users(tenant_id)
-        
-        # Find user
-        user = None
-        for u in users_data.get('users', []):
-            if u.get('access_credentials', {}).get('username') == credentials.username:
-                user = u
-                break
-        
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        
-        creds = user.get('access_credentials', {})
-        
-        # Check if user is active
-        if not creds.get('is_active'):
-            raise HTTPException(status_code=403, detail="User account is inactive")
-        
-        # Validate password
-        if not auth_manager.verify_password(credentials.password, creds.get('password', '')):
-            raise HTTPException(status_code=401, detail="Invalid credentials")
+        with login_admission.admit(request.client.host if request.client else "-", tenant_id):
+            # Validate tenant exists and is active
+            tenant = await data_manager.get_tenant(tenant_id)
+            if not tenant:
+                raise HTTPException(status_code=404, detail="Tenant not found")
+            metrics.tag_tenant(tenant_id)
+            
+            if not tenant.get('is_active'):
+                raise HTTPException(status_code=403, detail="Tenant account is inactive")
+            
+            # Find user (indexed by username)
+            user = await data_manager.find_user_by_username(tenant_id, credentials.username)
+            
+            if not user:
+                raise HTTPException(status_code=401, detail="Invalid credentials")
+            
+            creds = user.get('access_credentials', {})
+            
+            # Check if user is active
+            if not creds.get('is_active'):
+                raise HTTPException(status_code=403, detail="User account is inactive")
+            
+            # Validate password (bcrypt runs in the worker pool, off the event loop)
+            verified = await auth_manager.verify_password_async(credentials.password, creds.get('password', ''))
+            if not verified:
+                raise HTTPException(status_code=401, detail="Invalid credentials")
         
         # Create JWT token
         token_data = {
@@ -156,50 +464,54 @@ async def login(credentials: UserLogin):
                 "permissions": creds.get('permissions', [])
             }
         }
-        
-    except HTTPException:
+    
+    except (HTTPException, LoginRejected):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
 
 @app.post("/api/auth/logout")
-async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def logout(principal: Principal = Depends(get_principal)):
     """Logout endpoint (client-side token removal)"""
     return {"success": True, "message": "Logged out successfully"}
 
 @app.get("/api/auth/me")
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(principal: Principal = Depends(get_principal)):
     """Get current user information from token"""
-    try:
-        token = credentials.credentials
-        payload = auth_manager.decode_token(token)
-        return {"success": True, "user": payload}
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return {"success": True, "user": principal.payload}
+
+@app.get("/api/auth/admission")
+async def login_admission_stats(_: None = Depends(require_metrics_token)):
+    """Login admission counters (admitted, rejected by reason, verifications in flight); requires METRICS_TOKEN"""
+    return {"success": True, "data": login_admission.stats()}
+
+@app.get("/api/auth/token-cache")
+async def token_cache_stats(_: None = Depends(require_metrics_token)):
+    """Verified-token cache counters (hits, misses, evictions); requires METRICS_TOKEN"""
+    return {"success": True, "data": auth_manager.token_cache.stats()}
 
 # =====================================================
 # TENANT ENDPOINTS (Admin only)
 # =====================================================
 
 @app.get("/api/admin/tenants")
-async def list_tenants(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def list_tenants(principal: Principal = Depends(get_principal)):
     """List all tenants (VBS admin only)"""
     # TODO: Check if user is VBS admin
     tenants = await data_manager.get_all_tenants()
     return {"success": True, "data": tenants}
 
+@app.get("/api/admin/tenants/residency")
+async def tenant_residency(_: None = Depends(require_metrics_token)):
+    """Tenants cached in memory (most recently used first) with estimated bytes; requires METRICS_TOKEN"""
+    return {"success": True, "data": data_manager.residency.stats()}
+
 @app.get("/api/tenants/{tenant_id}")
 async def get_tenant(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_tenant)
 ):
     """Get tenant information"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    # Check tenant access
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied to this tenant")
-    
     tenant = await data_manager.get_tenant(tenant_id)
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
@@ -213,89 +525,124 @@ async def get_tenant(
 @app.get("/api/tenants/{tenant_id}/users")
 async def list_users(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user_type: Optional[str] = None,
+    role: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. user_id,personal_info.last_name"),
+    principal: Principal = Depends(require_user_management)
 ):
-    """List all users in a tenant"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    # Validate tenant access
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied to this tenant")
-    
-    # Check permission
-    if 'user_management' not in payload.get('permissions', []):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    """
+    List users in a tenant
     
-    users_data = await data_manager.get_tenant_users(tenant_id)
+    Optional filters (user_type, role), cursor pagination (limit + cursor
+    from the previous page's next_cursor) and field projection.
+    """
+    page = await paginated_listing(
+        partial(data_manager.list_records, tenant_id, 'users'),
+        {"user_type": user_type, "role": role},
+        limit,
+        cursor,
+        fields
+    )
     
     # Remove passwords from response
-    for user in users_data.get('users', []):
-        if 'access_credentials' in user and 'password' in user['access_credentials']:
-            del user['access_credentials']['password']
+    users = [strip_password(user) for user in page["records"]]
     
-    return {"success": True, "data": users_data.get('users', [])}
+    return CodecJSONResponse({"success": True, "data": users, "next_cursor": page["next_cursor"]})
 
 @app.post("/api/tenants/{tenant_id}/users")
 async def create_user(
     tenant_id: str,
     user_data: UserCreate,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_user_management)
 ):
     """Create a new user in tenant"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    # Validate tenant access
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied to this tenant")
-    
-    # Check permission
-    if 'user_management' not in payload.get('permissions', []):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     try:
         new_user = await data_manager.create_user(tenant_id, user_data.dict())
         return {"success": True, "data": new_user}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/api/tenants/{tenant_id}/users/bulk")
+async def create_users_bulk(
+    tenant_id: str,
+    request: BulkRequest,
+    principal: Principal = Depends(require_user_management)
+):
+    """
+    Create many users in one write
+    
+    Each item is validated as UserCreate; invalid items and duplicate
+    usernames are reported per item and the rest are created.
+    """
+    seen = set()
+    
+    async def check_username(user: UserCreate) -> Optional[str]:
+        username = f"{user.username}@{tenant_id}"
+        if username in seen or await data_manager.find_user_by_username(tenant_id, username):
+            return f"Username {username} already exists"
+        seen.add(username)
+        return None
+    
+    try:
+        return await bulk_create(
+            request,
+            UserCreate,
+            lambda items: data_manager.create_users(tenant_id, items),
+            check=check_username,
+            present=strip_password
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.put("/api/tenants/{tenant_id}/users/bulk")
+async def update_users_bulk(
+    tenant_id: str,
+    request: BulkRequest,
+    principal: Principal = Depends(require_user_management)
+):
+    """
+    Update many users in one write (items: {"user_id": ..., <fields to change>})
+    
+    Changes are validated per item as UserUpdate; credentials (username,
+    password, role, permissions) cannot be changed in a batch.
+    """
+    try:
+        return await bulk_update(
+            request,
+            UserUpdate,
+            'user_id',
+            (int,),
+            lambda updates: data_manager.update_users(tenant_id, updates),
+            fixed=CREDENTIAL_FIELDS,
+            present=strip_password
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/tenants/{tenant_id}/users/{user_id}")
 async def get_user(
     tenant_id: str,
     user_id: int,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_tenant)
 ):
     """Get specific user details"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     user = await data_manager.get_user(tenant_id, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Remove password
-    if 'access_credentials' in user and 'password' in user['access_credentials']:
-        del user['access_credentials']['password']
-    
-    return {"success": True, "data": user}
+    return {"success": True, "data": strip_password(user)}
 
 @app.put("/api/tenants/{tenant_id}/users/{user_id}")
 async def update_user(
     tenant_id: str,
     user_id: int,
     user_data: dict,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_user_management)
 ):
     """Update user information"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    if 'user_management' not in payload.get('permissions', []):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-    
     updated_user = await data_manager.update_user(tenant_id, user_id, user_data)
     return {"success": True, "data": updated_user}
 
@@ -306,72 +653,289 @@ async def update_user(
 @app.get("/api/tenants/{tenant_id}/equipment")
 async def list_equipment(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    location: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,name,status"),
+    principal: Principal = Depends(require_tenant)
 ):
-    """List all equipment in a tenant"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    """
+    List equipment in a tenant
     
-    equipment_data = await data_manager.get_tenant_equipment(tenant_id)
-    return {"success": True, "data": equipment_data.get('equipment', [])}
+    Optional filters (status, type, location), cursor pagination (limit +
+    cursor from the previous page's next_cursor) and field projection.
+    """
+    page = await paginated_listing(
+        partial(data_manager.list_records, tenant_id, 'equipment'),
+        {"status": status, "type": type, "location": location},
+        limit,
+        cursor,
+        fields
+    )
+    return CodecJSONResponse({"success": True, "data": page["records"], "next_cursor": page["next_cursor"]})
 
 @app.post("/api/tenants/{tenant_id}/equipment")
 async def create_equipment(
     tenant_id: str,
     equipment_data: EquipmentCreate,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_equipment_management)
 ):
     """Create new equipment"""
-    payload = auth_manager.decode_token(credentials.credentials)
+    new_equipment = await data_manager.create_equipment(tenant_id, equipment_data.dict())
+    return {"success": True, "data": new_equipment}
+
+@app.post("/api/tenants/{tenant_id}/equipment/bulk")
+async def create_equipment_bulk(
+    tenant_id: str,
+    request: BulkRequest,
+    principal: Principal = Depends(require_equipment_management)
+):
+    """
+    Create many equipment items in one write
     
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    Each item is validated as EquipmentCreate; invalid items are reported
+    per item and the rest are created.
+    """
+    try:
+        return await bulk_create(
+            request,
+            EquipmentCreate,
+            lambda items: data_manager.create_equipment_items(tenant_id, items)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.put("/api/tenants/{tenant_id}/equipment/bulk")
+async def update_equipment_bulk(
+    tenant_id: str,
+    request: BulkRequest,
+    principal: Principal = Depends(require_equipment_management)
+):
+    """
+    Update many equipment items in one write (items: {"id": ..., <fields to change>})
     
-    if 'equipment_management' not in payload.get('permissions', []):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    Changes are validated per item as EquipmentUpdate.
+    """
+    try:
+        return await bulk_update(
+            request,
+            EquipmentUpdate,
+            'id',
+            (int, str),
+            lambda updates: data_manager.update_equipment_items(tenant_id, updates)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/tenants/{tenant_id}/equipment/availability")
+async def equipment_availability(
+    tenant_id: str,
+    start_date: str = Query(..., description="First day, YYYY-MM-DD"),
+    end_date: str = Query(..., description="Last day (inclusive), YYYY-MM-DD"),
+    type: Optional[str] = None,
+    location: Optional[str] = None,
+    principal: Principal = Depends(require_tenant)
+):
+    """
+    Equipment free for a date range
     
-    new_equipment = await data_manager.create_equipment(tenant_id, equipment_data.dict())
-    return {"success": True, "data": new_equipment}
+    Checked against active usage_info bookings; optional type and location
+    filters. Booked items are listed with their conflicting bookings.
+    """
+    try:
+        result = await data_manager.find_available_equipment(
+            tenant_id, start_date, end_date, equipment_type=type, location=location
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return CodecJSONResponse({"success": True, "data": result})
+
+@app.get("/api/tenants/{tenant_id}/equipment/analytics")
+async def equipment_analytics(
+    tenant_id: str,
+    start_date: str = Query(..., description="First day, YYYY-MM-DD"),
+    end_date: str = Query(..., description="Last day (inclusive), YYYY-MM-DD"),
+    group_by: str = Query("category", description="category, item or month"),
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000, description="Rows for group_by=item"),
+    principal: Principal = Depends(require_tenant)
+):
+    """
+    Equipment utilization and revenue for a date range
+    
+    Booked days versus available item-days and price_per_day x days per
+    usage type (rental, internal), from active usage_info bookings. Grouped
+    per category, per month, or as the top items by utilization; optional
+    category filter.
+    """
+    try:
+        report = await data_manager.get_utilization_report(
+            tenant_id, start_date, end_date, group_by=group_by, category=category, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return CodecJSONResponse({"success": True, "data": report})
 
 @app.get("/api/tenants/{tenant_id}/equipment/{equipment_id}")
 async def get_equipment(
     tenant_id: str,
     equipment_id: int,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_tenant)
 ):
     """Get specific equipment details"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     equipment = await data_manager.get_equipment(tenant_id, equipment_id)
     if not equipment:
         raise HTTPException(status_code=404, detail="Equipment not found")
     
     return {"success": True, "data": equipment}
 
+# =====================================================
+# CHANGE FEED
+# =====================================================
+
+FEED_COLLECTIONS = ("users", "equipment", "crm", "production", "dashboard-config")
+
+@app.get("/api/tenants/{tenant_id}/events")
+async def change_events(
+    tenant_id: str,
+    collections: Optional[str] = Query(None, description="Comma-separated, e.g. equipment,crm"),
+    access_token: Optional[str] = Query(None, description="Bearer token (EventSource cannot send headers)"),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """
+    Server-Sent Events stream of the tenant's data changes
+    
+    Events: "change" ({id, collection, op, key, data}) and "resync" (reload
+    everything). Browsers resume with Last-Event-ID automatically.
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        principal = auth_manager.authenticate(token)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if principal.tenant_id != tenant_id:
+        raise HTTPException(status_code=403, detail="Access denied to this tenant")
+    
+    wanted = parse_fields(collections)
+    if wanted:
+        unknown = set(wanted) - set(FEED_COLLECTIONS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown collection: {', '.join(sorted(unknown))}")
+    if 'users' in (wanted or FEED_COLLECTIONS) and not principal.has_permission('user_management'):
+        if wanted:
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
+        wanted = [c for c in FEED_COLLECTIONS if c != 'users']
+    
+    return StreamingResponse(
+        sse_stream(
+            data_manager.changes,
+            tenant_id,
+            collections=set(wanted) if wanted else None,
+            last_event_id=last_event_id,
+            keepalive=settings.CHANGE_FEED_KEEPALIVE
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# =====================================================
+# SEARCH ENDPOINT
+# =====================================================
+
+@app.get("/api/tenants/{tenant_id}/search")
+async def search(
+    tenant_id: str,
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = Query(None, description="Comma-separated: customers,equipment,users"),
+    limit: int = Query(20, ge=1, le=100),
+    principal: Principal = Depends(require_tenant)
+):
+    """
+    Type-ahead search across customers, equipment and users
+    
+    Accent-insensitive prefix matching, best matches first. Users are only
+    searched for callers with user_management permission.
+    """
+    requested = parse_fields(types)
+    can_see_users = principal.has_permission('user_management')
+    if requested is None:
+        requested = [kind for kind in SEARCH_TYPES if kind != 'users' or can_see_users]
+    elif 'users' in requested and not can_see_users:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    
+    try:
+        hits = await data_manager.search(tenant_id, q, types=requested, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return CodecJSONResponse({"success": True, "data": hits})
+
 # =====================================================
 # DATA EXPORT ENDPOINTS
 # =====================================================
 
+EXPORT_FORMAT_PATTERN = "^(" + "|".join(f.replace('.', r'\.') for f in EXPORT_FORMATS) + ")$"
+
+
+def export_section(tenant_id: str, collection: str, key: Optional[str] = None) -> ExportSection:
+    """Lazily read collection for a streaming export"""
+    return ExportSection(
+        collection=collection,
+        header=lambda: data_manager.get_collection_header(tenant_id, collection),
+        batches=lambda: data_manager.iter_records(tenant_id, collection),
+        key=key
+    )
+
+
+def streaming_export(
+    tenant_id: str,
+    name: str,
+    export_format: str,
+    meta: Dict,
+    sections: List[ExportSection]
+) -> StreamingResponse:
+    """StreamingResponse for ndjson / gzip exports"""
+    filename = f"{tenant_id}-{name}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        stream_export(export_format, meta, sections),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.get("/api/tenants/{tenant_id}/export/full")
 async def export_full_data(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    export_format: str = Query("json", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    principal: Principal = Depends(require_tenant)
 ):
-    """Export complete tenant data"""
-    payload = auth_manager.decode_token(credentials.credentials)
+    """
+    Export complete tenant data
+    
+    format=json returns the classic single JSON body; ndjson, json.gz and
+    ndjson.gz stream records as they are read with flat memory use.
+    """
+    tenant_info = await data_manager.get_tenant(tenant_id)
+    if not tenant_info:
+        raise HTTPException(status_code=404, detail="Tenant not found")
     
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    if export_format != "json":
+        meta = {"exported_at": datetime.utcnow().isoformat(), "tenant": tenant_info}
+        sections = [
+            export_section(tenant_id, 'users', key='users'),
+            export_section(tenant_id, 'equipment', key='equipment')
+        ]
+        return streaming_export(tenant_id, "full", export_format, meta, sections)
     
     # Get all tenant data
     users = await data_manager.get_tenant_users(tenant_id)
     equipment = await data_manager.get_tenant_equipment(tenant_id)
-    tenant_info = await data_manager.get_tenant(tenant_id)
     
     export_data = {
         "exported_at": datetime.utcnow().isoformat(),
@@ -380,37 +944,146 @@ async def export_full_data(
         "equipment": equipment
     }
     
-    return {"success": True, "data": export_data}
+    return CodecJSONResponse({"success": True, "data": export_data})
 
 @app.get("/api/tenants/{tenant_id}/export/users")
 async def export_users(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    export_format: str = Query("json", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    principal: Principal = Depends(require_tenant)
 ):
-    """Export only users data"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    """Export only users data (format: json | ndjson | json.gz | ndjson.gz)"""
+    if export_format != "json":
+        return streaming_export(tenant_id, "users", export_format, {}, [export_section(tenant_id, 'users')])
     
     users = await data_manager.get_tenant_users(tenant_id)
     
-    return {"success": True, "data": users}
+    return CodecJSONResponse({"success": True, "data": users})
 
 @app.get("/api/tenants/{tenant_id}/export/equipment")
 async def export_equipment(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    export_format: str = Query("json", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    principal: Principal = Depends(require_tenant)
 ):
-    """Export only equipment data"""
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    """Export only equipment data (format: json | ndjson | json.gz | ndjson.gz)"""
+    if export_format != "json":
+        return streaming_export(tenant_id, "equipment", export_format, {}, [export_section(tenant_id, 'equipment')])
     
     equipment = await data_manager.get_tenant_equipment(tenant_id)
     
-    return {"success": True, "data": equipment}
+    return CodecJSONResponse({"success": True, "data": equipment})
+
+# =====================================================
+# DATA IMPORT ENDPOINTS
+# =====================================================
+
+# Import target -> (create model, required permission, DataManager batch create)
+IMPORT_TARGETS: Dict[str, Tuple[type, str, Callable[[str, List[Dict]], Awaitable[List[Dict]]]]] = {
+    "equipment": (EquipmentCreate, "equipment_management", data_manager.create_equipment_items),
+    "customers": (CustomerCreate, "rental_management", data_manager.create_customers),
+}
+IMPORT_TARGET_PATTERN = "^(" + "|".join(IMPORT_TARGETS) + ")$"
+IMPORT_FORMAT_PATTERN = "^(" + "|".join(IMPORT_FORMATS) + ")$"
+TEMPLATE_NAME_PATTERN = "^[A-Za-z0-9_.-]{1,64}$"
+
+
+def require_import_permission(principal: Principal, target: str) -> None:
+    if not principal.has_permission(IMPORT_TARGETS[target][1]):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+
+@app.get("/api/tenants/{tenant_id}/import/templates")
+async def list_import_templates(
+    tenant_id: str,
+    principal: Principal = Depends(require_tenant)
+):
+    """Saved column templates for spreadsheet imports"""
+    try:
+        templates = await data_manager.get_import_templates(tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"success": True, "data": templates}
+
+@app.put("/api/tenants/{tenant_id}/import/templates/{name}")
+async def save_import_template(
+    tenant_id: str,
+    template: ImportTemplate,
+    name: str = PathParam(..., pattern=TEMPLATE_NAME_PATTERN),
+    principal: Principal = Depends(require_tenant)
+):
+    """Create or replace a column template (fields are checked against the target model)"""
+    require_import_permission(principal, template.target)
+    try:
+        check_template(IMPORT_TARGETS[template.target][0], template.columns, template.defaults)
+        await data_manager.save_import_template(tenant_id, name, template.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "data": template.dict()}
+
+@app.delete("/api/tenants/{tenant_id}/import/templates/{name}")
+async def delete_import_template(
+    tenant_id: str,
+    name: str = PathParam(..., pattern=TEMPLATE_NAME_PATTERN),
+    principal: Principal = Depends(require_tenant)
+):
+    """Delete a column template"""
+    template = (await data_manager.get_import_templates(tenant_id)).get(name)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Import template not found")
+    require_import_permission(principal, template.get('target'))
+    await data_manager.save_import_template(tenant_id, name, None)
+    return {"success": True}
+
+@app.post("/api/tenants/{tenant_id}/import/{target}")
+async def import_records(
+    tenant_id: str,
+    target: str = PathParam(..., pattern=IMPORT_TARGET_PATTERN),
+    file: UploadFile = File(..., description="CSV or XLSX, first row = column headers"),
+    template: Optional[str] = Query(None, description="Saved column template name"),
+    import_format: Optional[str] = Query(None, alias="format", pattern=IMPORT_FORMAT_PATTERN),
+    dry_run: bool = Query(False, description="Validate only, create nothing"),
+    principal: Principal = Depends(require_tenant)
+):
+    """
+    Import equipment or customers from a CSV/XLSX upload
+    
+    Rows are mapped through the template (or matched to field names by
+    header), validated in batches as EquipmentCreate / CustomerCreate and
+    created batch by batch (IMPORT_BATCH_SIZE), so large files run in
+    bounded memory. The report lists failed rows by spreadsheet row number.
+    """
+    model, _, create = IMPORT_TARGETS[target]
+    require_import_permission(principal, target)
+    
+    columns, defaults, delimiter = None, None, None
+    if template:
+        saved = (await data_manager.get_import_templates(tenant_id)).get(template)
+        if saved is None:
+            raise HTTPException(status_code=404, detail="Import template not found")
+        if saved.get('target') != target:
+            raise HTTPException(status_code=400, detail=f"Template {template} is for {saved.get('target')}")
+        columns, defaults, delimiter = saved.get('columns'), saved.get('defaults'), saved.get('delimiter')
+    
+    try:
+        report = await run_import(
+            file.file,
+            detect_format(file.filename, import_format),
+            model,
+            None if dry_run else partial(create, tenant_id),
+            columns=columns,
+            defaults=defaults,
+            delimiter=delimiter,
+            batch_size=settings.IMPORT_BATCH_SIZE,
+            max_rows=settings.IMPORT_MAX_ROWS,
+            max_errors=settings.IMPORT_MAX_ERRORS
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await file.close()
+    
+    return CodecJSONResponse({"success": True, "dry_run": dry_run, "data": report})
 
 # =====================================================
 # CRM ENDPOINTS
@@ -419,20 +1092,17 @@ async def export_equipment(
 @app.get("/api/tenants/{tenant_id}/crm")
 async def get_crm_data(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_tenant)
 ):
     """
     Get CRM data (customers, communications, quotes, invoices)
     """
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    # Load CRM data
-    crm_file = Path(settings.DATA_DIR) / "tenants" / tenant_id / "crm.json"
+    try:
+        crm_data = await data_manager.get_crm_data(tenant_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load CRM data: {str(e)}")
     
-    if not crm_file.exists():
+    if crm_data is None:
         # Return empty CRM structure if file doesn't exist
         return {
             "customers": [],
@@ -441,13 +1111,91 @@ async def get_crm_data(
             "invoices": []
         }
     
-    import json
+    return CodecJSONResponse(crm_data)
+
+CRM_SECTION_PATTERN = "^(" + "|".join(CRM_SECTIONS) + ")$"
+CUSTOMER_SECTION_PATTERN = "^(" + "|".join(CUSTOMER_SECTIONS) + ")$"
+
+@app.get("/api/tenants/{tenant_id}/crm/customers/{customer_id}/{section}")
+async def list_customer_crm_records(
+    tenant_id: str,
+    customer_id: str,
+    section: str = PathParam(..., pattern=CUSTOMER_SECTION_PATTERN),
+    status: Optional[str] = None,
+    channel: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    principal: Principal = Depends(require_tenant)
+):
+    """
+    Communications, quotes or invoices of one customer (paginated)
+    
+    status filters quotes by status and invoices by payment_status.
+    """
+    page = await paginated_listing(
+        partial(data_manager.list_crm_records, tenant_id, section),
+        {"customer_id": customer_id, "status": status, "channel": channel},
+        limit,
+        cursor,
+        fields
+    )
+    return CodecJSONResponse({"success": True, "data": page["records"], "next_cursor": page["next_cursor"]})
+
+@app.get("/api/tenants/{tenant_id}/crm/{section}/{record_id}")
+async def get_crm_record(
+    tenant_id: str,
+    record_id: str,
+    section: str = PathParam(..., pattern=CRM_SECTION_PATTERN),
+    principal: Principal = Depends(require_tenant)
+):
+    """
+    Single customer, communication, quote or invoice by id
+    
+    Customers include counts of their communications, quotes and invoices.
+    """
     try:
-        with open(crm_file, 'r', encoding='utf-8') as f:
-            crm_data = json.load(f)
-        return crm_data
+        index = await data_manager.get_crm_index(tenant_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load CRM data: {str(e)}")
+    
+    record = index.get(section, record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="CRM record not found")
+    
+    response = {"success": True, "data": record}
+    if section == "customers":
+        response["summary"] = index.customer_summary(record_id)
+    return CodecJSONResponse(response)
+
+@app.get("/api/tenants/{tenant_id}/crm/{section}")
+async def list_crm_records(
+    tenant_id: str,
+    section: str = PathParam(..., pattern=CRM_SECTION_PATTERN),
+    customer_id: Optional[str] = None,
+    status: Optional[str] = None,
+    channel: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,company_name,status"),
+    principal: Principal = Depends(require_tenant)
+):
+    """
+    List customers, communications, quotes or invoices
+    
+    Filters: status (customers, quotes; for invoices it matches
+    payment_status), customer_id and channel (communications), customer_id
+    (quotes, invoices). Cursor pagination and field projection as for
+    users/equipment.
+    """
+    page = await paginated_listing(
+        partial(data_manager.list_crm_records, tenant_id, section),
+        {"customer_id": customer_id, "status": status, "channel": channel},
+        limit,
+        cursor,
+        fields
+    )
+    return CodecJSONResponse({"success": True, "data": page["records"], "next_cursor": page["next_cursor"]})
 
 # =====================================================
 # PRODUCTION ENDPOINTS
@@ -456,32 +1204,23 @@ async def get_crm_data(
 @app.get("/api/tenants/{tenant_id}/productions")
 async def get_productions(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_tenant)
 ):
     """
     Get all productions/bookings/events for a tenant
     """
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    # Load production data
-    production_file = Path(settings.DATA_DIR) / "tenants" / tenant_id / "production.json"
+    try:
+        production_data = await data_manager.get_productions(tenant_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load production data: {str(e)}")
     
-    if not production_file.exists():
+    if production_data is None:
         # Return empty production structure if file doesn't exist
         return {
             "productions": []
         }
     
-    import json
-    try:
-        with open(production_file, 'r', encoding='utf-8') as f:
-            production_data = json.load(f)
-        return production_data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to load production data: {str(e)}")
+    return CodecJSONResponse(production_data)
 
 # =====================================================
 # DASHBOARD CONFIG ENDPOINTS
@@ -490,33 +1229,74 @@ async def get_productions(
 @app.get("/api/tenants/{tenant_id}/dashboard-config")
 async def get_dashboard_config(
     tenant_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    principal: Principal = Depends(require_tenant)
 ):
     """
     Get dashboard configuration for a tenant
     """
-    payload = auth_manager.decode_token(credentials.credentials)
-    
-    if payload['tenant_id'] != tenant_id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    # Load dashboard config
-    config_file = Path(settings.DATA_DIR) / "tenants" / tenant_id / "dashboard-config.json"
+    try:
+        config_data = await data_manager.get_dashboard_config(tenant_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load dashboard config: {str(e)}")
     
-    if not config_file.exists():
+    if config_data is None:
         # Return default config if file doesn't exist
         return {
             "tenant_id": tenant_id,
             "company_name": "Production Management"
         }
     
-    import json
+    return CodecJSONResponse(config_data)
+
+@app.get("/api/tenants/{tenant_id}/kpis")
+async def get_kpis(
+    tenant_id: str,
+    principal: Principal = Depends(require_tenant)
+):
+    """
+    Dashboard landing page counts
+    
+    Equipment by status and category (equipment_categories from the
+    tenant config), active users and roles, customers, open quotes and
+    unpaid invoices. Kept up to date incrementally on writes, so this is a
+    constant-time read.
+    """
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
-        return config_data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to load dashboard config: {str(e)}")
+        kpis = await data_manager.get_kpis(tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return CodecJSONResponse({"success": True, "data": kpis})
+
+# =====================================================
+# STATIC ASSETS
+# =====================================================
+
+async def serve_static(request: Request):
+    """
+    Login page, tenant dashboards and their scripts and stylesheets
+    
+    Fingerprinted URLs (name.<hash>.ext, referenced by the served HTML) are
+    cached as immutable; other URLs are revalidated by ETag. Dashboards of
+    unknown or inactive tenants are not served.
+    """
+    asset, fingerprinted = static_assets.get(request.url.path)
+    if asset is not None and asset.tenant_id is not None:
+        tenant = await data_manager.get_tenant(asset.tenant_id)
+        if not tenant or not tenant.get('is_active'):
+            asset = None
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    
+    encoding = choose_encoding(asset, request.headers.get("accept-encoding"))
+    headers = asset.headers(encoding, fingerprinted)
+    if not_modified(request.headers.get("if-none-match"), headers["ETag"]):
+        del headers["Content-Type"]
+        return Response(status_code=304, headers=headers)
+    return Response(asset.variants[encoding], headers=headers)
+
+if settings.STATIC_ENABLED:
+    for route in static_assets.routes():
+        app.add_api_route(route, serve_static, methods=["GET", "HEAD"], include_in_schema=False)
 
 # =====================================================
 # ERROR HANDLERS
@@ -533,6 +1313,36 @@ async def http_exception_handler(request, exc):
                 "code": exc.status_code,
                 "message": exc.detail
             }
+        },
+        headers=getattr(exc, "headers", None)
+    )
+
+@app.exception_handler(LoginRejected)
+async def login_rejected_handler(request, exc):
+    """Login attempt over a rate limit or the verification cap"""
+    return JSONResponse(
+        status_code=429,
+        content={
+            "success": False,
+            "error": {
+                "code": 429,
+                "message": str(exc)
+            }
+        },
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(LockTimeout)
+async def lock_timeout_handler(request, exc):
+    """Another worker held a storage lock for too long"""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "success": False,
+            "error": {
+                "code": 503,
+                "message": str(exc)
+            }
         }
     )
 
@@ -553,22 +1363,79 @@ async def startup_event():
         print("⚠️  Warning: Data directory not found")
     else:
         print("✅ Data directory found")
+    
+    # Needed before serving: tenant registry and the login page/dashboards,
+    # read and precompressed concurrently (compression runs in a thread)
+    await asyncio.gather(data_manager.reload_tenants(), build_static_assets())
+    
+    # Tenant data and auth code paths load in the background; /api/ready
+    # reports ready once they are done
+    if settings.WARMUP_ENABLED and Path(settings.DATA_DIR).exists():
+        warmup.start(await warmup_steps(), concurrency=settings.WARMUP_CONCURRENCY)
+    else:
+        warmup.skip()
+
+async def build_static_assets() -> None:
+    """Read and precompress the login page and dashboards"""
+    if not settings.STATIC_ENABLED:
+        return
+    if not static_assets.root.exists():
+        print(f"⚠️  Warning: Static root {settings.STATIC_ROOT} not found")
+        return
+    stats = (await asyncio.to_thread(static_assets.build)).stats()
+    sizes = stats['bytes']
+    print(
+        f"📦 Static assets: {stats['files']} files, {sizes['identity'] // 1024} KB"
+        f" ({sizes['br' if stats['brotli'] else 'gzip'] // 1024} KB compressed)"
+    )
+
+async def warmup_steps() -> List[Tuple[str, Callable[[], Awaitable[Any]]]]:
+    """
+    Auth code paths plus the most recently active tenants (up to
+    WARMUP_MAX_TENANTS, and only while within the tenant memory budget,
+    so warm-up does not evict tenants it has just loaded)
+    """
+    steps = [("auth", auth_manager.warm_up)]
+    tenant_ids = await data_manager.get_tenants_by_activity()
+    if settings.WARMUP_MAX_TENANTS:
+        tenant_ids = tenant_ids[:settings.WARMUP_MAX_TENANTS]
+    
+    def warm(tenant_id: str) -> Callable[[], Awaitable[Optional[str]]]:
+        async def step() -> Optional[str]:
+            residency = data_manager.residency
+            if residency.budget_bytes and residency.resident_bytes() >= residency.budget_bytes:
+                return "skipped: tenant memory budget reached"
+            await data_manager.warm_tenant(tenant_id)
+            return None
+        return step
+    
+    steps.extend((f"tenant:{tenant_id}", warm(tenant_id)) for tenant_id in tenant_ids)
+    return steps
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("👋 VBS Production Management API shutting down...")
+    
+    await warmup.stop()
+    await data_manager.close()
+    auth_manager.close()
 
 # =====================================================
 # RUN SERVER
 # =====================================================
 
 if __name__ == "__main__":
+    # uvicorn ignores workers when reloading, so reload only a single worker
+    reload = settings.ENVIRONMENT == "development" and settings.WORKERS == 1
+    if settings.ENVIRONMENT == "development" and settings.WORKERS > 1:
+        print(f"⚠️  Warning: auto-reload disabled to run {settings.WORKERS} workers")
     uvicorn.run(
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=True if settings.ENVIRONMENT == "development" else False,
+        reload=reload,
+        workers=settings.WORKERS,
         log_level=settings.LOG_LEVEL.lower()
     )
 
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+JSON -> SQLite Migration
+One-shot importer from the data/tenants/<id>/*.json layout into the
+SQLite storage backend (STORAGE_MODE=sqlite)
+
+Usage:
+    python3 migrate_to_sqlite.py [--data-dir ../data] [--db ../data/production.db]
+
+Pending journal entries (STORAGE_MODE=journal) are replayed before import.
+Re-running the tool replaces each tenant's collections in the database.
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from config import settings
+from utils import codec
+from utils.storage import COLLECTION_KEYS, JournalBackend, read_json
+from utils.sqlite_backend import SQLiteBackend
+
+
+async def migrate(data_dir: Path, db_path: str) -> None:
+    registry = await read_json(data_dir / "tenants.json")
+    tenants = registry.get('tenants', [])
+    if not tenants:
+        print(f"⚠️  No tenants found in {data_dir / 'tenants.json'}")
+        return
+    
+    # The journal backend reads plain snapshots too and applies any journal
+    source = JournalBackend(data_dir)
+    target = SQLiteBackend(db_path)
+    try:
+        for tenant in tenants:
+            for collection in COLLECTION_KEYS:
+                document = await source.load(tenant, collection)
+                count = await target.import_document(tenant, collection, document)
+                print(f"✅ {tenant['tenant_id']}: {count} {collection}")
+    finally:
+        await target.close()
+    
+    print(f"📦 Imported {len(tenants)} tenants into {db_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import tenant JSON data into SQLite")
+    parser.add_argument("--data-dir", default=settings.DATA_DIR, help="Data directory (contains tenants.json)")
+    parser.add_argument("--db", default=settings.SQLITE_PATH, help="Target SQLite database file")
+    args = parser.parse_args()
+    
+    codec.configure(settings.JSON_CODEC, compact_storage=settings.JSON_STORAGE_COMPACT)
+    asyncio.run(migrate(Path(args.data_dir), args.db))
+
+
+if __name__ == "__main__":
+    main()
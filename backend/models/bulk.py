@@ -0,0 +1,48 @@
+"""
+Bulk Models
+Request/response models for batch create and update endpoints
+"""
+
+from pydantic import BaseModel, ConfigDict, Field, create_model
+from pydantic.fields import FieldInfo
+from typing import Optional, List, Dict, Any, Iterable, Type
+
+
+class BulkRequest(BaseModel):
+    """
+    Batch of raw items
+    
+    Items are validated one by one (against UserCreate / EquipmentCreate for
+    creates) so a bad item is reported in the results instead of rejecting
+    the whole batch.
+    """
+    items: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
+def partial_model(model: Type[BaseModel], exclude: Iterable[str] = ()) -> Type[BaseModel]:
+    """
+    Update model for batch updates: the create model's fields and
+    constraints, all optional, unknown fields rejected
+    
+    Fields that are given are validated as in the create model (an explicit
+    null only where the create model allows one).
+    """
+    excluded = set(exclude)
+    fields = {
+        name: (field.annotation, FieldInfo.merge_field_infos(field, default=None))
+        for name, field in model.model_fields.items()
+        if name not in excluded
+    }
+    return create_model(
+        model.__name__.replace('Create', 'Update'),
+        __config__=ConfigDict(extra='forbid'),
+        **fields
+    )
+
+
+class BulkItemResult(BaseModel):
+    """Outcome for one item of a batch (index = position in the request)"""
+    index: int
+    success: bool
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
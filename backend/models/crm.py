@@ -0,0 +1,27 @@
+"""
+CRM Models
+Pydantic models for CRM customer data validation
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class Address(BaseModel):
+    """Postal address"""
+    street: Optional[str] = ""
+    city: Optional[str] = ""
+    postal_code: Optional[str] = ""
+    country: Optional[str] = ""
+
+
+class CustomerCreate(BaseModel):
+    """Create new customer model"""
+    company_name: str = Field(..., min_length=1)
+    contact_person: Optional[str] = ""
+    address: Address = Field(default_factory=Address)
+    phone: Optional[str] = ""
+    email: Optional[str] = ""
+    notes: Optional[str] = ""
+    status: str = Field(default="active", pattern="^(active|inactive|lead)$")
+    customer_since: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")
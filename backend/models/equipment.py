@@ -7,6 +7,8 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import date
 
+from models.bulk import partial_model
+
 
 class Accessory(BaseModel):
     """Equipment accessory model"""
@@ -41,11 +43,16 @@ class EquipmentCreate(BaseModel):
     type: str
     status: str = Field(default="available", pattern="^(available|in_use|maintenance)$")
     location: str
+    category: Optional[str] = None  # one of the tenant's equipment_categories
     description: Optional[str] = ""
     usage_info: Optional[List[UsageInfo]] = []
     technical_data: Optional[TechnicalData] = None
 
 
+# Changes of one item in a batch update
+EquipmentUpdate = partial_model(EquipmentCreate)
+
+
 class Equipment(BaseModel):
     """Full equipment model"""
     id: int
@@ -54,6 +61,7 @@ class Equipment(BaseModel):
     type: str
     status: str
     location: str
+    category: Optional[str] = None
     description: Optional[str] = ""
     usage_info: List[UsageInfo] = []
     technical_data: Optional[TechnicalData] = None
@@ -0,0 +1,21 @@
+"""
+Import Models
+Column templates for spreadsheet (CSV/XLSX) imports
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+
+
+class ImportTemplate(BaseModel):
+    """
+    Saved mapping from a spreadsheet layout to record fields
+    
+    columns maps source headers to (dotted) record fields, e.g.
+    {"Bezeichnung": "name", "Gewicht": "technical_data.weight_kg"};
+    headers not listed are matched to field names directly.
+    """
+    target: str = Field(..., pattern="^(equipment|customers)$")
+    columns: Dict[str, str] = {}
+    defaults: Dict[str, Any] = {}  # field -> value used when the cell is empty or missing
+    delimiter: Optional[str] = Field(None, min_length=1, max_length=1)  # CSV only, detected if not set
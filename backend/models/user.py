@@ -7,6 +7,11 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from models.bulk import partial_model
+
+# UserCreate fields stored under access_credentials
+CREDENTIAL_FIELDS = ("username", "password", "role", "permissions")
+
 
 class UserLogin(BaseModel):
     """Login request model"""
@@ -43,6 +48,11 @@ class UserCreate(BaseModel):
     notes: Optional[str] = ""
 
 
+# Changes of one user in a batch update; credentials live in
+# access_credentials and are not changed through batch updates
+UserUpdate = partial_model(UserCreate, exclude=CREDENTIAL_FIELDS)
+
+
 class User(BaseModel):
     """Full user model"""
     user_id: int
@@ -0,0 +1,50 @@
+"""
+Test Fixtures
+The API app running against a temporary copy of the repository's data/
+
+Settings are read when main is imported, so the environment is set up
+here, before any test module imports it.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = Path(tempfile.mkdtemp(prefix="vbs-tests-")) / "data"
+shutil.copytree(BACKEND_DIR.parent / "data", DATA_DIR)
+
+os.environ["DATA_DIR"] = str(DATA_DIR)
+os.environ["TENANTS_FILE"] = str(DATA_DIR / "tenants.json")
+os.environ["STORAGE_MODE"] = "json"
+os.environ["WARMUP_ENABLED"] = "false"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+TENANT = "tenant_esr"
+ADMIN = {"username": f"admin@{TENANT}", "password": "ESR2025!Admin"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+    shutil.rmtree(DATA_DIR.parent, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    response = client.post("/api/auth/login", json=ADMIN)
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def tenant_path(suffix: str) -> str:
+    return f"/api/tenants/{TENANT}{suffix}"
@@ -0,0 +1,73 @@
+"""Batch updates validate each item's changes against the create model's fields"""
+
+from conftest import tenant_path
+
+
+def bulk_put(client, headers, collection, items):
+    response = client.put(tenant_path(f"/{collection}/bulk"), json={"items": items}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def equipment_item(client, headers, equipment_id):
+    items = client.get(tenant_path("/equipment"), headers=headers).json()["data"]
+    return next(item for item in items if item["id"] == equipment_id)
+
+
+def test_equipment_invalid_fields_are_rejected_and_not_stored(client, auth_headers):
+    before = equipment_item(client, auth_headers, "led_003")
+    body = bulk_put(client, auth_headers, "equipment", [
+        {"id": "led_003", "status": ["a"], "name": 5, "usage_info": "x"},
+        {"id": "led_003", "status": "broken"},
+        {"id": "led_003", "colour": "red"},
+        {"id": "led_003", "name": None},
+    ])
+    assert body["summary"] == {"total": 4, "succeeded": 0, "failed": 4}
+    errors = [result["error"] for result in body["results"]]
+    assert "status" in errors[0] and "name" in errors[0] and "usage_info" in errors[0]
+    assert "status" in errors[1]
+    assert "colour" in errors[2]
+    assert "name" in errors[3]
+    
+    after = equipment_item(client, auth_headers, "led_003")
+    assert after == before
+    kpis = client.get(tenant_path("/kpis"), headers=auth_headers).json()["data"]
+    assert "['a']" not in str(kpis)
+
+
+def test_equipment_valid_changes_are_applied(client, auth_headers):
+    body = bulk_put(client, auth_headers, "equipment", [
+        {"id": "led_003", "status": "maintenance", "technical_data": {"weight_kg": 2.5}},
+        {"id": "missing_item", "status": "available"},
+    ])
+    assert [result["success"] for result in body["results"]] == [True, False]
+    record = body["results"][0]["data"]
+    assert record["status"] == "maintenance"
+    assert record["technical_data"]["weight_kg"] == 2.5
+    assert record["name"]  # untouched fields stay
+
+
+def test_user_credentials_cannot_be_changed_in_bulk(client, auth_headers):
+    body = bulk_put(client, auth_headers, "users", [
+        {"user_id": 1, "password": "plaintext"},
+        {"user_id": 1, "role": "admin", "permissions": ["everything"]},
+        {"user_id": 1, "user_type": "robot"},
+        {"user_id": 1, "contact_info": {"email": "not-an-email", "phone": "1"}},
+    ])
+    assert body["summary"]["failed"] == 4
+    errors = [result["error"] for result in body["results"]]
+    assert "password" in errors[0]
+    assert "role" in errors[1] and "permissions" in errors[1]
+    assert "user_type" in errors[2]
+    assert "email" in errors[3]
+    
+    # The stored password is still the bcrypt hash
+    login = client.post("/api/auth/login", json={"username": "admin@tenant_esr", "password": "ESR2025!Admin"})
+    assert login.status_code == 200
+
+
+def test_user_valid_changes_are_applied(client, auth_headers):
+    body = bulk_put(client, auth_headers, "users", [{"user_id": 1, "notes": "updated in bulk"}])
+    assert body["results"][0]["success"] is True
+    assert body["results"][0]["data"]["notes"] == "updated in bulk"
+    assert "password" not in body["results"][0]["data"]["access_credentials"]
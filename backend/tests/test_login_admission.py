@@ -0,0 +1,36 @@
+"""Login admission: busy rejections happen before any lookup"""
+
+import main
+from conftest import ADMIN
+
+
+def test_busy_rejection_reads_nothing(client, monkeypatch):
+    loads = []
+
+    def spy(name):
+        async def load(*args, **kwargs):
+            loads.append(name)
+            raise AssertionError(f"{name} called for a rejected attempt")
+        return load
+
+    monkeypatch.setattr(main.data_manager, "get_tenant", spy("get_tenant"))
+    monkeypatch.setattr(main.data_manager, "find_user_by_username", spy("find_user_by_username"))
+    monkeypatch.setattr(main.data_manager.backend, "load", spy("backend.load"))
+    monkeypatch.setattr(main.login_admission, "verifying", main.login_admission.max_verifying)
+    busy = main.login_admission.rejected["busy"]
+
+    response = client.post("/api/auth/login", json=ADMIN)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert loads == []
+    assert main.login_admission.rejected["busy"] == busy + 1
+
+
+def test_slot_released_after_each_attempt(client):
+    assert client.post("/api/auth/login", json=ADMIN).status_code == 200
+    assert main.login_admission.verifying == 0
+
+    wrong = {**ADMIN, "password": "wrong"}
+    assert client.post("/api/auth/login", json=wrong).status_code == 401
+    assert main.login_admission.verifying == 0
@@ -0,0 +1,32 @@
+"""Logins look users up in the username column of the users 'fields' index"""
+
+import main
+from conftest import ADMIN, TENANT, tenant_path
+
+
+def test_lookup_materializes_only_the_match(client, auth_headers, monkeypatch):
+    indexes = client.portal.call(main.data_manager.get_indexes, TENANT, "users")
+    rows = indexes["fields"]._rows
+    materialized = []
+    record = rows.record
+    monkeypatch.setattr(rows, "record", lambda seq: materialized.append(seq) or record(seq))
+
+    user = client.portal.call(main.data_manager.find_user_by_username, TENANT, ADMIN["username"])
+    assert user["access_credentials"]["username"] == ADMIN["username"]
+    assert client.portal.call(main.data_manager.find_user_by_username, TENANT, f"nobody@{TENANT}") is None
+    assert len(materialized) == 1
+
+
+def test_created_user_can_log_in(client, auth_headers):
+    user = {
+        "username": "lookup.test",
+        "password": "Lookup2025!",
+        "personal_info": {"first_name": "Lookup", "last_name": "Test"},
+        "contact_info": {"email": "lookup@example.com", "phone": "1"},
+    }
+    response = client.post(tenant_path("/users"), json=user, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    login = client.post("/api/auth/login", json={"username": f"lookup.test@{TENANT}", "password": "Lookup2025!"})
+    assert login.status_code == 200, login.text
+    assert login.json()["user"]["user_id"] == response.json()["data"]["user_id"]
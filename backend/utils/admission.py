@@ -0,0 +1,140 @@
+"""
+Login Admission
+Rate limits and a concurrency cap for password verification
+
+Every login costs a bcrypt verification (~0.25 s of CPU). A burst of
+retries or a credential-stuffing wave would otherwise queue unbounded
+work in the hashing pool and slow every tenant's requests. LoginAdmission
+decides before any file read or hash:
+
+    - token buckets per client IP and per tenant (refill per minute,
+      burst capacity), bounded in size by dropping least recently used keys
+    - a cap on admitted attempts still being checked (user lookup and
+      the verification running or queued in the hashing pool)
+
+and rejects with LoginRejected (429 + Retry-After) right away instead of
+letting the attempt wait.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+# Rejection reasons (counter keys)
+REJECT_IP = "ip"
+REJECT_TENANT = "tenant"
+REJECT_BUSY = "busy"
+
+# Seconds a client is asked to wait when verification capacity is exhausted
+BUSY_RETRY_AFTER = 1.0
+
+
+class LoginRejected(Exception):
+    """A login attempt was not admitted"""
+    
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))  # whole seconds (Retry-After)
+        super().__init__(f"Too many login attempts ({reason}), retry in {self.retry_after}s")
+
+
+class TokenBuckets:
+    """Token bucket per key: per_minute refill, burst capacity"""
+    
+    def __init__(self, per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = per_minute / 60.0
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        # key -> (tokens, monotonic time of last update)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+    
+    def take(self, key: str) -> float:
+        """Take a token; 0 if admitted, otherwise seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1.0:
+            tokens -= 1.0
+            wait = 0.0
+        else:
+            wait = (1.0 - tokens) / self.rate if self.rate > 0 else 60.0
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # A dropped bucket restarts full: only the least recently seen keys go
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+    
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class LoginAdmission:
+    """Admission decisions and counters for /api/auth/login"""
+    
+    def __init__(
+        self,
+        ip_per_minute: float = 10,
+        ip_burst: int = 20,
+        tenant_per_minute: float = 300,
+        tenant_burst: int = 100,
+        max_verifying: int = 16,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            max_verifying: Admitted attempts still being checked (lookup and
+                password verification) before further attempts are rejected
+        """
+        self.enabled = enabled
+        self.ip_buckets = TokenBuckets(ip_per_minute, ip_burst)
+        self.tenant_buckets = TokenBuckets(tenant_per_minute, tenant_burst)
+        self.max_verifying = max_verifying
+        self.verifying = 0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {REJECT_IP: 0, REJECT_TENANT: 0, REJECT_BUSY: 0}
+    
+    def _reject(self, reason: str, retry_after: float) -> None:
+        self.rejected[reason] += 1
+        raise LoginRejected(reason, retry_after)
+    
+    @contextmanager
+    def admit(self, client_ip: str, tenant_id: str) -> Iterator[None]:
+        """
+        Admit an attempt and hold a verification slot until it is checked
+        
+        Rate-limits by client IP, then by tenant, then reserves the slot,
+        so a rejected attempt never reaches the user lookup.
+        
+        Raises:
+            LoginRejected: If either bucket is empty or max_verifying
+                attempts are already being checked
+        """
+        if self.enabled:
+            wait = self.ip_buckets.take(client_ip)
+            if wait:
+                self._reject(REJECT_IP, wait)
+            wait = self.tenant_buckets.take(tenant_id)
+            if wait:
+                self._reject(REJECT_TENANT, wait)
+            if self.verifying >= self.max_verifying:
+                self._reject(REJECT_BUSY, BUSY_RETRY_AFTER)
+            self.admitted += 1
+        self.verifying += 1
+        try:
+            yield
+        finally:
+            self.verifying -= 1
+    
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "verifying": self.verifying,
+            "max_verifying": self.max_verifying,
+            "tracked_ips": len(self.ip_buckets),
+            "tracked_tenants": len(self.tenant_buckets),
+        }
@@ -0,0 +1,154 @@
+"""
+Dashboard Aggregates
+Running KPI counts for the dashboard landing page
+
+Equipment and user counts are kept by CountIndex, a derived collection
+index: DataManager builds it with the other indexes and applies every
+write to it incrementally, so reading the numbers never touches the
+records. CRM counts are computed once per crm.json generation (the
+document is only ever replaced as a whole).
+"""
+
+from typing import Optional, Dict, List, Any, Callable, Tuple
+
+from utils.indexes import CollectionIndex
+
+# Quote statuses that still await a customer decision
+OPEN_QUOTE_STATUSES = ("draft", "sent")
+
+# Invoice payment states (payment_status, or status in older documents) that are unpaid
+UNPAID_INVOICE_STATUSES = ("pending", "partially_paid", "open", "overdue")
+
+# Label for records without a category
+UNCATEGORIZED = "uncategorized"
+
+
+def _user_active(record: Dict) -> bool:
+    credentials = record.get('access_credentials') or {}
+    return credentials.get('is_active') is not False
+
+
+def _user_role(record: Dict) -> Any:
+    return (record.get('access_credentials') or {}).get('role')
+
+
+# Collection -> dimension name -> value of a record
+KPI_DIMENSIONS: Dict[str, Dict[str, Callable[[Dict], Any]]] = {
+    "equipment": {
+        "status": lambda record: record.get('status'),
+        "category": lambda record: record.get('category'),
+    },
+    "users": {
+        "role": _user_role,
+        "active": _user_active,
+    },
+}
+
+
+class CountIndex(CollectionIndex):
+    """Number of records per value of a few dimensions, kept up to date per write"""
+    
+    def __init__(self, key_field: str, dimensions: Dict[str, Callable[[Dict], Any]]):
+        """
+        Args:
+            dimensions: Name -> function returning a record's (hashable) value
+        """
+        super().__init__(key_field)
+        self.dimensions = dimensions
+        self._values: Dict[Any, Tuple] = {}
+        self._counts: Dict[str, Dict[Any, int]] = {name: {} for name in dimensions}
+    
+    @staticmethod
+    def _hashable(value: Any) -> Any:
+        return value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+    
+    def add(self, record: Dict) -> None:
+        key = record.get(self.key_field)
+        if key in self._values:
+            self.discard(key)
+        values = tuple(self._hashable(extract(record)) for extract in self.dimensions.values())
+        self._values[key] = values
+        for name, value in zip(self.dimensions, values):
+            counts = self._counts[name]
+            counts[value] = counts.get(value, 0) + 1
+    
+    def discard(self, key: Any) -> None:
+        values = self._values.pop(key, None)
+        if values is None:
+            return
+        for name, value in zip(self.dimensions, values):
+            counts = self._counts[name]
+            counts[value] -= 1
+            if not counts[value]:
+                del counts[value]
+    
+    def size(self) -> int:
+        return len(self._values)
+    
+    def counts(self, name: str) -> Dict[Any, int]:
+        """Value -> number of records for one dimension"""
+        return dict(self._counts[name])
+
+
+def by_label(counts: Dict[Any, int], labels: Optional[List[str]] = None, missing: str = "unknown") -> Dict[str, int]:
+    """
+    Counts keyed by label: the given labels first (zero if absent), then
+    other values sorted, records without a value under missing
+    """
+    result = {label: counts.get(label, 0) for label in labels or []}
+    for value in sorted((v for v in counts if v not in result and v is not None), key=str):
+        result[str(value)] = counts[value]
+    if counts.get(None):
+        result[missing] = result.get(missing, 0) + counts[None]
+    return result
+
+
+def equipment_kpis(index: CountIndex, categories: Optional[List[str]] = None) -> Dict:
+    """Equipment totals; categories is the tenant's equipment_categories config"""
+    return {
+        "total": index.size(),
+        "by_status": by_label(index.counts('status')),
+        "by_category": by_label(index.counts('category'), categories, missing=UNCATEGORIZED),
+    }
+
+
+def user_kpis(index: CountIndex) -> Dict:
+    active = index.counts('active')
+    return {
+        "total": index.size(),
+        "active": active.get(True, 0),
+        "inactive": active.get(False, 0),
+        "by_role": by_label(index.counts('role')),
+    }
+
+
+def crm_kpis(document: Optional[Dict]) -> Dict:
+    """CRM totals for one version of crm.json"""
+    document = document or {}
+    
+    def records(section: str) -> List[Dict]:
+        items = document.get(section)
+        return [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+    
+    customers = records('customers')
+    quotes = records('quotes')
+    invoices = records('invoices')
+    
+    quotes_by_status: Dict[Any, int] = {}
+    for quote in quotes:
+        status = quote.get('status')
+        quotes_by_status[status] = quotes_by_status.get(status, 0) + 1
+    
+    invoices_by_status: Dict[Any, int] = {}
+    for invoice in invoices:
+        status = invoice.get('payment_status', invoice.get('status'))
+        invoices_by_status[status] = invoices_by_status.get(status, 0) + 1
+    
+    return {
+        "customers": len(customers),
+        "active_customers": sum(1 for customer in customers if customer.get('status') == 'active'),
+        "open_quotes": sum(quotes_by_status.get(status, 0) for status in OPEN_QUOTE_STATUSES),
+        "unpaid_invoices": sum(invoices_by_status.get(status, 0) for status in UNPAID_INVOICE_STATUSES),
+        "quotes_by_status": by_label(quotes_by_status),
+        "invoices_by_status": by_label(invoices_by_status),
+    }
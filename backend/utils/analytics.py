@@ -0,0 +1,403 @@
+"""
+Equipment Analytics
+Utilization and rental revenue over usage_info bookings
+
+BookingTable is a derived equipment index that flattens every active
+booking into parallel arrays (item row, first day, last day, price per
+day, usage type code) next to per-item arrays (category code, version,
+presence). A report clips the bookings to its date windows and sums
+booked days and price_per_day x days per group with NumPy (bincount over
+the arrays), so a season of bookings across a large fleet costs a few
+array passes instead of a loop over nested usage_info dicts. NumPy is
+optional: without it the same report is computed in one Python pass.
+
+Changed items get new booking rows appended; rows of older versions are
+skipped by comparing the row's item version with the item's current one
+and dropped by a compaction once they outnumber the live rows.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_right
+from datetime import date
+from typing import Optional, Dict, List, Any, Tuple
+
+from utils.indexes import CollectionIndex
+from utils.availability import parse_day
+from utils.aggregates import UNCATEGORIZED
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, pure Python fallback below
+    np = None
+
+GROUPINGS = ("category", "item", "month")
+
+# Usage types every report lists (UsageInfo.usage_type), others as they occur
+USAGE_TYPES = ("rental", "internal")
+
+# Longest report window in days
+MAX_RANGE_DAYS = 1096
+
+
+def _price(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return 0.0
+
+
+def month_windows(start: int, end: int) -> List[Tuple[str, int, int]]:
+    """(YYYY-MM, first day, last day) per calendar month of [start, end]"""
+    windows = []
+    day = date.fromordinal(start)
+    while day.toordinal() <= end:
+        following = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        windows.append((f"{day.year:04d}-{day.month:02d}", day.toordinal(), min(end, following.toordinal() - 1)))
+        day = following
+    return windows
+
+
+class BookingTable(CollectionIndex):
+    """Active equipment bookings as flat columns for vectorized reports"""
+    
+    def __init__(self, key_field: str = "id", min_compact_rows: int = 4096):
+        super().__init__(key_field)
+        # Per item row (rows are kept for removed keys and reused if they return)
+        self._rows: Dict[Any, int] = {}
+        self._keys: List[Any] = []
+        self._names: List[Any] = []
+        self._categories = array('q')
+        self._versions = array('q')
+        self._present = array('b')
+        self._booking_counts = array('q')
+        self._category_codes: Dict[Any, int] = {}
+        self.categories: List[Any] = []  # code -> category value
+        # Per booking row
+        self._item = array('q')
+        self._item_version = array('q')
+        self._start = array('q')
+        self._end = array('q')
+        self._price = array('d')
+        self._kind = array('q')
+        self._kind_codes: Dict[str, int] = {}
+        self.kinds: List[str] = []  # code -> usage_type
+        for usage_type in USAGE_TYPES:
+            self._kind_code(usage_type)
+        self._size = 0
+        self._stale = 0
+        self.min_compact_rows = min_compact_rows
+    
+    def _kind_code(self, usage_type: Any) -> int:
+        usage_type = str(usage_type) if usage_type else "unknown"
+        code = self._kind_codes.get(usage_type)
+        if code is None:
+            code = self._kind_codes[usage_type] = len(self.kinds)
+            self.kinds.append(usage_type)
+        return code
+    
+    def _category_code(self, category: Any) -> int:
+        if not isinstance(category, (str, int, float, bool, type(None))):
+            category = repr(category)
+        code = self._category_codes.get(category)
+        if code is None:
+            code = self._category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+    
+    def add(self, record: Dict) -> None:
+        key = record.get(self.key_field)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._keys)
+            self._keys.append(key)
+            self._names.append(None)
+            self._categories.append(0)
+            self._versions.append(0)
+            self._present.append(0)
+            self._booking_counts.append(0)
+        elif self._present[row]:
+            self.discard(key)
+        
+        self._names[row] = record.get('name')
+        self._categories[row] = self._category_code(record.get('category'))
+        self._present[row] = 1
+        self._size += 1
+        
+        version = self._versions[row]
+        default_price = _price(record.get('daily_rental_rate'))
+        count = 0
+        for usage in record.get('usage_info') or []:
+            if not isinstance(usage, dict) or usage.get('is_active') is False:
+                continue
+            start = parse_day(usage.get('start_date'))
+            end = parse_day(usage.get('end_date'))
+            if start is None or end is None:
+                continue
+            if start > end:
+                start, end = end, start
+            price = usage.get('price_per_day')
+            self._item.append(row)
+            self._item_version.append(version)
+            self._start.append(start)
+            self._end.append(end)
+            self._price.append(_price(price) if price is not None else default_price)
+            self._kind.append(self._kind_code(usage.get('usage_type')))
+            count += 1
+        self._booking_counts[row] = count
+    
+    def discard(self, key: Any) -> None:
+        row = self._rows.get(key)
+        if row is None or not self._present[row]:
+            return
+        self._present[row] = 0
+        self._versions[row] += 1
+        self._stale += self._booking_counts[row]
+        self._booking_counts[row] = 0
+        self._size -= 1
+        if self._stale > self.min_compact_rows and self._stale * 2 > len(self._item):
+            self._compact()
+    
+    def _compact(self) -> None:
+        keep = [
+            i for i in range(len(self._item))
+            if self._item_version[i] == self._versions[self._item[i]]
+        ]
+        for name in ("_item", "_item_version", "_start", "_end", "_price", "_kind"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[i] for i in keep)))
+        self._stale = 0
+    
+    def size(self) -> int:
+        return self._size
+    
+    def bookings(self) -> int:
+        """Number of live booking rows"""
+        return len(self._item) - self._stale
+    
+    # =====================================================
+    # REPORTS
+    # =====================================================
+    
+    def report(
+        self,
+        start: int,
+        end: int,
+        group_by: str = "category",
+        category: Optional[Any] = None,
+        categories: Optional[List[str]] = None,
+        limit: int = 100
+    ) -> Dict:
+        """
+        Utilization and price_per_day x days per usage type for [start, end]
+        
+        An item's booked days are capped at the window length, so
+        overlapping bookings cannot push utilization past 100%.
+        
+        Args:
+            group_by: 'category', 'item' (top booked items by utilization) or 'month'
+            category: Only items of this category
+            categories: Tenant's equipment_categories, listed first
+            limit: Rows for group_by='item'
+        
+        Raises:
+            ValueError: On an unknown grouping
+        """
+        if group_by not in GROUPINGS:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUPINGS)}")
+        
+        if group_by == "month":
+            windows = month_windows(start, end)
+        else:
+            windows = [(None, start, end)]
+        
+        n = len(self._keys)
+        if group_by == "category":
+            group_of_item = self._categories
+            groups = len(self.categories)
+        elif group_by == "item":
+            group_of_item = array('q', range(n))
+            groups = n
+        else:
+            group_of_item = array('q', bytes(8 * n))
+            groups = 1
+        
+        category_code = self._category_codes.get(category, -1) if category is not None else None
+        compute = _sums_numpy if np is not None else _sums_python
+        items, sums = compute(self, windows, group_of_item, groups, category_code)
+        
+        kinds = len(self.kinds)
+        item_count = sum(items)
+        rows = []  # (key, group, window length, items, booked, days per kind, revenue per kind)
+        booked_total, days_total, revenue_total = 0.0, [0.0] * kinds, [0.0] * kinds
+        for (label, first, last), (booked, days, revenue) in zip(windows, sums):
+            length = last - first + 1
+            if group_by == "item":
+                # Top items among those booked in the window
+                selected = heapq.nlargest(
+                    limit,
+                    [group for group, value in enumerate(booked) if value],
+                    key=lambda group: (booked[group], sum(revenue[group * kinds:(group + 1) * kinds]))
+                )
+            else:
+                selected = [group for group in range(groups) if items[group]]
+            for group in selected:
+                if group_by == "month":
+                    key = label
+                elif group_by == "item":
+                    key = self._keys[group]
+                else:
+                    key = self.categories[group]
+                slots = slice(group * kinds, (group + 1) * kinds)
+                rows.append((key, group, length, items[group], booked[group], days[slots], revenue[slots]))
+            booked_total += sum(booked)
+            for k in range(kinds):
+                days_total[k] += sum(days[k::kinds])
+                revenue_total[k] += sum(revenue[k::kinds])
+        
+        if group_by == "category":
+            # Configured categories first (also when empty), then the others
+            order = {label: i for i, label in enumerate(categories or [])}
+            seen = {row[0] for row in rows}
+            rows.extend(
+                (label, None, end - start + 1, 0, 0.0, [0.0] * kinds, [0.0] * kinds)
+                for label in order if label not in seen
+            )
+            rows.sort(key=lambda row: (0, order[row[0]], "") if row[0] in order else (
+                1 if row[0] is not None else 2, 0, str(row[0])
+            ))
+        
+        return {
+            "days": end - start + 1,
+            "group_by": group_by,
+            "engine": "numpy" if np is not None else "python",
+            "totals": self._summary(
+                item_count, item_count * (end - start + 1), booked_total, days_total, revenue_total
+            ),
+            "groups": [
+                {
+                    **self._group_key(group_by, key, group),
+                    **self._summary(items_count, items_count * length, booked, days, revenue)
+                }
+                for key, group, length, items_count, booked, days, revenue in rows
+            ],
+        }
+    
+    def _group_key(self, group_by: str, key: Any, group: Optional[int]) -> Dict:
+        if group_by == "item":
+            return {self.key_field: key, "name": self._names[group], "category": self.categories[self._categories[group]]}
+        if group_by == "category":
+            return {"category": UNCATEGORIZED if key is None else key}
+        return {"month": key}
+    
+    def _summary(self, items: int, capacity: int, booked: float, days: List[float], revenue: List[float]) -> Dict:
+        return {
+            "items": items,
+            "capacity_days": capacity,
+            "booked_days": int(booked),
+            "utilization_percent": round(100.0 * booked / capacity, 2) if capacity else 0.0,
+            "by_usage_type": {
+                kind: {"days": int(days[k]), "revenue": round(revenue[k], 2)}
+                for k, kind in enumerate(self.kinds)
+                if k < len(USAGE_TYPES) or days[k]
+            },
+            "rental_revenue": round(revenue[0], 2),
+        }
+
+
+# =====================================================
+# ENGINES
+# =====================================================
+# Both return (items per group, [(booked days per group (capped per item),
+# days per group*kinds+kind, revenue per group*kinds+kind)] per window)
+
+def _sums_numpy(
+    table: BookingTable,
+    windows: List[Tuple[Any, int, int]],
+    group_of_item: array,
+    groups: int,
+    category_code: Optional[int]
+) -> Tuple[List[int], List[Tuple[List[float], List[float], List[float]]]]:
+    n = len(table._keys)
+    kinds = len(table.kinds)
+    selected = np.frombuffer(table._present, dtype=np.int8).astype(bool)
+    if category_code is not None:
+        selected &= np.frombuffer(table._categories, dtype=np.int64) == category_code
+    item_group = np.frombuffer(group_of_item, dtype=np.int64)
+    items = np.bincount(item_group[selected], minlength=groups)
+    
+    b_item = np.frombuffer(table._item, dtype=np.int64)
+    live = np.frombuffer(table._item_version, dtype=np.int64) == np.frombuffer(table._versions, dtype=np.int64)[b_item]
+    live &= selected[b_item]
+    b_item = b_item[live]
+    b_start = np.frombuffer(table._start, dtype=np.int64)[live]
+    b_end = np.frombuffer(table._end, dtype=np.int64)[live]
+    b_price = np.frombuffer(table._price, dtype=np.float64)[live]
+    b_slot = item_group[b_item] * kinds + np.frombuffer(table._kind, dtype=np.int64)[live]
+    
+    sums = []
+    for _, first, last in windows:
+        hit = (b_start <= last) & (b_end >= first)
+        item = b_item[hit]
+        days = (np.minimum(b_end[hit], last) - np.maximum(b_start[hit], first) + 1).astype(np.float64)
+        booked = np.minimum(np.bincount(item, weights=days, minlength=n), last - first + 1)
+        slot = b_slot[hit]
+        sums.append((
+            np.bincount(item_group[selected], weights=booked[selected], minlength=groups).tolist(),
+            np.bincount(slot, weights=days, minlength=groups * kinds).tolist(),
+            np.bincount(slot, weights=days * b_price[hit], minlength=groups * kinds).tolist(),
+        ))
+    return items.tolist(), sums
+
+
+def _sums_python(
+    table: BookingTable,
+    windows: List[Tuple[Any, int, int]],
+    group_of_item: array,
+    groups: int,
+    category_code: Optional[int]
+) -> Tuple[List[int], List[Tuple[List[float], List[float], List[float]]]]:
+    kinds = len(table.kinds)
+    present, categories, versions = table._present, table._categories, table._versions
+    
+    def is_selected(row: int) -> bool:
+        return present[row] and (category_code is None or categories[row] == category_code)
+    
+    items = [0] * groups
+    for row in range(len(table._keys)):
+        if is_selected(row):
+            items[group_of_item[row]] += 1
+    
+    firsts = [first for _, first, _ in windows]
+    per_item: List[Dict[int, float]] = [{} for _ in windows]
+    days_sums = [[0.0] * (groups * kinds) for _ in windows]
+    revenue_sums = [[0.0] * (groups * kinds) for _ in windows]
+    last_day = windows[-1][2]
+    
+    for i, row in enumerate(table._item):
+        if table._item_version[i] != versions[row] or not is_selected(row):
+            continue
+        start, end = table._start[i], table._end[i]
+        if start > last_day or end < firsts[0]:
+            continue
+        slot = group_of_item[row] * kinds + table._kind[i]
+        price = table._price[i]
+        # Windows are consecutive: walk from the one containing start
+        w = max(0, bisect_right(firsts, start) - 1)
+        while w < len(windows) and windows[w][1] <= end:
+            _, first, last = windows[w]
+            days = min(end, last) - max(start, first) + 1
+            if days > 0:
+                booked = per_item[w]
+                booked[row] = booked.get(row, 0.0) + days
+                days_sums[w][slot] += days
+                revenue_sums[w][slot] += days * price
+            w += 1
+    
+    sums = []
+    for w, (_, first, last) in enumerate(windows):
+        length = last - first + 1
+        booked_sums = [0.0] * groups
+        for row, booked in per_item[w].items():
+            booked_sums[group_of_item[row]] += min(booked, length)
+        sums.append((booked_sums, days_sums[w], revenue_sums[w]))
+    return items, sums
@@ -3,21 +3,124 @@ Authentication Manager
 Handles JWT tokens and password hashing
 """
 
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, FrozenSet
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from utils import metrics
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated caller parsed from a verified JWT"""
+    user_id: Optional[int]
+    tenant_id: Optional[str]
+    username: Optional[str]
+    role: Optional[str]
+    permissions: FrozenSet[str]
+    expires_at: float
+    payload: Dict = field(compare=False, hash=False)
+    
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "Principal":
+        return cls(
+            user_id=payload.get('user_id'),
+            tenant_id=payload.get('tenant_id'),
+            username=payload.get('username'),
+            role=payload.get('role'),
+            permissions=frozenset(payload.get('permissions', [])),
+            expires_at=float(payload.get('exp', 0)),
+            payload=payload
+        )
+    
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.permissions
+
+
+class TokenCache:
+    """
+    LRU cache of verified tokens
+    
+    Entries are dropped when they reach their JWT exp, so a cached principal
+    is never served for a token jwt.decode would reject as expired.
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Principal]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, token: str) -> Optional[Principal]:
+        principal = self._entries.get(token)
+        if principal is None:
+            self.misses += 1
+            return None
+        
+        if principal.expires_at <= time.time():
+            del self._entries[token]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return principal
+    
+    def put(self, token: str, principal: Principal) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[token] = principal
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
 class AuthManager:
     """Manages authentication and authorization"""
     
-    def __init__(self, secret_key: str, algorithm: str = "HS256"):
+    def __init__(
+        self,
+        secret_key: str,
+        algorithm: str = "HS256",
+        hash_workers: int = 4,
+        token_cache_size: int = 1024
+    ):
         self.secret_key = secret_key
         self.algorithm = algorithm
+        self.token_cache = TokenCache(max_size=token_cache_size)
+        self.hash_workers = hash_workers
+        # bcrypt releases the GIL, so a small thread pool runs hashes in
+        # parallel without blocking the event loop
+        self._hash_executor = ThreadPoolExecutor(
+            max_workers=hash_workers,
+            thread_name_prefix="bcrypt"
+        )
     
     def hash_password(self, password: str) -> str:
         """Hash a password using bcrypt"""
@@ -29,12 +132,62 @@ class AuthManager:
         Also supports plain text for development (temporary)
         """
         # Check if password is already hashed (starts with $2b$ for bcrypt)
-        if hashed_password.startswith('$2b$') or hashed_password.startswith('$2a$'):
+        if self.is_hashed(hashed_password):
             return pwd_context.verify(plain_password, hashed_password)
         else:
             # Plain text comparison (DEVELOPMENT ONLY)
             return plain_password == hashed_password
     
+    @staticmethod
+    def is_hashed(password: str) -> bool:
+        """True if the stored password is a bcrypt hash"""
+        return password.startswith('$2b$') or password.startswith('$2a$')
+    
+    async def hash_password_async(self, password: str) -> str:
+        """Hash a password in the bcrypt worker pool"""
+        loop = asyncio.get_running_loop()
+        with metrics.span('auth.password_hash'):
+            return await loop.run_in_executor(self._hash_executor, pwd_context.hash, password)
+    
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a password without blocking the event loop
+        
+        bcrypt hashes are checked in the bounded worker pool; the plain-text
+        development fallback is cheap and stays inline.
+        """
+        if not self.is_hashed(hashed_password):
+            return self.verify_password(plain_password, hashed_password)
+        
+        loop = asyncio.get_running_loop()
+        # Includes time queued behind other logins in the worker pool
+        with metrics.span('auth.password_verify'):
+            return await loop.run_in_executor(
+                self._hash_executor,
+                pwd_context.verify,
+                plain_password,
+                hashed_password
+            )
+    
+    async def warm_up(self) -> None:
+        """
+        Load the bcrypt backend, start every hashing thread and run the JWT
+        encode/decode path once, so the first logins after startup do not
+        pay for it
+        """
+        loop = asyncio.get_running_loop()
+        hashed = await loop.run_in_executor(self._hash_executor, pwd_context.hash, "warm-up")
+        await asyncio.gather(*(
+            loop.run_in_executor(self._hash_executor, pwd_context.verify, "warm-up", hashed)
+            for _ in range(self.hash_workers)
+        ))
+        # Not through authenticate(): the token must not land in the cache
+        self.decode_token(self.create_access_token({"warm_up": True}, timedelta(minutes=1)))
+    
+    def close(self) -> None:
+        """Shut down the password hashing pool"""
+        self._hash_executor.shutdown(wait=False)
+    
     def create_access_token(
         self, 
         data: Dict, 
@@ -62,11 +215,12 @@ class AuthManager:
             "iat": datetime.utcnow()
         })
         
-        encoded_jwt = jwt.encode(
-            to_encode, 
-            self.secret_key, 
-            algorithm=self.algorithm
-        )
+        with metrics.span('auth.token_encode'):
+            encoded_jwt = jwt.encode(
+                to_encode, 
+                self.secret_key, 
+                algorithm=self.algorithm
+            )
         
         return encoded_jwt
     
@@ -93,6 +247,23 @@ class AuthManager:
         except JWTError as e:
             raise ValueError(f"Invalid token: {str(e)}")
     
+    def authenticate(self, token: str) -> Principal:
+        """
+        Verify a token and return its principal, using the token cache
+        
+        Signature verification and claim parsing only happen on a cache
+        miss; later requests with the same token are a dict lookup.
+        
+        Raises:
+            ValueError: If token is invalid or expired
+        """
+        principal = self.token_cache.get(token)
+        if principal is None:
+            with metrics.span('auth.token_decode'):
+                principal = Principal.from_payload(self.decode_token(token))
+            self.token_cache.put(token, principal)
+        return principal
+    
     def check_permission(self, user_payload: Dict, required_permission: str) -> bool:
         """
         Check if user has a specific permission
@@ -0,0 +1,186 @@
+"""
+Equipment Availability
+Interval index over equipment usage_info bookings
+
+Each equipment item keeps its active bookings sorted by start day together
+with a running maximum of end days, so "is this item free between X and Y"
+is one bisect per item. Items are also grouped by type and location so a
+query only visits matching equipment.
+
+The index keeps only what a query needs per item (a __slots__ entry with
+status, name and day arrays), not the equipment records: bookings are
+stored as positions in usage_info, and available records and conflicting
+bookings are looked up through the caller's record lookup (the field
+index) when a query returns.
+"""
+
+from array import array
+from bisect import bisect_right
+from datetime import date
+from typing import Optional, Dict, List, Any, Set, Tuple, Callable
+
+from utils.indexes import CollectionIndex
+
+
+def parse_day(value: Any) -> Optional[int]:
+    """Day ordinal for 'YYYY-MM-DD' or an ISO timestamp, None if unparseable"""
+    if isinstance(value, date):
+        return value.toordinal()
+    if not isinstance(value, str) or len(value) < 10:
+        return None
+    try:
+        return date.fromisoformat(value[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+class BookingIntervals:
+    """Bookings of one equipment item (inclusive day ranges)"""
+    
+    __slots__ = ("starts", "ends", "max_ends", "positions")
+    
+    def __init__(self, bookings: List[Tuple[int, int, int]]):
+        """
+        Args:
+            bookings: (start day, end day, position in usage_info)
+        """
+        bookings.sort()
+        self.starts = array('l', (b[0] for b in bookings))
+        self.ends = array('l', (b[1] for b in bookings))
+        self.positions = array('l', (b[2] for b in bookings))
+        # max_ends[i] = latest end among bookings[0..i] (handles overlaps)
+        self.max_ends = array('l')
+        latest = None
+        for end in self.ends:
+            latest = end if latest is None else max(latest, end)
+            self.max_ends.append(latest)
+    
+    def is_free(self, start: int, end: int) -> bool:
+        """True if no booking overlaps [start, end]"""
+        pos = bisect_right(self.starts, end) - 1
+        return pos < 0 or self.max_ends[pos] < start
+    
+    def conflicts(self, start: int, end: int) -> List[int]:
+        """usage_info positions of bookings overlapping [start, end]"""
+        pos = bisect_right(self.starts, end)
+        return [self.positions[i] for i in range(pos) if self.ends[i] >= start]
+
+
+# Shared by all items without active bookings
+NO_BOOKINGS = BookingIntervals([])
+
+
+class AvailabilityEntry:
+    """What a query needs to know about one equipment item"""
+    
+    __slots__ = ("status", "name", "type", "location", "intervals")
+    
+    def __init__(self, record: Dict, intervals: BookingIntervals):
+        self.status = record.get('status')
+        self.name = record.get('name')
+        self.type = record.get('type')
+        self.location = record.get('location')
+        self.intervals = intervals
+
+
+class AvailabilityIndex(CollectionIndex):
+    """Per-tenant availability index over the equipment collection"""
+    
+    def __init__(self, key_field: str = "id"):
+        super().__init__(key_field)
+        self._entries: Dict[Any, AvailabilityEntry] = {}
+        self._order: Dict[Any, int] = {}  # storage order, kept across updates
+        self._by_type: Dict[Any, Set[Any]] = {}
+        self._by_location: Dict[Any, Set[Any]] = {}
+    
+    @staticmethod
+    def _intervals(record: Dict) -> BookingIntervals:
+        bookings = []
+        for position, usage in enumerate(record.get('usage_info') or []):
+            if not isinstance(usage, dict) or usage.get('is_active') is False:
+                continue
+            start = parse_day(usage.get('start_date'))
+            end = parse_day(usage.get('end_date'))
+            if start is None or end is None:
+                continue
+            bookings.append((start, end, position) if start <= end else (end, start, position))
+        return BookingIntervals(bookings) if bookings else NO_BOOKINGS
+    
+    def add(self, record: Dict) -> None:
+        key = record.get(self.key_field)
+        self._order.setdefault(key, len(self._order))
+        if key in self._entries:
+            self.discard(key)
+        entry = AvailabilityEntry(record, self._intervals(record))
+        self._entries[key] = entry
+        self._by_type.setdefault(entry.type, set()).add(key)
+        self._by_location.setdefault(entry.location, set()).add(key)
+    
+    def discard(self, key: Any) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for groups, value in ((self._by_type, entry.type), (self._by_location, entry.location)):
+            keys = groups.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del groups[value]
+    
+    def size(self) -> int:
+        return len(self._entries)
+    
+    def query(
+        self,
+        start: int,
+        end: int,
+        records: Callable[[Any], Optional[Dict]],
+        equipment_type: Optional[str] = None,
+        location: Optional[str] = None,
+        exclude_statuses: Tuple[str, ...] = ("maintenance",)
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Equipment free / booked for the inclusive day range [start, end]
+        
+        Args:
+            records: Record lookup by key (e.g. FieldIndex.get)
+        
+        Returns:
+            (available records, [{"id", "name", "conflicts"}] for booked items)
+        """
+        candidates: Optional[Set[Any]] = None
+        for groups, value in ((self._by_type, equipment_type), (self._by_location, location)):
+            if value is None:
+                continue
+            keys = groups.get(value, set())
+            candidates = keys if candidates is None else candidates & keys
+        keys = self._entries.keys() if candidates is None else candidates
+        
+        available_keys, booked_keys = [], []
+        for key in keys:
+            entry = self._entries[key]
+            if entry.status in exclude_statuses:
+                continue
+            if entry.intervals.is_free(start, end):
+                available_keys.append(key)
+            else:
+                booked_keys.append(key)
+        
+        available_keys.sort(key=self._order.__getitem__)
+        booked_keys.sort(key=self._order.__getitem__)
+        
+        available = [record for record in map(records, available_keys) if record is not None]
+        booked = []
+        for key in booked_keys:
+            entry = self._entries[key]
+            usage_info = (records(key) or {}).get('usage_info') or []
+            booked.append({
+                self.key_field: key,
+                "name": entry.name,
+                "conflicts": [
+                    usage_info[position]
+                    for position in entry.intervals.conflicts(start, end)
+                    if position < len(usage_info)
+                ]
+            })
+        return available, booked
@@ -0,0 +1,134 @@
+"""
+JSON Codec
+Pluggable JSON encoding/decoding for storage files and HTTP responses
+
+The active codec is chosen once at startup (settings.JSON_CODEC):
+    auto    - orjson if it is installed, otherwise the stdlib json module
+    orjson  - orjson (fails at startup if it is not installed)
+    stdlib  - the stdlib json module
+
+Storage documents are written indented (human readable, as before) unless
+compact mode is enabled (settings.JSON_STORAGE_COMPACT). Both codecs read
+either layout, so switching back and forth needs no migration.
+"""
+
+import json
+from typing import Any, Dict, Union
+
+from fastapi.responses import JSONResponse
+
+from utils import metrics
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+JSON_CODECS = ("auto", "orjson", "stdlib")
+
+
+class JSONCodec:
+    """Encode/decode JSON to and from UTF-8 bytes"""
+    
+    name = "base"
+    
+    def loads(self, data: Union[bytes, str]) -> Any:
+        raise NotImplementedError
+    
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        raise NotImplementedError
+
+
+class StdlibCodec(JSONCodec):
+    name = "stdlib"
+    
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+    
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        if indent:
+            text = json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+        else:
+            text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+        return text.encode('utf-8')
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+    
+    def __init__(self):
+        if orjson is None:
+            raise RuntimeError("JSON_CODEC=orjson but the orjson package is not installed")
+        self._options = orjson.OPT_NON_STR_KEYS
+    
+    def loads(self, data: Union[bytes, str]) -> Any:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(data)
+    
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        options = self._options | orjson.OPT_INDENT_2 if indent else self._options
+        return orjson.dumps(obj, default=str, option=options)
+
+
+def create_codec(name: str = "auto") -> JSONCodec:
+    """Codec instance for a JSON_CODEC setting value"""
+    if name not in JSON_CODECS:
+        raise ValueError(f"Unknown JSON codec: {name} (expected one of {', '.join(JSON_CODECS)})")
+    if name == "stdlib" or (name == "auto" and orjson is None):
+        return StdlibCodec()
+    return OrjsonCodec()
+
+
+# Active configuration (see configure())
+_codec: JSONCodec = create_codec("auto")
+_compact_storage = False
+
+
+def configure(name: str = "auto", compact_storage: bool = False) -> JSONCodec:
+    """Select the process-wide codec and on-disk layout"""
+    global _codec, _compact_storage
+    _codec = create_codec(name)
+    _compact_storage = compact_storage
+    return _codec
+
+
+def get_codec() -> JSONCodec:
+    return _codec
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON with the active codec (raises json.JSONDecodeError)"""
+    return _codec.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to compact UTF-8 JSON (or indented) with the active codec"""
+    return _codec.dumps(obj, indent=indent)
+
+
+def dumps_str(obj: Any) -> str:
+    """Compact JSON text (for NDJSON lines and text columns)"""
+    return _codec.dumps(obj).decode('utf-8')
+
+
+def dumps_document(obj: Any) -> bytes:
+    """Serialize a storage document in the configured on-disk layout"""
+    return _codec.dumps(obj, indent=not _compact_storage)
+
+
+def codec_info() -> Dict:
+    return {"codec": _codec.name, "compact_storage": _compact_storage}
+
+
+class CodecJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with the active codec
+    
+    Used as the app's default_response_class. Endpoints that already hold
+    plain JSON data can return it wrapped in this class directly to skip
+    FastAPI's jsonable_encoder pass over the whole payload.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        with metrics.span('response.serialize'):
+            return _codec.dumps(content)
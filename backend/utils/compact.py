@@ -0,0 +1,156 @@
+"""
+Compact Records
+Row stores for the records held by in-memory collection indexes
+
+FieldIndex keeps every record of a cached collection. Parsed JSON is
+expensive to hold: each record is a tree of dicts, lists and strings at
+several hundred bytes of object overhead per record and per nested
+usage_info/technical_data item. PackedRows keeps instead
+
+    - the indexed (hot) fields as columns: one small integer code per row
+      into a list of distinct values (status, type, location, role, ...),
+      so filters never touch the records
+    - each record as compact JSON in one shared byte arena, addressed by
+      per-row offset/length arrays (no per-record Python objects at all)
+
+and parses a record back into a dict only when it is returned.
+RecordRows is the uncompressed variant holding the parsed dicts
+(for documents that are cached as a whole anyway, like crm.json).
+"""
+
+from array import array
+from typing import Optional, Dict, List, Any, Tuple
+
+from utils import codec
+
+
+class RecordRows:
+    """Rows kept as the given record dicts (shared, read-only)"""
+    
+    def __init__(self, width: int):
+        self._records: Dict[int, Dict] = {}
+        self._values: Dict[int, Tuple] = {}
+    
+    def put(self, row: int, record: Dict, values: Tuple) -> None:
+        self._records[row] = record
+        self._values[row] = values
+    
+    def remove(self, row: int) -> None:
+        del self._records[row]
+        del self._values[row]
+    
+    def record(self, row: int) -> Optional[Dict]:
+        return self._records.get(row)
+    
+    def values(self, row: int) -> Tuple:
+        return self._values[row]
+    
+    def value(self, row: int, position: int) -> Any:
+        return self._values[row][position]
+    
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class ValueColumn:
+    """One indexed field: an interned value code per row"""
+    
+    __slots__ = ("codes", "distinct", "_lookup")
+    
+    def __init__(self):
+        self.codes = array('I')
+        self.distinct: List[Any] = []
+        self._lookup: Dict[Any, int] = {}
+    
+    def set(self, row: int, value: Any) -> None:
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.distinct)
+            self.distinct.append(value)
+        if row < len(self.codes):
+            self.codes[row] = code
+        else:
+            # Rows are numbered densely (FieldIndex sequence numbers)
+            self.codes.extend([0] * (row - len(self.codes)))
+            self.codes.append(code)
+    
+    def get(self, row: int) -> Any:
+        return self.distinct[self.codes[row]]
+
+
+class PackedRows:
+    """
+    Columnar hot fields plus records packed into a byte arena
+    
+    Records are serialized with the active codec and parsed again by
+    record(), so every caller gets its own fresh dict. An updated record is
+    appended to the arena; the space of old versions is reclaimed by
+    repacking once it makes up half of the arena.
+    """
+    
+    def __init__(self, width: int, min_repack_bytes: int = 1 << 20):
+        self._columns = [ValueColumn() for _ in range(width)]
+        self._arena = bytearray()
+        self._offsets = array('Q')
+        self._lengths = array('I')  # 0 = no record in this row
+        self._size = 0
+        self._garbage = 0
+        self.min_repack_bytes = min_repack_bytes
+    
+    def _release(self, row: int) -> None:
+        length = self._lengths[row]
+        if length:
+            self._garbage += length
+            self._lengths[row] = 0
+            self._size -= 1
+    
+    def put(self, row: int, record: Dict, values: Tuple) -> None:
+        blob = codec.dumps(record)
+        if row < len(self._lengths):
+            self._release(row)
+        else:
+            # Rows are numbered densely (FieldIndex sequence numbers)
+            missing = row + 1 - len(self._lengths)
+            self._offsets.extend([0] * missing)
+            self._lengths.extend([0] * missing)
+        self._offsets[row] = len(self._arena)
+        self._lengths[row] = len(blob)
+        self._arena += blob
+        self._size += 1
+        for column, value in zip(self._columns, values):
+            column.set(row, value)
+        if self._garbage > self.min_repack_bytes and self._garbage * 2 > len(self._arena):
+            self._repack()
+    
+    def _repack(self) -> None:
+        arena = bytearray()
+        for row, length in enumerate(self._lengths):
+            if length:
+                offset = self._offsets[row]
+                self._offsets[row] = len(arena)
+                arena += self._arena[offset:offset + length]
+        self._arena = arena
+        self._garbage = 0
+    
+    def remove(self, row: int) -> None:
+        self._release(row)
+    
+    def record(self, row: int) -> Optional[Dict]:
+        length = self._lengths[row] if row < len(self._lengths) else 0
+        if not length:
+            return None
+        offset = self._offsets[row]
+        return codec.loads(self._arena[offset:offset + length])
+    
+    def nbytes(self) -> int:
+        """Arena size (packed records including not yet reclaimed space)"""
+        return len(self._arena)
+    
+    def values(self, row: int) -> Tuple:
+        return tuple(column.get(row) for column in self._columns)
+    
+    def value(self, row: int, position: int) -> Any:
+        return self._columns[position].get(row)
+    
+    def __len__(self) -> int:
+        return self._size
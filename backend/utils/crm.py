@@ -0,0 +1,85 @@
+"""
+CRM Indexes
+Per-tenant indexes over crm.json (customers, communications, quotes, invoices)
+
+Each section of the CRM document gets a FieldIndex keyed by "id" with the
+filters the dashboards need (customer_id, status, channel), so customer
+detail pages and filtered lists are served a page at a time instead of
+shipping the whole document.
+"""
+
+from typing import Optional, Dict, List, Any, Tuple
+
+from utils.indexes import FieldIndex
+from utils.search import SearchIndex, create_search_index
+from utils.aggregates import crm_kpis
+
+# Section -> filter name -> dotted record field
+CRM_SECTIONS = {
+    "customers": {
+        "status": "status",
+    },
+    "communications": {
+        "customer_id": "customer_id",
+        "channel": "channel",
+    },
+    "quotes": {
+        "customer_id": "customer_id",
+        "status": "status",
+    },
+    "invoices": {
+        "customer_id": "customer_id",
+        "status": "payment_status",  # invoices carry their state in payment_status
+    },
+}
+
+# Sections that belong to a customer (customer_id field)
+CUSTOMER_SECTIONS = ("communications", "quotes", "invoices")
+
+
+class CrmIndex:
+    """Indexes for one tenant's CRM document"""
+    
+    def __init__(self, document: Optional[Dict]):
+        document = document or {}
+        self.sections: Dict[str, FieldIndex] = {}
+        for section, fields in CRM_SECTIONS.items():
+            index = FieldIndex("id", fields)
+            records = document.get(section)
+            index.build(records if isinstance(records, list) else [])
+            self.sections[section] = index
+        
+        # Full-text search over customers (see utils/search.py)
+        self.search: SearchIndex = create_search_index("customers")
+        customers = document.get("customers")
+        self.search.build(customers if isinstance(customers, list) else [])
+        
+        # Landing page counts (open quotes, unpaid invoices, ...)
+        self.kpis: Dict = crm_kpis(document)
+    
+    def _section(self, section: str) -> FieldIndex:
+        index = self.sections.get(section)
+        if index is None:
+            raise ValueError(f"Unknown CRM section: {section}")
+        return index
+    
+    def get(self, section: str, record_id: Any) -> Optional[Dict]:
+        """Single record by id"""
+        return self._section(section).get(record_id)
+    
+    def page(
+        self,
+        section: str,
+        filters: Dict[str, Any],
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Filtered, cursor-paginated records of a section"""
+        return self._section(section).page(filters, limit=limit, cursor=cursor)
+    
+    def customer_summary(self, customer_id: Any) -> Dict[str, int]:
+        """Number of communications / quotes / invoices for a customer"""
+        return {
+            section: self.sections[section].count("customer_id", customer_id)
+            for section in CUSTOMER_SECTIONS
+        }
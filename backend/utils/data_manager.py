@@ -1,38 +1,438 @@
 """
 Data Manager
-Handles all JSON file operations for multi-tenant data
+Handles all data operations for multi-tenant data
 """
 
-import json
-import aiofiles
+import asyncio
+import os
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, AsyncIterator, Callable, Awaitable, Hashable, Tuple
 from datetime import datetime
 
+from utils.tenant_registry import TenantRegistry
+from utils.storage import StorageBackend, COLLECTION_KEYS, create_backend, read_json, write_json
+from utils.indexes import CollectionIndex, FieldIndex
+from utils.availability import AvailabilityIndex, parse_day
+from utils.document_cache import DocumentCache, CachedDocument
+from utils.crm import CrmIndex
+from utils.search import SEARCH_TYPES, create_search_index
+from utils.events import ChangeFeed, create_change_feed, redact
+from utils.aggregates import CountIndex, KPI_DIMENSIONS, equipment_kpis, user_kpis
+from utils.analytics import BookingTable, MAX_RANGE_DAYS
+from utils.residency import (
+    TenantResidency, estimate_json_bytes, INDEX_BYTES_PER_JSON_BYTE, PARSED_BYTES_PER_JSON_BYTE
+)
+from utils.locking import LockManager, create_generation_counters
+from utils import metrics
+
+STORAGE_MODES = ("json", "journal", "sqlite")
+
+# Per-tenant JSON documents served through the document cache
+TENANT_DOCUMENTS = ("crm", "production", "dashboard-config", "import-templates")
+
+# Fields never published on the change feed
+REDACTED_FIELDS = {
+    "users": ["access_credentials.password"],
+}
+
+# Filter name -> dotted record field for the listing endpoints
+LIST_FILTERS = {
+    "users": {
+        "user_type": "user_type",
+        "role": "access_credentials.role",
+    },
+    "equipment": {
+        "status": "status",
+        "type": "type",
+        "location": "location",
+    },
+}
+
+# Lookup name -> dotted record field, held as extra columns of the 'fields' index
+LOOKUP_FIELDS = {
+    "users": {
+        "username": "access_credentials.username",
+    },
+}
+
 
 class DataManager:
-    """Manages reading and writing JSON data files"""
+    """Manages tenant data on top of a pluggable storage backend"""
     
-    def __init__(self, data_dir: str):
+    def __init__(
+        self,
+        data_dir: str,
+        registry_check_interval: float = 2.0,
+        storage_mode: str = "json",
+        journal_compact_threshold: int = 1000,
+        journal_fsync: bool = True,
+        sqlite_path: Optional[str] = None,
+        document_check_interval: float = 1.0,
+        change_feed: Optional[ChangeFeed] = None,
+        change_feed_history: int = 1000,
+        change_feed_queue_size: int = 256,
+        change_feed_poll_interval: float = 0.1,
+        change_feed_max_log_bytes: int = 4 * 1024 * 1024,
+        lock_timeout: float = 30.0,
+        compact_records: bool = True,
+        memory_budget: int = 0
+    ):
+        """
+        Args:
+            memory_budget: Estimated bytes of tenant data kept in memory
+                before least recently used tenants are evicted (0 = no limit)
+        """
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {storage_mode}")
+        
         self.data_dir = Path(data_dir)
         self.tenants_file = self.data_dir / "tenants.json"
+        self.tenants = TenantRegistry(
+            self.tenants_file,
+            self._read_json,
+            check_interval=registry_check_interval
+        )
+        self.storage_mode = storage_mode
+        # Coordination between worker processes sharing data_dir (utils/locking.py)
+        self.locks = LockManager(self.data_dir / ".locks", timeout=lock_timeout)
+        self.generations = create_generation_counters(self.data_dir / ".generations")
+        self.backend: StorageBackend = create_backend(
+            storage_mode,
+            self.data_dir,
+            journal_compact_threshold=journal_compact_threshold,
+            sqlite_path=sqlite_path,
+            locks=self.locks,
+            journal_fsync=journal_fsync
+        )
+        self.documents = DocumentCache(
+            read_json,
+            write_json,
+            check_interval=document_check_interval,
+            locks=self.locks,
+            counters=self.generations
+        )
+        # Shared by the workers through data/.events (in-process without fcntl)
+        self.changes = change_feed or create_change_feed(
+            self.data_dir / ".events",
+            self.generations,
+            history_size=change_feed_history,
+            queue_size=change_feed_queue_size,
+            poll_interval=change_feed_poll_interval,
+            max_log_bytes=change_feed_max_log_bytes
+        )
+        self.residency = TenantResidency(memory_budget)
+        
+        # (tenant_id, collection) -> (backend version, {name: index})
+        self._indexes: Dict[Tuple[str, str], Tuple[Hashable, Dict[str, CollectionIndex]]] = {}
+        # tenant_id -> (crm document generation, CrmIndex)
+        self._crm_indexes: Dict[str, Tuple[int, CrmIndex]] = {}
+        # (tenant_id, collection) -> (backend version, document header)
+        self._headers: Dict[Tuple[str, str], Tuple[Hashable, Dict]] = {}
+        
+        # Derived per-collection indexes: collection -> {name: factory}
+        self._index_factories: Dict[str, Dict[str, Callable[[], CollectionIndex]]] = {
+            collection: {} for collection in COLLECTION_KEYS
+        }
+        # compact_records: hold cached records packed (utils/compact.py)
+        self.compact_records = compact_records
+        for collection, filters in LIST_FILTERS.items():
+            fields = {**filters, **LOOKUP_FIELDS.get(collection, {})}
+            self.register_index(
+                collection,
+                'fields',
+                lambda collection=collection, fields=fields: FieldIndex(
+                    COLLECTION_KEYS[collection], fields, compact=compact_records
+                )
+            )
+        self.register_index('equipment', 'availability', lambda: AvailabilityIndex(COLLECTION_KEYS['equipment']))
+        self.register_index('equipment', 'analytics', lambda: BookingTable(COLLECTION_KEYS['equipment']))
+        for collection in COLLECTION_KEYS:
+            self.register_index(collection, 'search', lambda collection=collection: create_search_index(collection))
+        for collection, dimensions in KPI_DIMENSIONS.items():
+            self.register_index(
+                collection,
+                'kpis',
+                lambda collection=collection, dimensions=dimensions: CountIndex(COLLECTION_KEYS[collection], dimensions)
+            )
     
     async def _read_json(self, file_path: Path) -> Dict:
         """Read JSON file asynchronously"""
-        try:
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                return json.loads(content)
-        except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in {file_path}: {e}")
+        return await read_json(file_path)
     
     async def _write_json(self, file_path: Path, data: Dict) -> None:
-        """Write JSON file asynchronously"""
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(data, indent=2, ensure_ascii=False))
+        """Write JSON file asynchronously (temp file + atomic rename)"""
+        await write_json(file_path, data)
+    
+    async def close(self) -> None:
+        """Flush pending writes (journal compaction), close the backend and the change feed"""
+        await self.backend.close()
+        await self.changes.close()
+    
+    # =====================================================
+    # INDEXES
+    # =====================================================
+    
+    def register_index(
+        self,
+        collection: str,
+        name: str,
+        factory: Callable[[], CollectionIndex]
+    ) -> None:
+        """Register a derived index kept for every tenant's collection"""
+        self._index_factories[collection][name] = factory
+        # Drop built index sets so the new index is included on next access
+        for key in [k for k in self._indexes if k[1] == collection]:
+            del self._indexes[key]
+    
+    async def get_indexes(self, tenant_id: str, collection: str) -> Dict[str, CollectionIndex]:
+        """
+        Derived indexes for a tenant collection
+        
+        Built from a full load the first time and whenever the backend
+        version moves without us (external edit, other process); kept up
+        to date incrementally by our own writes.
+        """
+        tenant = await self._require_tenant(tenant_id)
+        key = (tenant_id, collection)
+        with metrics.span('storage.version'):
+            version = await self.backend.version(tenant, collection)
+        cached = self._indexes.get(key)
+        if cached is not None and version is not None and cached[0] == version:
+            self.residency.touch(tenant_id)
+            return cached[1]
+        
+        with metrics.span('storage.load'):
+            document = await self.backend.load(tenant, collection)
+        records = document.get(collection, [])
+        indexes = {}
+        with metrics.span('index.build'):
+            for name, factory in self._index_factories[collection].items():
+                index = factory()
+                index.build(records)
+                indexes[name] = index
+        
+        if version is not None:
+            self._indexes[key] = (version, indexes)
+            factor = INDEX_BYTES_PER_JSON_BYTE
+            if self.backend.holds_documents:
+                factor += PARSED_BYTES_PER_JSON_BYTE
+            await self._charge(tenant_id, collection, estimate_json_bytes(records) * factor)
+        return indexes
+    
+    async def _write_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        operation: Callable[[], Awaitable[List[Optional[Dict]]]]
+    ) -> List[Optional[Dict]]:
+        """
+        Run a backend write and apply the resulting records to built indexes
+        
+        The collection's write lock is held from the version check to the
+        index update, so another worker's write cannot slip in between and
+        be missed by the incremental index update.
+        """
+        key = (tenant['tenant_id'], collection)
+        async with self.backend.write_lock(tenant, collection):
+            before = await self.backend.version(tenant, collection)
+            with metrics.span('storage.write'):
+                records = await operation()
+            
+            cached = self._indexes.get(key)
+            header = self._headers.get(key)
+            if cached is None and header is None:
+                return records
+            after = await self.backend.version(tenant, collection)
+            if cached is not None:
+                if before is not None and cached[0] == before:
+                    for index in cached[1].values():
+                        for record in records:
+                            if record is not None:
+                                index.replace(record)
+                    self._indexes[key] = (after, cached[1])
+                else:
+                    # Someone else changed the collection; rebuild on next read
+                    self._indexes.pop(key, None)
+                    self.residency.release(tenant['tenant_id'], collection)
+            if header is not None:
+                # Record writes leave the document header as it was
+                if before is not None and header[0] == before:
+                    self._headers[key] = (after, header[1])
+                else:
+                    self._headers.pop(key, None)
+            return records
+    
+    # =====================================================
+    # RESIDENCY
+    # =====================================================
+    
+    async def _charge(self, tenant_id: str, part: str, nbytes: int) -> None:
+        """Account a part of a tenant just loaded, evict cold tenants over the budget"""
+        self.residency.charge(tenant_id, part, nbytes)
+        for victim in self.residency.victims():
+            await self.evict_tenant(victim)
+    
+    async def evict_tenant(self, tenant_id: str) -> None:
+        """
+        Drop a tenant's cached indexes, documents and backend state
+        
+        Nothing is lost: everything is rebuilt from storage on the tenant's
+        next request.
+        """
+        self.residency.forget(tenant_id)
+        for key in [k for k in self._indexes if k[0] == tenant_id]:
+            del self._indexes[key]
+        for key in [k for k in self._headers if k[0] == tenant_id]:
+            del self._headers[key]
+        self._crm_indexes.pop(tenant_id, None)
+        self.documents.invalidate(tenant_id)
+        tenant = await self.get_tenant(tenant_id)
+        if tenant is not None:
+            await self.backend.release(tenant)
+    
+    async def get_tenants_by_activity(self) -> List[str]:
+        """Active tenant IDs, most recently written data first (file mtimes)"""
+        tenants = [tenant for tenant in await self.get_all_tenants() if tenant.get('is_active')]
+        
+        def latest_write(tenant: Dict) -> float:
+            try:
+                with os.scandir(self.data_dir / tenant['data_path']) as entries:
+                    return max((entry.stat().st_mtime for entry in entries if entry.is_file()), default=0.0)
+            except OSError:
+                return 0.0
+        
+        def order() -> List[str]:
+            return [t['tenant_id'] for t in sorted(tenants, key=latest_write, reverse=True)]
+        
+        return await asyncio.to_thread(order)
+    
+    async def warm_tenant(self, tenant_id: str) -> None:
+        """Load a tenant's collections, indexes and documents ahead of its first request"""
+        await self.get_kpis(tenant_id)  # users/equipment indexes, equipment header, CRM index
+        await self.find_user_by_username(tenant_id, "")  # login lookup index
+        for name in TENANT_DOCUMENTS:
+            await self.get_document_entry(tenant_id, name)
+    
+    async def list_records(
+        self,
+        tenant_id: str,
+        collection: str,
+        filters: Dict[str, Any],
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Filtered, cursor-paginated listing served from the field index
+        
+        Returns:
+            (records, next_cursor)
+        
+        Raises:
+            ValueError: On an unknown filter or invalid cursor
+        """
+        indexes = await self.get_indexes(tenant_id, collection)
+        return indexes['fields'].page(filters, limit=limit, cursor=cursor)
+    
+    async def search(
+        self,
+        tenant_id: str,
+        query: str,
+        types: Optional[List[str]] = None,
+        limit: int = 20
+    ) -> List[Dict]:
+        """
+        Ranked full-text hits across customers, equipment and users
+        
+        Raises:
+            ValueError: On an unknown type
+        """
+        types = types or list(SEARCH_TYPES)
+        unknown = set(types) - set(SEARCH_TYPES)
+        if unknown:
+            raise ValueError(f"Unsupported search type: {', '.join(sorted(unknown))}")
+        
+        hits: List[Dict] = []
+        for kind in types:
+            if kind == 'customers':
+                index = (await self.get_crm_index(tenant_id)).search
+            else:
+                index = (await self.get_indexes(tenant_id, kind))['search']
+            with metrics.span('search.query'):
+                hits.extend(index.search(query, limit))
+        
+        hits.sort(key=lambda hit: hit['score'], reverse=True)
+        return hits[:limit]
+    
+    async def _publish(
+        self,
+        tenant_id: str,
+        collection: str,
+        op: str,
+        records: List[Optional[Dict]],
+        changes: Optional[List[Dict]] = None
+    ) -> None:
+        """
+        Emit change events for written records
+        
+        Creates carry the record, updates only the changed fields.
+        """
+        key_field = COLLECTION_KEYS[collection]
+        redacted = REDACTED_FIELDS.get(collection, [])
+        items = []
+        for i, record in enumerate(records):
+            if record is None:
+                continue
+            data = changes[i] if changes is not None else record
+            items.append((record.get(key_field), redact(data, redacted)))
+        await self.changes.publish_many(tenant_id, collection, op, items)
+    
+    async def get_collection_header(self, tenant_id: str, collection: str) -> Dict:
+        """
+        Collection document fields other than the records (tenant_name, config, ...)
+        
+        Cached per backend version, like the indexes.
+        """
+        tenant = await self._require_tenant(tenant_id)
+        key = (tenant_id, collection)
+        version = await self.backend.version(tenant, collection)
+        cached = self._headers.get(key)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+        
+        header = await self.backend.load_header(tenant, collection)
+        if version is not None:
+            self._headers[key] = (version, header)
+        return header
+    
+    async def get_kpis(self, tenant_id: str) -> Dict:
+        """
+        Dashboard landing page counts (equipment, users, CRM)
+        
+        Served from running counts kept by the 'kpis' indexes and the CRM
+        index; equipment categories follow the tenant's equipment_categories
+        config (in the equipment document header).
+        """
+        equipment = (await self.get_indexes(tenant_id, 'equipment'))['kpis']
+        users = (await self.get_indexes(tenant_id, 'users'))['kpis']
+        config = (await self.get_collection_header(tenant_id, 'equipment')).get('config') or {}
+        categories = config.get('equipment_categories')
+        crm = await self.get_crm_index(tenant_id)
+        return {
+            "equipment": equipment_kpis(equipment, categories if isinstance(categories, list) else None),
+            "users": user_kpis(users),
+            "crm": crm.kpis,
+        }
+    
+    async def iter_records(
+        self,
+        tenant_id: str,
+        collection: str,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Dict]]:
+        """Stream a collection's records in batches"""
+        tenant = await self._require_tenant(tenant_id)
+        async for batch in self.backend.iter_records(tenant, collection, batch_size):
+            yield batch
     
     # =====================================================
     # TENANT OPERATIONS
@@ -40,21 +440,163 @@ class DataManager:
     
     async def get_all_tenants(self) -> List[Dict]:
         """Get all tenants from registry"""
-        data = await self._read_json(self.tenants_file)
-        return data.get('tenants', [])
+        return await self.tenants.all()
     
     async def get_tenant(self, tenant_id: str) -> Optional[Dict]:
         """Get specific tenant by ID"""
-        tenants = await self.get_all_tenants()
-        for tenant in tenants:
-            if tenant.get('tenant_id') == tenant_id:
-                return tenant
-        return None
+        return await self.tenants.get(tenant_id)
     
     async def get_tenant_config(self) -> Dict:
         """Get global tenant configuration"""
-        data = await self._read_json(self.tenants_file)
-        return data.get('config', {})
+        return await self.tenants.config()
+    
+    async def reload_tenants(self) -> None:
+        """Re-read tenants.json immediately (e.g. after manual edits)"""
+        await self.tenants.reload()
+    
+    async def _require_tenant(self, tenant_id: str) -> Dict:
+        """Resolve a tenant or raise ValueError"""
+        with metrics.span('tenant.lookup'):
+            tenant = await self.get_tenant(tenant_id)
+        if not tenant:
+            raise ValueError(f"Tenant {tenant_id} not found")
+        return tenant
+    
+    # =====================================================
+    # TENANT DOCUMENTS (crm, production, dashboard-config)
+    # =====================================================
+    
+    async def _document_path(self, tenant_id: str, name: str) -> Path:
+        if name not in TENANT_DOCUMENTS:
+            raise ValueError(f"Unknown tenant document: {name}")
+        tenant = await self._require_tenant(tenant_id)
+        return self.data_dir / tenant['data_path'] / f"{name}.json"
+    
+    async def get_document_entry(self, tenant_id: str, name: str) -> CachedDocument:
+        """Cached document with its generation (for derived indexes)"""
+        path = await self._document_path(tenant_id, name)
+        with metrics.span('documents.get'):
+            entry = await self.documents.get_entry(tenant_id, name, path)
+        size = entry.signature[2] if entry.signature else 0
+        await self._charge(tenant_id, f"document:{name}", size * PARSED_BYTES_PER_JSON_BYTE)
+        return entry
+    
+    async def get_document(self, tenant_id: str, name: str) -> Optional[Dict]:
+        """Tenant document from the cache, None if the file does not exist"""
+        return (await self.get_document_entry(tenant_id, name)).data
+    
+    async def save_document(self, tenant_id: str, name: str, data: Dict) -> None:
+        """Persist a tenant document and refresh the cache"""
+        path = await self._document_path(tenant_id, name)
+        with metrics.span('documents.put'):
+            await self.documents.put(tenant_id, name, path, data)
+        await self.changes.publish(tenant_id, name, 'replace')
+    
+    async def update_document(
+        self,
+        tenant_id: str,
+        name: str,
+        change: Callable[[Optional[Dict]], Dict]
+    ) -> Dict:
+        """Read-modify-write a tenant document under its write lock"""
+        path = await self._document_path(tenant_id, name)
+        with metrics.span('documents.put'):
+            data = await self.documents.update(tenant_id, name, path, change)
+        await self.changes.publish(tenant_id, name, 'replace')
+        return data
+    
+    async def get_crm_data(self, tenant_id: str) -> Optional[Dict]:
+        """CRM document (customers, communications, quotes, invoices)"""
+        return await self.get_document(tenant_id, 'crm')
+    
+    async def get_crm_index(self, tenant_id: str) -> CrmIndex:
+        """CRM indexes, rebuilt only when crm.json changes"""
+        entry = await self.get_document_entry(tenant_id, 'crm')
+        cached = self._crm_indexes.get(tenant_id)
+        if cached is not None and cached[0] == entry.generation:
+            return cached[1]
+        with metrics.span('index.build'):
+            index = CrmIndex(entry.data)
+        self._crm_indexes[tenant_id] = (entry.generation, index)
+        size = entry.signature[2] if entry.signature else 0
+        await self._charge(tenant_id, "crm-index", size * INDEX_BYTES_PER_JSON_BYTE)
+        return index
+    
+    async def list_crm_records(
+        self,
+        tenant_id: str,
+        section: str,
+        filters: Dict[str, Any],
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Filtered, cursor-paginated CRM records (customers, quotes, ...)
+        
+        Raises:
+            ValueError: On an unknown section or filter, or an invalid cursor
+        """
+        index = await self.get_crm_index(tenant_id)
+        return index.page(section, filters, limit=limit, cursor=cursor)
+    
+    async def get_crm_record(self, tenant_id: str, section: str, record_id: Any) -> Optional[Dict]:
+        """Single CRM record by id"""
+        index = await self.get_crm_index(tenant_id)
+        return index.get(section, record_id)
+    
+    async def create_customers(self, tenant_id: str, customers: List[Dict]) -> List[Dict]:
+        """Append customers to crm.json with one write (ids cust_<n> continue the existing ones)"""
+        created: List[Dict] = []
+        
+        def append(document: Optional[Dict]) -> Dict:
+            document = dict(document or {})
+            existing = [c for c in document.get('customers') or [] if isinstance(c, dict)]
+            suffixes = [
+                c['id'][5:] for c in existing
+                if isinstance(c.get('id'), str) and c['id'].startswith('cust_') and c['id'][5:].isdigit()
+            ]
+            width = max((len(suffix) for suffix in suffixes), default=3)
+            next_number = max((int(suffix) for suffix in suffixes), default=0) + 1
+            now = datetime.utcnow().isoformat() + "Z"
+            created.clear()
+            for offset, customer in enumerate(customers):
+                created.append({
+                    "id": f"cust_{next_number + offset:0{width}d}",
+                    **customer,
+                    "customer_since": customer.get('customer_since') or now[:10],
+                    "created_at": now,
+                    "updated_at": now,
+                })
+            document['customers'] = existing + created
+            return document
+        
+        await self.update_document(tenant_id, 'crm', append)
+        return created
+    
+    async def get_import_templates(self, tenant_id: str) -> Dict[str, Dict]:
+        """Saved spreadsheet import templates by name"""
+        document = await self.get_document(tenant_id, 'import-templates') or {}
+        return document.get('templates') or {}
+    
+    async def save_import_template(self, tenant_id: str, name: str, template: Optional[Dict]) -> None:
+        """Create, replace or (template=None) delete an import template"""
+        def change(document: Optional[Dict]) -> Dict:
+            templates = dict((document or {}).get('templates') or {})
+            if template is None:
+                templates.pop(name, None)
+            else:
+                templates[name] = template
+            return {"templates": templates}
+        
+        await self.update_document(tenant_id, 'import-templates', change)
+    
+    async def get_productions(self, tenant_id: str) -> Optional[Dict]:
+        """Productions/bookings document"""
+        return await self.get_document(tenant_id, 'production')
+    
+    async def get_dashboard_config(self, tenant_id: str) -> Optional[Dict]:
+        """Dashboard configuration document"""
+        return await self.get_document(tenant_id, 'dashboard-config')
     
     # =====================================================
     # USER OPERATIONS
@@ -62,32 +604,45 @@ class DataManager:
     
     async def get_tenant_users(self, tenant_id: str) -> Dict:
         """Get all users for a tenant"""
-        tenant = await self.get_tenant(tenant_id)
-        if not tenant:
-            raise ValueError(f"Tenant {tenant_id} not found")
-        
-        users_file = self.data_dir / tenant['data_path'] / 'users.json'
-        return await self._read_json(users_file)
+        tenant = await self._require_tenant(tenant_id)
+        return await self.backend.load(tenant, 'users')
     
     async def get_user(self, tenant_id: str, user_id: int) -> Optional[Dict]:
         """Get specific user"""
-        users_data = await self.get_tenant_users(tenant_id)
-        for user in users_data.get('users', []):
-            if user.get('user_id') == user_id:
-                return user
-        return None
+        indexes = await self.get_indexes(tenant_id, 'users')
+        return indexes['fields'].get(user_id)
+    
+    async def find_user_by_username(self, tenant_id: str, username: str) -> Optional[Dict]:
+        """
+        Get user by full login name (username@tenant_id)
+        
+        Looked up in the username column of the 'fields' index, so only the
+        matching record is materialized (COMPACT_RECORDS keeps the rest packed).
+        """
+        indexes = await self.get_indexes(tenant_id, 'users')
+        return indexes['fields'].find('username', username)
     
     async def create_user(self, tenant_id: str, user_data: Dict) -> Dict:
         """Create new user in tenant"""
-        users_data = await self.get_tenant_users(tenant_id)
-        tenant = await self.get_tenant(tenant_id)
-        
-        # Generate new user ID
-        existing_ids = [u.get('user_id', 0) for u in users_data.get('users', [])]
-        new_id = max(existing_ids, default=0) + 1
-        
-        # Create user object
-        new_user = {
+        return (await self.create_users(tenant_id, [user_data]))[0]
+    
+    async def create_users(self, tenant_id: str, users_data: List[Dict]) -> List[Dict]:
+        """Create several users with one storage write"""
+        tenant = await self._require_tenant(tenant_id)
+        users = await self._write_many(tenant, 'users', lambda: self.backend.insert_many(
+            tenant,
+            'users',
+            [
+                lambda new_id, user_data=user_data: self._build_user(new_id, tenant_id, user_data)
+                for user_data in users_data
+            ]
+        ))
+        await self._publish(tenant_id, 'users', 'create', users)
+        return users
+    
+    def _build_user(self, new_id: int, tenant_id: str, user_data: Dict) -> Dict:
+        """Create user object"""
+        return {
             "user_id": new_id,
             "tenant_id": tenant_id,
             "user_type": user_data.get('user_type', 'employee'),
@@ -103,39 +658,27 @@ class DataManager:
             },
             "notes": user_data.get('notes', '')
         }
-        
-        # Add to users list
-        users_data.setdefault('users', []).append(new_user)
-        
-        # Save
-        users_file = self.data_dir / tenant['data_path'] / 'users.json'
-        await self._write_json(users_file, users_data)
-        
-        return new_user
     
     async def update_user(self, tenant_id: str, user_id: int, update_data: Dict) -> Dict:
         """Update existing user"""
-        users_data = await self.get_tenant_users(tenant_id)
-        tenant = await self.get_tenant(tenant_id)
-        
-        # Find user
-        user_index = None
-        for i, user in enumerate(users_data.get('users', [])):
-            if user.get('user_id') == user_id:
-                user_index = i
-                break
-        
-        if user_index is None:
+        user = (await self.update_users(tenant_id, [(user_id, update_data)]))[0]
+        if user is None:
             raise ValueError(f"User {user_id} not found")
+        return user
+    
+    async def update_users(self, tenant_id: str, updates: List[Tuple[int, Dict]]) -> List[Optional[Dict]]:
+        """
+        Apply several (user_id, changes) updates with one storage write
         
-        # Update user
-        users_data['users'][user_index].update(update_data)
-        
-        # Save
-        users_file = self.data_dir / tenant['data_path'] / 'users.json'
-        await self._write_json(users_file, users_data)
-        
-        return users_data['users'][user_index]
+        Returns:
+            Updated users in input order, None for unknown IDs
+        """
+        tenant = await self._require_tenant(tenant_id)
+        users = await self._write_many(tenant, 'users', lambda: self.backend.update_many(
+            tenant, 'users', updates
+        ))
+        await self._publish(tenant_id, 'users', 'update', users, [changes for _, changes in updates])
+        return users
     
     # =====================================================
     # EQUIPMENT OPERATIONS
@@ -143,67 +686,124 @@ class DataManager:
     
     async def get_tenant_equipment(self, tenant_id: str) -> Dict:
         """Get all equipment for a tenant"""
-        tenant = await self.get_tenant(tenant_id)
-        if not tenant:
-            raise ValueError(f"Tenant {tenant_id} not found")
-        
-        equipment_file = self.data_dir / tenant['data_path'] / 'equipment.json'
-        return await self._read_json(equipment_file)
+        tenant = await self._require_tenant(tenant_id)
+        return await self.backend.load(tenant, 'equipment')
     
     async def get_equipment(self, tenant_id: str, equipment_id: int) -> Optional[Dict]:
         """Get specific equipment"""
-        equipment_data = await self.get_tenant_equipment(tenant_id)
-        for equipment in equipment_data.get('equipment', []):
-            if equipment.get('id') == equipment_id:
-                return equipment
-        return None
+        indexes = await self.get_indexes(tenant_id, 'equipment')
+        return indexes['fields'].get(equipment_id)
     
     async def create_equipment(self, tenant_id: str, equipment_data: Dict) -> Dict:
         """Create new equipment"""
-        data = await self.get_tenant_equipment(tenant_id)
-        tenant = await self.get_tenant(tenant_id)
-        
-        # Generate new ID
-        existing_ids = [e.get('id', 0) for e in data.get('equipment', [])]
-        new_id = max(existing_ids, default=0) + 1
-        
-        # Create equipment object
-        new_equipment = {
-            "id": new_id,
-            "tenant_id": tenant_id,
-            **equipment_data
-        }
-        
-        # Add to equipment list
-        data.setdefault('equipment', []).append(new_equipment)
-        
-        # Save
-        equipment_file = self.data_dir / tenant['data_path'] / 'equipment.json'
-        await self._write_json(equipment_file, data)
-        
-        return new_equipment
+        return (await self.create_equipment_items(tenant_id, [equipment_data]))[0]
+    
+    async def create_equipment_items(self, tenant_id: str, items: List[Dict]) -> List[Dict]:
+        """Create several equipment records with one storage write"""
+        tenant = await self._require_tenant(tenant_id)
+        records = await self._write_many(tenant, 'equipment', lambda: self.backend.insert_many(
+            tenant,
+            'equipment',
+            [
+                lambda new_id, item=item: {"id": new_id, "tenant_id": tenant_id, **item}
+                for item in items
+            ]
+        ))
+        await self._publish(tenant_id, 'equipment', 'create', records)
+        return records
     
     async def update_equipment(self, tenant_id: str, equipment_id: int, update_data: Dict) -> Dict:
         """Update existing equipment"""
-        data = await self.get_tenant_equipment(tenant_id)
-        tenant = await self.get_tenant(tenant_id)
+        record = (await self.update_equipment_items(tenant_id, [(equipment_id, update_data)]))[0]
+        if record is None:
+            raise ValueError(f"Equipment {equipment_id} not found")
+        return record
+    
+    async def update_equipment_items(
+        self,
+        tenant_id: str,
+        updates: List[Tuple[Any, Dict]]
+    ) -> List[Optional[Dict]]:
+        """
+        Apply several (equipment_id, changes) updates with one storage write
         
-        # Find equipment
-        eq_index = None
-        for i, eq in enumerate(data.get('equipment', [])):
-            if eq.get('id') == equipment_id:
-                eq_index = i
-                break
+        Returns:
+            Updated records in input order, None for unknown IDs
+        """
+        tenant = await self._require_tenant(tenant_id)
+        records = await self._write_many(tenant, 'equipment', lambda: self.backend.update_many(
+            tenant, 'equipment', updates
+        ))
+        await self._publish(tenant_id, 'equipment', 'update', records, [changes for _, changes in updates])
+        return records
+    
+    async def find_available_equipment(
+        self,
+        tenant_id: str,
+        start_date: str,
+        end_date: str,
+        equipment_type: Optional[str] = None,
+        location: Optional[str] = None
+    ) -> Dict:
+        """
+        Equipment without an active booking between start_date and end_date
+        (inclusive, YYYY-MM-DD). Items in maintenance are never available.
         
-        if eq_index is None:
-            raise ValueError(f"Equipment {equipment_id} not found")
+        Returns:
+            {"available": [records], "booked": [{id, name, conflicts}]}
         
-        # Update equipment
-        data['equipment'][eq_index].update(update_data)
+        Raises:
+            ValueError: On invalid dates or an unknown tenant
+        """
+        start, end = parse_day(start_date), parse_day(end_date)
+        if start is None or end is None:
+            raise ValueError("Dates must be in YYYY-MM-DD format")
+        if start > end:
+            raise ValueError("start_date must not be after end_date")
         
-        # Save
-        equipment_file = self.data_dir / tenant['data_path'] / 'equipment.json'
-        await self._write_json(equipment_file, data)
+        indexes = await self.get_indexes(tenant_id, 'equipment')
+        available, booked = indexes['availability'].query(
+            start, end, indexes['fields'].get, equipment_type=equipment_type, location=location
+        )
+        return {"available": available, "booked": booked}
+    
+    async def get_utilization_report(
+        self,
+        tenant_id: str,
+        start_date: str,
+        end_date: str,
+        group_by: str = "category",
+        category: Optional[str] = None,
+        limit: int = 100
+    ) -> Dict:
+        """
+        Equipment utilization and price_per_day x days per usage type
+        between start_date and end_date (inclusive, YYYY-MM-DD)
         
-        return data['equipment'][eq_index]
-
+        Computed from the 'analytics' index (utils/analytics.py); categories
+        follow the tenant's equipment_categories config.
+        
+        Raises:
+            ValueError: On invalid dates or grouping, or an unknown tenant
+        """
+        start, end = parse_day(start_date), parse_day(end_date)
+        if start is None or end is None:
+            raise ValueError("Dates must be in YYYY-MM-DD format")
+        if start > end:
+            raise ValueError("start_date must not be after end_date")
+        if end - start + 1 > MAX_RANGE_DAYS:
+            raise ValueError(f"Date range must not exceed {MAX_RANGE_DAYS} days")
+        
+        table = (await self.get_indexes(tenant_id, 'equipment'))['analytics']
+        config = (await self.get_collection_header(tenant_id, 'equipment')).get('config') or {}
+        categories = config.get('equipment_categories')
+        with metrics.span('analytics.report'):
+            report = table.report(
+                start,
+                end,
+                group_by=group_by,
+                category=category,
+                categories=categories if isinstance(categories, list) else None,
+                limit=limit
+            )
+        return {"start_date": start_date[:10], "end_date": end_date[:10], **report}
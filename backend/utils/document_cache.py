@@ -0,0 +1,173 @@
+"""
+Document Cache
+Shared async cache for per-tenant JSON documents (crm, production, dashboard-config)
+
+Documents are read with aiofiles and kept parsed in memory, keyed by
+tenant + document name. A cached entry is revalidated against the file's
+inode/mtime/size at most once per check_interval seconds; writes through
+the cache replace the entry immediately. With shared generation counters
+(see utils/locking.py) a write by another worker process invalidates the
+entry on the next read instead of after check_interval.
+"""
+
+import asyncio
+import time
+import aiofiles.os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Tuple, Callable, Awaitable
+
+from utils.journal import Signature
+from utils.locking import LockManager, GenerationCounters
+
+
+@dataclass
+class CachedDocument:
+    """A parsed document and the file state it was read from"""
+    data: Optional[Dict]  # None if the file does not exist
+    signature: Signature
+    generation: int  # increases whenever the cached data changes
+    checked_at: float
+    stamp: int = 0  # shared generation counter when the entry was validated
+
+
+class DocumentCache:
+    """Parsed JSON documents keyed by (tenant_id, document name)"""
+    
+    def __init__(
+        self,
+        read: Callable[[Path], Awaitable[Dict]],
+        write: Callable[[Path, Dict], Awaitable[None]],
+        check_interval: float = 1.0,
+        locks: Optional[LockManager] = None,
+        counters: Optional[GenerationCounters] = None
+    ):
+        """
+        Args:
+            check_interval: Seconds between file stat checks (external edits)
+            locks: Cross-process locks taken around writes
+            counters: Shared counters bumped by writes in any worker
+        """
+        self.check_interval = check_interval
+        self._read = read
+        self._write = write
+        self._file_locks = locks or LockManager()
+        self._counters = counters
+        self._entries: Dict[Tuple[str, str], CachedDocument] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+    
+    async def _signature(self, path: Path) -> Signature:
+        """File signature, stat'ed in a worker thread"""
+        try:
+            stat = await aiofiles.os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def _next_generation(self) -> int:
+        self._generation += 1
+        return self._generation
+    
+    def _stamp(self, tenant_id: str, name: str) -> int:
+        if self._counters is None:
+            return 0
+        return self._counters.get(f"document:{tenant_id}/{name}")
+    
+    async def get_entry(self, tenant_id: str, name: str, path: Path) -> CachedDocument:
+        """Cached entry for a document, (re)loading it if the file changed"""
+        key = (tenant_id, name)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if (entry is not None and entry.stamp == self._stamp(tenant_id, name)
+                and now - entry.checked_at < self.check_interval):
+            self.hits += 1
+            return entry
+        
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Read the stamp before the file so a concurrent write is seen next time
+            stamp = self._stamp(tenant_id, name)
+            entry = self._entries.get(key)
+            signature = await self._signature(path)
+            if entry is not None and entry.signature == signature:
+                entry.checked_at = time.monotonic()
+                entry.stamp = stamp
+                self.hits += 1
+                return entry
+            
+            self.misses += 1
+            data = await self._read(path) if signature is not None else None
+            entry = CachedDocument(
+                data=data,
+                signature=signature,
+                generation=self._next_generation(),
+                checked_at=time.monotonic(),
+                stamp=stamp
+            )
+            self._entries[key] = entry
+            return entry
+    
+    async def get(self, tenant_id: str, name: str, path: Path) -> Optional[Dict]:
+        """Parsed document (shared object, treat as read-only), None if missing"""
+        return (await self.get_entry(tenant_id, name, path)).data
+    
+    async def put(self, tenant_id: str, name: str, path: Path, data: Dict) -> None:
+        """Write a document to disk and replace the cached copy"""
+        key = (tenant_id, name)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with self._file_locks.lock(f"{tenant_id}.{name}"), lock:
+            await self._store(key, path, data)
+    
+    async def update(
+        self,
+        tenant_id: str,
+        name: str,
+        path: Path,
+        change: Callable[[Optional[Dict]], Dict]
+    ) -> Dict:
+        """
+        Read-modify-write a document under the write locks
+        
+        change gets the current document (None if missing; shared, do not
+        mutate) and returns the new one, which is written and returned.
+        """
+        key = (tenant_id, name)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with self._file_locks.lock(f"{tenant_id}.{name}"), lock:
+            # Re-read unless the cached copy matches the file (another worker may have written)
+            entry = self._entries.get(key)
+            signature = await self._signature(path)
+            if entry is not None and entry.signature == signature:
+                current = entry.data
+            else:
+                current = await self._read(path) if signature is not None else None
+            data = change(current)
+            await self._store(key, path, data)
+        return data
+    
+    async def _store(self, key: Tuple[str, str], path: Path, data: Dict) -> None:
+        await self._write(path, data)
+        stamp = 0
+        if self._counters is not None:
+            stamp = self._counters.bump(f"document:{key[0]}/{key[1]}")
+        self._entries[key] = CachedDocument(
+            data=data,
+            signature=await self._signature(path),
+            generation=self._next_generation(),
+            checked_at=time.monotonic(),
+            stamp=stamp
+        )
+    
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        """Drop cached documents (all, or one tenant's)"""
+        if tenant_id is None:
+            self._entries.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == tenant_id]:
+                del self._entries[key]
+    
+    def stats(self) -> Dict:
+        return {"documents": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,696 @@
+"""
+Change Feed
+Per-tenant publish/subscribe of compact change events
+
+DataManager publishes one event per changed record (or per replaced
+document); the /events endpoint streams them to dashboards as Server-Sent
+Events. Each tenant keeps a short history so a reconnecting client can
+resume from its Last-Event-ID; if it fell too far behind it gets a
+"resync" event and should reload what it shows.
+
+With several workers on one data directory, SharedChangeFeed passes the
+events through a per-tenant log file, so every worker's subscribers see
+every worker's changes under the same event IDs.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Set, Deque, AsyncIterator, Tuple
+
+from utils import codec
+from utils.locking import GenerationCounters
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChangeEvent:
+    """One change to a tenant's data"""
+    id: int
+    tenant_id: str
+    collection: str  # users | equipment | crm | production | dashboard-config
+    op: str  # create | update | replace
+    key: Any = None  # record key (None for whole-document replaces)
+    data: Optional[Dict] = None  # full record (create) or changed fields (update)
+    at: float = field(default_factory=time.time)
+    
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "collection": self.collection,
+            "op": self.op,
+            "key": self.key,
+            "data": self.data,
+            "at": self.at,
+        }
+
+
+class Subscription:
+    """A client's queue of pending events"""
+    
+    def __init__(self, tenant_id: str, collections: Optional[Set[str]], queue_size: int):
+        self.tenant_id = tenant_id
+        self.collections = collections
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+    
+    def wants(self, event: ChangeEvent) -> bool:
+        return self.collections is None or event.collection in self.collections
+    
+    def reset(self) -> None:
+        """Drop queued events after a resync"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+    
+    def offer(self, event: ChangeEvent) -> None:
+        """Queue an event without blocking; a slow client is told to resync"""
+        if self.overflowed or not self.wants(event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ChangeFeed:
+    """In-process change feed with bounded per-tenant history"""
+    
+    def __init__(self, history_size: int = 1000, queue_size: int = 256):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self._ids = itertools.count(1)
+        self.last_id = 0
+        self._history: Dict[str, Deque[ChangeEvent]] = {}
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+    
+    async def publish(
+        self,
+        tenant_id: str,
+        collection: str,
+        op: str,
+        key: Any = None,
+        data: Optional[Dict] = None
+    ) -> Optional[ChangeEvent]:
+        """Record an event and hand it to the tenant's subscribers"""
+        events = await self.publish_many(tenant_id, collection, op, [(key, data)])
+        return events[0] if events else None
+    
+    async def publish_many(
+        self,
+        tenant_id: str,
+        collection: str,
+        op: str,
+        items: List[Tuple[Any, Optional[Dict]]]
+    ) -> List[ChangeEvent]:
+        """Publish one event per (key, data) item, in order"""
+        events = []
+        history = self._history.setdefault(tenant_id, deque(maxlen=self.history_size))
+        for key, data in items:
+            event = ChangeEvent(next(self._ids), tenant_id, collection, op, key, data)
+            self.last_id = event.id
+            history.append(event)
+            for subscription in self._subscribers.get(tenant_id, ()):
+                subscription.offer(event)
+            events.append(event)
+        self.published += len(events)
+        return events
+    
+    def latest_id(self, tenant_id: str) -> int:
+        """ID of the newest event a subscriber of the tenant can have seen"""
+        return self.last_id
+    
+    async def subscribe(
+        self,
+        tenant_id: str,
+        collections: Optional[Set[str]] = None,
+        last_event_id: Optional[int] = None
+    ) -> Subscription:
+        """
+        Register a subscriber, replaying history after last_event_id
+        
+        If the requested position is no longer in history (or comes from
+        before a restart) the subscription starts with a resync.
+        """
+        subscription = Subscription(tenant_id, collections, self.queue_size)
+        if last_event_id is not None:
+            history = self._history.get(tenant_id) or deque()
+            trimmed = len(history) == history.maxlen and last_event_id < history[0].id - 1
+            if trimmed or last_event_id > self.last_id:
+                subscription.overflowed = True
+            else:
+                for event in history:
+                    if event.id > last_event_id:
+                        subscription.offer(event)
+        self._subscribers.setdefault(tenant_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.tenant_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.tenant_id]
+    
+    async def close(self) -> None:
+        """Nothing to release for the in-process feed"""
+    
+    def stats(self) -> Dict:
+        return {
+            "published": self.published,
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+        }
+
+
+# =====================================================
+# SHARED FEED (several workers)
+# =====================================================
+
+class _Tail:
+    """A worker's read position in one tenant's event log"""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.fd: Optional[int] = None
+        self.listening: Optional[int] = None  # holds LOCK_SH on the tenant's listeners file
+        self.inode: Optional[int] = None
+        self.position = 0  # byte offset after the last complete line read
+        self.last_id = 0  # newest event delivered
+        self.generation = 0  # tenant's generation counter when last read
+        self.reading = False  # a worker thread is reading the log
+        self.closing = False  # unsubscribed during that read
+    
+    def close(self) -> None:
+        for fd in (self.fd, self.listening):
+            if fd is not None:
+                os.close(fd)
+        self.fd = self.listening = None
+
+
+def _parse(tenant_id: str, line: bytes) -> Tuple[int, Optional[ChangeEvent]]:
+    """(id, event) for a log line; the event is None for a gap marker"""
+    record = codec.loads(line)
+    if record.get("gap"):
+        return record["id"], None
+    return record["id"], ChangeEvent(tenant_id=tenant_id, **record)
+
+
+def _last_logged(fd: int, size: int) -> Tuple[int, bool]:
+    """ID of the last complete line in a log (0 if there is none) and whether it is a gap"""
+    block = 4096
+    while True:
+        start = max(0, size - block)
+        data = os.pread(fd, size - start, start)
+        data = data[:data.rfind(b"\n") + 1].rstrip(b"\n")
+        cut = data.rfind(b"\n")
+        if cut >= 0 or start == 0:
+            if not data:
+                return 0, False
+            record = codec.loads(data[cut + 1:])
+            return record["id"], bool(record.get("gap"))
+        block *= 4
+
+
+class SharedChangeFeed(ChangeFeed):
+    """
+    Change feed shared by the worker processes serving one data directory
+    
+    Events are appended to a per-tenant log (<events_dir>/<tenant>.ndjson)
+    under an flock and numbered from the last event in it, so IDs are
+    ordered and gapless per tenant whichever worker made the change, and
+    survive restarts. The appending worker then bumps the tenant's
+    generation counter; workers with subscribers for the tenant poll that
+    counter (a memory load) and read the new lines. Last-Event-ID is
+    resumed from the log, so a client may reconnect to any worker.
+    
+    File work runs in worker threads, so a publish never blocks the event
+    loop. Workers with subscribers hold a shared flock on the tenant's
+    listeners file; while nobody holds one, events are not logged and a
+    single gap marker takes their place, which sends clients resuming
+    from before it a resync. Once the log grows past max_log_bytes a
+    background task cuts it back to its newest history_size events.
+    """
+    
+    def __init__(
+        self,
+        events_dir: Path,
+        counters: GenerationCounters,
+        history_size: int = 1000,
+        queue_size: int = 256,
+        poll_interval: float = 0.1,
+        max_log_bytes: int = 4 * 1024 * 1024
+    ):
+        """
+        Args:
+            poll_interval: Seconds between checks for other workers' events
+            max_log_bytes: Log size that triggers a trim
+        """
+        super().__init__(history_size=history_size, queue_size=queue_size)
+        self.events_dir = events_dir
+        self.counters = counters
+        self.poll_interval = poll_interval
+        self.max_log_bytes = max_log_bytes
+        self.events_dir.mkdir(parents=True, exist_ok=True)
+        self._tails: Dict[str, _Tail] = {}
+        # Serializes this worker's appends and reads per tenant
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # tenant_id -> (inode, size, last id, last line is a gap) after this worker's last append
+        self._appended: Dict[str, Tuple[int, int, int, bool]] = {}
+        self._trims: Dict[str, asyncio.Task] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self.skipped = 0
+        self.trims = 0
+    
+    def _path(self, tenant_id: str) -> Path:
+        return self.events_dir / f"{tenant_id}.ndjson"
+    
+    def _listeners_path(self, tenant_id: str) -> Path:
+        return self.events_dir / f"{tenant_id}.listeners"
+    
+    @staticmethod
+    def _counter(tenant_id: str) -> str:
+        return f"events:{tenant_id}"
+    
+    def _lock(self, tenant_id: str) -> asyncio.Lock:
+        lock = self._locks.get(tenant_id)
+        if lock is None:
+            lock = self._locks[tenant_id] = asyncio.Lock()
+        return lock
+    
+    # Blocking file work below runs in worker threads (asyncio.to_thread)
+    
+    def _open_locked(self, path: Path) -> int:
+        """Open the current log for appending and take its flock"""
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            # Replaced by a trim while we waited for the lock
+            os.close(fd)
+    
+    def _write(
+        self,
+        tenant_id: str,
+        collection: str,
+        op: str,
+        items: List[Tuple[Any, Optional[Dict]]],
+        gap: bool = False
+    ) -> Tuple[List[ChangeEvent], int]:
+        """Append the events (or a gap marker) to the log; returns them and the log size"""
+        fd = self._open_locked(self._path(tenant_id))
+        try:
+            stat = os.fstat(fd)
+            appended = self._appended.get(tenant_id)
+            if appended is not None and appended[:2] == (stat.st_ino, stat.st_size):
+                last_id, last_gap = appended[2:]
+            else:
+                last_id, last_gap = _last_logged(fd, stat.st_size)
+            events = []
+            if gap:
+                if last_gap:
+                    return [], stat.st_size
+                block = codec.dumps_str({"id": last_id + 1, "gap": True}) + '\n'
+            else:
+                events = [
+                    ChangeEvent(last_id + i, tenant_id, collection, op, key, data)
+                    for i, (key, data) in enumerate(items, 1)
+                ]
+                block = ''.join(codec.dumps_str(event.to_dict()) + '\n' for event in events)
+            data = block.encode('utf-8')
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+            size = stat.st_size + len(data)
+            self._appended[tenant_id] = (stat.st_ino, size, events[-1].id if events else last_id + 1, gap)
+        finally:
+            # Closing the descriptor releases the flock
+            os.close(fd)
+        self.counters.bump(self._counter(tenant_id))
+        return events, size
+    
+    def _append(
+        self,
+        tenant_id: str,
+        collection: str,
+        op: str,
+        items: List[Tuple[Any, Optional[Dict]]]
+    ) -> Tuple[List[ChangeEvent], int]:
+        """Log the events if any worker has subscribers for the tenant"""
+        listeners = os.open(self._listeners_path(tenant_id), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(listeners, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return self._write(tenant_id, collection, op, items)
+            # Nobody listens. The lock keeps new subscribers out until the
+            # gap is marked, so none of them starts before it.
+            return self._write(tenant_id, collection, op, items, gap=True)
+        finally:
+            os.close(listeners)
+    
+    def _trim(self, tenant_id: str) -> bool:
+        """
+        Cut the log back to its newest history_size events
+        
+        At most half of max_log_bytes is kept, so the next trim is that far
+        away even when events are large.
+        """
+        path = self._path(tenant_id)
+        fd = self._open_locked(path)
+        try:
+            size = os.fstat(fd).st_size
+            if size <= self.max_log_bytes:
+                return False
+            lines = os.pread(fd, size, 0).splitlines(keepends=True)
+            kept, budget = 0, self.max_log_bytes // 2
+            for line in reversed(lines[-self.history_size:]):
+                if len(line) > budget:
+                    break
+                budget -= len(line)
+                kept += 1
+            temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(temp, 'wb') as f:
+                f.writelines(lines[len(lines) - kept:])
+            os.replace(temp, path)
+            return True
+        finally:
+            os.close(fd)
+    
+    def _read_lines(self, tenant_id: str, tail: _Tail) -> Tuple[List[ChangeEvent], bool]:
+        """Events in complete lines after the tail's position, and whether a gap was passed"""
+        size = os.fstat(tail.fd).st_size
+        if size <= tail.position:
+            return [], False
+        data = os.pread(tail.fd, size - tail.position, tail.position)
+        # A line still being written is read on the next pass
+        end = data.rfind(b"\n") + 1
+        tail.position += end
+        events, gap = [], False
+        for line in data[:end].splitlines():
+            event_id, event = _parse(tenant_id, line)
+            if event_id > tail.last_id:
+                tail.last_id = event_id
+                if event is None:
+                    gap = True
+                else:
+                    events.append(event)
+        return events, gap
+    
+    def _read_new(self, tenant_id: str, tail: _Tail) -> Tuple[List[ChangeEvent], bool]:
+        """
+        Events appended since the last read, following the log across trims
+        
+        The flag is set when subscribers must resync: the log passed a gap
+        or was removed and restarted.
+        """
+        events, resync = [], False
+        while True:
+            if tail.fd is not None:
+                new, gap = self._read_lines(tenant_id, tail)
+                events.extend(new)
+                resync = resync or gap
+            try:
+                inode = os.stat(tail.path).st_ino
+            except FileNotFoundError:
+                return events, resync
+            if inode == tail.inode:
+                return events, resync
+            if tail.fd is not None:
+                os.close(tail.fd)
+                tail.fd = None
+            try:
+                tail.fd = os.open(tail.path, os.O_RDONLY)
+            except FileNotFoundError:
+                return events, resync
+            stat = os.fstat(tail.fd)
+            tail.inode = stat.st_ino
+            tail.position = 0
+            if _last_logged(tail.fd, stat.st_size)[0] < tail.last_id:
+                # The log was removed and restarted: IDs begin again
+                tail.last_id = 0
+                resync = True
+    
+    def _open_tail(self, tenant_id: str) -> _Tail:
+        """Register as a listener and start reading the tenant's log at its current end"""
+        tail = _Tail(self._path(tenant_id))
+        tail.listening = os.open(self._listeners_path(tenant_id), os.O_RDWR | os.O_CREAT, 0o644)
+        # Waits out a publisher that is marking a gap
+        fcntl.flock(tail.listening, fcntl.LOCK_SH)
+        tail.generation = self.counters.get(self._counter(tenant_id))
+        try:
+            tail.fd = os.open(tail.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return tail
+        # Shared lock: no append is half written while the end is taken
+        fcntl.flock(tail.fd, fcntl.LOCK_SH)
+        try:
+            stat = os.fstat(tail.fd)
+            tail.inode = stat.st_ino
+            tail.position = stat.st_size
+            tail.last_id = _last_logged(tail.fd, stat.st_size)[0]
+        finally:
+            fcntl.flock(tail.fd, fcntl.LOCK_UN)
+        return tail
+    
+    def _logged(self, tenant_id: str, up_to: int) -> List[Tuple[int, Optional[ChangeEvent]]]:
+        """Lines still in the tenant's log, up to an ID"""
+        try:
+            data = self._path(tenant_id).read_bytes()
+        except FileNotFoundError:
+            return []
+        logged = []
+        for line in data[:data.rfind(b"\n") + 1].splitlines():
+            entry = _parse(tenant_id, line)
+            if entry[0] <= up_to:
+                logged.append(entry)
+        return logged
+    
+    # Event loop side
+    
+    async def publish_many(
+        self,
+        tenant_id: str,
+        collection: str,
+        op: str,
+        items: List[Tuple[Any, Optional[Dict]]]
+    ) -> List[ChangeEvent]:
+        """Log the events, then deliver what is new in the log"""
+        if not items:
+            return []
+        async with self._lock(tenant_id):
+            events, size = await asyncio.to_thread(self._append, tenant_id, collection, op, items)
+        if events:
+            self.published += len(events)
+        else:
+            self.skipped += len(items)
+        if size > self.max_log_bytes:
+            self._schedule_trim(tenant_id)
+        if tenant_id in self._tails:
+            await self._catch_up(tenant_id)
+        return events
+    
+    def _schedule_trim(self, tenant_id: str) -> None:
+        task = self._trims.get(tenant_id)
+        if task is None or task.done():
+            self._trims[tenant_id] = asyncio.create_task(self._run_trim(tenant_id))
+    
+    async def _run_trim(self, tenant_id: str) -> None:
+        try:
+            if await asyncio.to_thread(self._trim, tenant_id):
+                self.trims += 1
+        except Exception:
+            logger.exception("Trimming the change log of %s failed", tenant_id)
+    
+    async def _catch_up(self, tenant_id: str) -> None:
+        """Deliver the tenant's new events to this worker's subscribers"""
+        async with self._lock(tenant_id):
+            tail = self._tails.get(tenant_id)
+            if tail is None:
+                return
+            # Read the counter first: an append after this point moves it again
+            tail.generation = self.counters.get(self._counter(tenant_id))
+            tail.reading = True
+            try:
+                events, resync = await asyncio.to_thread(self._read_new, tenant_id, tail)
+            finally:
+                tail.reading = False
+                if tail.closing:
+                    tail.close()
+        for event in events:
+            for subscription in self._subscribers.get(tenant_id, ()):
+                subscription.offer(event)
+        if resync:
+            for subscription in self._subscribers.get(tenant_id, ()):
+                subscription.overflowed = True
+    
+    async def subscribe(
+        self,
+        tenant_id: str,
+        collections: Optional[Set[str]] = None,
+        last_event_id: Optional[int] = None
+    ) -> Subscription:
+        """
+        Register a subscriber, replaying the log after last_event_id
+        
+        If the requested position was trimmed from the log, is ahead of it,
+        or precedes a gap, the subscription starts with a resync.
+        """
+        if tenant_id in self._tails:
+            await self._catch_up(tenant_id)
+        async with self._lock(tenant_id):
+            tail = self._tails.get(tenant_id)
+            if tail is None:
+                tail = self._tails[tenant_id] = await asyncio.to_thread(self._open_tail, tenant_id)
+            subscription = Subscription(tenant_id, collections, self.queue_size)
+            if last_event_id is not None and last_event_id != tail.last_id:
+                logged = await asyncio.to_thread(self._logged, tenant_id, tail.last_id)
+                missed = [event for event_id, event in logged if event_id > last_event_id]
+                if (last_event_id > tail.last_id or not logged or logged[0][0] > last_event_id + 1
+                        or any(event is None for event in missed)):
+                    subscription.overflowed = True
+                else:
+                    for event in missed:
+                        subscription.offer(event)
+            self._subscribers.setdefault(tenant_id, set()).add(subscription)
+        self._start_polling()
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        super().unsubscribe(subscription)
+        tenant_id = subscription.tenant_id
+        if tenant_id not in self._subscribers:
+            tail = self._tails.pop(tenant_id, None)
+            if tail is not None:
+                # A read running in a thread closes it when done
+                tail.closing = True
+                if not tail.reading:
+                    tail.close()
+    
+    def latest_id(self, tenant_id: str) -> int:
+        tail = self._tails.get(tenant_id)
+        return tail.last_id if tail is not None else 0
+    
+    def _start_polling(self) -> None:
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+    
+    async def _poll(self) -> None:
+        """Pick up other workers' events for tenants with subscribers here"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for tenant_id, tail in list(self._tails.items()):
+                if self.counters.get(self._counter(tenant_id)) == tail.generation:
+                    continue
+                try:
+                    await self._catch_up(tenant_id)
+                except Exception:
+                    logger.exception("Reading the change log of %s failed", tenant_id)
+                    for subscription in self._subscribers.get(tenant_id, ()):
+                        subscription.overflowed = True
+    
+    async def close(self) -> None:
+        """Stop polling and trimming, and close the logs"""
+        tasks = [task for task in [self._poller, *self._trims.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._poller = None
+        self._trims.clear()
+        for tail in self._tails.values():
+            tail.close()
+        self._tails.clear()
+    
+    def stats(self) -> Dict:
+        return {
+            **super().stats(),
+            "shared": True,
+            "tailed_tenants": len(self._tails),
+            "skipped": self.skipped,
+            "trims": self.trims,
+        }
+
+
+def create_change_feed(
+    events_dir: Path,
+    counters: Optional[GenerationCounters],
+    history_size: int = 1000,
+    queue_size: int = 256,
+    poll_interval: float = 0.1,
+    max_log_bytes: int = 4 * 1024 * 1024
+) -> ChangeFeed:
+    """Feed shared through events_dir, or in-process where counters are unavailable"""
+    if counters is None:
+        return ChangeFeed(history_size=history_size, queue_size=queue_size)
+    return SharedChangeFeed(events_dir, counters, history_size, queue_size, poll_interval, max_log_bytes)
+
+
+async def sse_stream(
+    feed: ChangeFeed,
+    tenant_id: str,
+    collections: Optional[Set[str]] = None,
+    last_event_id: Optional[int] = None,
+    keepalive: float = 15.0
+) -> AsyncIterator[bytes]:
+    """
+    Server-Sent Events for a tenant (subscribes when iteration starts)
+        
+        id: 42
+        event: change
+        data: {"id": 42, "collection": "equipment", "op": "update", ...}
+    
+    A comment line is sent every keepalive seconds so proxies keep the
+    connection open. After a resync event the client should reload its
+    data; the stream continues with new events.
+    """
+    subscription = await feed.subscribe(tenant_id, collections=collections, last_event_id=last_event_id)
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            if subscription.overflowed:
+                subscription.reset()
+                yield f"id: {feed.latest_id(tenant_id)}\nevent: resync\ndata: {{}}\n\n".encode('utf-8')
+                continue
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            payload = codec.dumps_str(event.to_dict())
+            yield f"id: {event.id}\nevent: change\ndata: {payload}\n\n".encode('utf-8')
+    finally:
+        feed.unsubscribe(subscription)
+
+
+def redact(data: Optional[Dict], paths: List[str]) -> Optional[Dict]:
+    """Copy of data without the given dotted fields (e.g. passwords)"""
+    if data is None:
+        return None
+    result = dict(data)
+    for path in paths:
+        parts = path.split('.')
+        target = result
+        for part in parts[:-1]:
+            value = target.get(part)
+            if not isinstance(value, dict):
+                break
+            target[part] = value = dict(value)
+            target = value
+        else:
+            target.pop(parts[-1], None)
+    return result
@@ -0,0 +1,137 @@
+"""
+Streaming Export
+Incremental JSON / NDJSON serialization of tenant data with optional gzip
+
+Exports are produced as async byte streams for StreamingResponse: records
+are serialized batch by batch as the backend yields them, so the response
+body is never materialized in memory and the first bytes go out right away.
+"""
+
+import zlib
+from dataclasses import dataclass
+from typing import Optional, Dict, List, AsyncIterator, Callable, Awaitable
+
+from utils import codec
+
+# Flush serialized text to the client in chunks of roughly this size
+CHUNK_SIZE = 64 * 1024
+
+EXPORT_FORMATS = ("json", "ndjson", "json.gz", "ndjson.gz")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "json.gz": "application/gzip",
+    "ndjson.gz": "application/gzip",
+}
+
+
+@dataclass
+class ExportSection:
+    """One collection in an export"""
+    collection: str
+    header: Callable[[], Awaitable[Dict]]
+    batches: Callable[[], AsyncIterator[List[Dict]]]
+    key: Optional[str] = None  # key under "data" in JSON output, None = the data itself
+
+
+def _dumps(obj) -> str:
+    return codec.dumps_str(obj)
+
+
+async def _chunked(pieces: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Coalesce small text pieces into ~CHUNK_SIZE byte chunks"""
+    buffer: List[str] = []
+    size = 0
+    async for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+async def _gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def _ndjson_pieces(meta: Dict, sections: List[ExportSection]) -> AsyncIterator[str]:
+    """
+    One JSON object per line:
+        {"kind": "meta", ...}
+        {"kind": "header", "collection": "users", "data": {...}}
+        {"kind": "record", "collection": "users", "data": {...}}
+    """
+    yield _dumps({"kind": "meta", **meta}) + "\n"
+    for section in sections:
+        header = await section.header()
+        yield _dumps({"kind": "header", "collection": section.collection, "data": header}) + "\n"
+        async for batch in section.batches():
+            yield ''.join(
+                _dumps({"kind": "record", "collection": section.collection, "data": record}) + "\n"
+                for record in batch
+            )
+
+
+async def _document_pieces(section: ExportSection) -> AsyncIterator[str]:
+    """A collection document ({...header, collection: [records]}) as JSON text"""
+    header = await section.header()
+    yield "{"
+    for name, value in header.items():
+        yield f"{_dumps(name)}: {_dumps(value)}, "
+    yield f"{_dumps(section.collection)}: ["
+    first = True
+    async for batch in section.batches():
+        if not batch:
+            continue
+        text = ", ".join(_dumps(record) for record in batch)
+        yield text if first else ", " + text
+        first = False
+    yield "]}"
+
+
+async def _json_pieces(meta: Dict, sections: List[ExportSection]) -> AsyncIterator[str]:
+    """Same shape as the buffered export: {"success": true, "data": {...}}"""
+    yield '{"success": true, "data": '
+    if len(sections) == 1 and sections[0].key is None and not meta:
+        async for piece in _document_pieces(sections[0]):
+            yield piece
+    else:
+        yield "{"
+        parts = 0
+        for name, value in meta.items():
+            yield (", " if parts else "") + f"{_dumps(name)}: {_dumps(value)}"
+            parts += 1
+        for section in sections:
+            yield (", " if parts else "") + f"{_dumps(section.key or section.collection)}: "
+            async for piece in _document_pieces(section):
+                yield piece
+            parts += 1
+        yield "}"
+    yield "}"
+
+
+def stream_export(export_format: str, meta: Dict, sections: List[ExportSection]) -> AsyncIterator[bytes]:
+    """
+    Byte stream for an export in the given format
+    
+    Args:
+        export_format: One of EXPORT_FORMATS
+        meta: Top-level fields (exported_at, tenant, ...)
+        sections: Collections to include, in order
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    
+    base_format, _, compression = export_format.partition('.')
+    pieces = _ndjson_pieces(meta, sections) if base_format == "ndjson" else _json_pieces(meta, sections)
+    chunks = _chunked(pieces)
+    return _gzipped(chunks) if compression == "gz" else chunks
@@ -0,0 +1,331 @@
+"""
+Spreadsheet Import
+Streaming CSV/XLSX import of equipment and CRM customers
+
+An upload is read row by row (csv module, or openpyxl's read-only mode
+for XLSX, an optional dependency) in a worker thread, mapped to record
+fields through a column template, validated a batch at a time with one
+compiled pydantic TypeAdapter per model, and committed batch by batch
+through DataManager. Only the current batch and a capped error report are
+held in memory, so an import of tens of thousands of rows stays small
+(starlette spools the upload itself to a temporary file).
+
+A template maps source headers to (dotted) record fields and may add
+defaults for empty cells:
+
+    {"target": "equipment",
+     "columns": {"Bezeichnung": "name", "Typ": "type", "Lager": "location",
+                 "Gewicht": "technical_data.weight_kg"},
+     "defaults": {"status": "available"}}
+
+Headers without a template entry are matched to field names
+(case-insensitive, dotted names allowed); other columns are ignored and
+listed in the report.
+"""
+
+import asyncio
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from typing import Optional, Dict, List, Any, Iterator, BinaryIO, Callable, Awaitable, Tuple
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+try:
+    import openpyxl
+except ImportError:  # optional dependency, CSV only without it
+    openpyxl = None
+
+IMPORT_FORMATS = ("csv", "xlsx")
+
+# Delimiters tried when a CSV file does not specify one
+CSV_DELIMITERS = ",;\t|"
+
+# Bytes read to detect the CSV delimiter
+SNIFF_BYTES = 64 * 1024
+
+# Errors of a malformed upload (openpyxl raises zipfile/KeyError/InvalidFileException)
+UNREADABLE = (csv.Error, UnicodeDecodeError, zipfile.BadZipFile, KeyError, ValueError, OSError)
+
+# Compiled list validators, one per model
+_adapters: Dict[type, TypeAdapter] = {}
+
+
+def _adapter(model: type) -> TypeAdapter:
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(List[model])
+    return adapter
+
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    """
+    Import format from the explicit choice or the file extension
+    
+    Raises:
+        ValueError: On an unknown format, or XLSX without openpyxl
+    """
+    file_format = requested or (filename or "").rsplit(".", 1)[-1].lower()
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported file format, expected one of: {', '.join(IMPORT_FORMATS)}")
+    if file_format == "xlsx" and openpyxl is None:
+        raise ValueError("XLSX import requires the openpyxl package")
+    return file_format
+
+
+def read_rows(file: BinaryIO, file_format: str, delimiter: Optional[str] = None) -> Iterator[List[Any]]:
+    """Rows of an uploaded file (the first one is the header), read lazily"""
+    if file_format == "xlsx":
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+        return
+    
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if delimiter is None:
+        sample = text.read(SNIFF_BYTES)
+        text.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+        except csv.Error:
+            delimiter = ","
+    try:
+        yield from csv.reader(text, delimiter=delimiter)
+    finally:
+        text.detach()
+
+
+def cell_text(value: Any) -> Optional[str]:
+    """Cell as text (pydantic coerces it to the field type), None if empty"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    text = str(value).strip()
+    return text or None
+
+
+def _get_path(record: Dict, path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(record, dict):
+            return None
+        record = record.get(part)
+    return record
+
+
+def _set_path(record: Dict, path: str, value: Any) -> None:
+    *parents, name = path.split(".")
+    for part in parents:
+        child = record.get(part)
+        if not isinstance(child, dict):
+            child = record[part] = {}
+        record = child
+    record[name] = value
+
+
+def check_template(model: type, columns: Dict[str, str], defaults: Dict[str, Any]) -> None:
+    """
+    Raises:
+        ValueError: If a template names a field the model does not have
+    """
+    for target in list(columns.values()) + list(defaults):
+        if target.split(".")[0] not in model.model_fields:
+            raise ValueError(f"Unknown field in template: {target}")
+
+
+class ColumnMapping:
+    """Header row + template -> record dicts for one model"""
+    
+    def __init__(
+        self,
+        header: List[Any],
+        model: type,
+        columns: Optional[Dict[str, str]] = None,
+        defaults: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Raises:
+            ValueError: If the template names a field the model does not have
+        """
+        columns = columns or {}
+        defaults = defaults or {}
+        check_template(model, columns, defaults)
+        by_name = {name.lower(): name for name in model.model_fields}
+        
+        self.defaults = defaults
+        self.targets: List[Tuple[int, str]] = []  # (column position, dotted field)
+        self.ignored: List[str] = []
+        for position, title in enumerate(header):
+            title = cell_text(title) or ""
+            target = columns.get(title)
+            if target is None:
+                head, _, rest = title.partition(".")
+                field = by_name.get(head.lower())
+                target = f"{field}.{rest}" if field and rest else field
+            if target is None:
+                if title:
+                    self.ignored.append(title)
+                continue
+            self.targets.append((position, target))
+    
+    def record(self, row: List[Any]) -> Optional[Dict]:
+        """Record for a data row, None if all mapped cells are empty"""
+        record: Dict = {}
+        empty = True
+        for position, target in self.targets:
+            value = cell_text(row[position]) if position < len(row) else None
+            if value is not None:
+                _set_path(record, target, value)
+                empty = False
+        if empty:
+            return None
+        for target, value in self.defaults.items():
+            if _get_path(record, target) is None:
+                _set_path(record, target, value)
+        return record
+
+
+def _error_message(errors: List[Dict]) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in errors
+    )
+
+
+def validate_batch(model: type, records: List[Dict]) -> Tuple[List[BaseModel], Dict[int, str]]:
+    """
+    Validate records in one call of the compiled list validator
+    
+    Returns:
+        (valid models, {position in records: error message})
+    """
+    adapter = _adapter(model)
+    try:
+        return adapter.validate_python(records), {}
+    except ValidationError as e:
+        by_position: Dict[int, List[Dict]] = {}
+        for err in e.errors():
+            by_position.setdefault(err['loc'][0], []).append({**err, 'loc': err['loc'][1:]})
+    failed = {position: _error_message(errors) for position, errors in by_position.items()}
+    valid = [record for position, record in enumerate(records) if position not in failed]
+    return (adapter.validate_python(valid) if valid else []), failed
+
+
+class ImportReport:
+    """Counts and row-level errors of one import"""
+    
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.valid = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        self.ignored_columns: List[str] = []
+        self.stopped: Optional[str] = None
+    
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message})
+    
+    def to_dict(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "valid": self.valid,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "ignored_columns": self.ignored_columns,
+            "stopped": self.stopped,
+        }
+
+
+def _next_batch(
+    rows: Iterator[List[Any]],
+    mapping: ColumnMapping,
+    start: int,
+    size: int
+) -> Tuple[List[Tuple[int, Dict]], int, bool]:
+    """Up to size (row number, record) pairs; skips blank rows"""
+    batch = []
+    number = start
+    for row in rows:
+        number += 1
+        record = mapping.record(row)
+        if record is not None:
+            batch.append((number, record))
+            if len(batch) >= size:
+                return batch, number, False
+    return batch, number, True
+
+
+async def run_import(
+    file: BinaryIO,
+    file_format: str,
+    model: type,
+    commit: Optional[Callable[[List[Dict]], Awaitable[List[Dict]]]],
+    columns: Optional[Dict[str, str]] = None,
+    defaults: Optional[Dict[str, Any]] = None,
+    delimiter: Optional[str] = None,
+    batch_size: int = 1000,
+    max_rows: int = 100000,
+    max_errors: int = 1000
+) -> Dict:
+    """
+    Stream, validate and commit an uploaded spreadsheet
+    
+    Rows are numbered as in the spreadsheet (header = row 1). Batches are
+    committed as they are validated, so rows before a failure stay
+    imported.
+    
+    Args:
+        commit: DataManager batch create (None = validate only, dry run)
+    
+    Raises:
+        ValueError: On an empty file or a template naming unknown fields
+    """
+    report = ImportReport(max_errors)
+    rows = read_rows(file, file_format, delimiter)
+    try:
+        try:
+            header = await asyncio.to_thread(next, rows, None)
+        except UNREADABLE as e:
+            raise ValueError(f"Unreadable {file_format.upper()} file: {e}")
+        if not header:
+            raise ValueError("The file is empty")
+        mapping = ColumnMapping(header, model, columns, defaults)
+        if not mapping.targets:
+            raise ValueError("No column matches a field; save a template for this layout")
+        report.ignored_columns = mapping.ignored
+        
+        number, done = 1, False
+        while not done:
+            size = min(batch_size, max_rows - report.rows)
+            if size <= 0:
+                report.stopped = f"Row limit of {max_rows} reached"
+                break
+            try:
+                batch, number, done = await asyncio.to_thread(_next_batch, rows, mapping, number, size)
+            except UNREADABLE as e:
+                # Earlier batches are committed: report where reading stopped
+                report.stopped = f"Unreadable file after row {number}: {e}"
+                break
+            report.rows += len(batch)
+            valid, failed = validate_batch(model, [record for _, record in batch])
+            for position, message in sorted(failed.items()):
+                report.error(batch[position][0], message)
+            report.valid += len(valid)
+            if valid and commit is not None:
+                report.created += len(await commit([item.dict() for item in valid]))
+    finally:
+        rows.close()
+    return report.to_dict()
@@ -0,0 +1,203 @@
+"""
+Collection Indexes
+In-memory secondary indexes over tenant collections
+
+DataManager builds these from a collection once, keeps them while the
+backend's collection version is unchanged, and updates them incrementally
+on its own writes instead of rescanning the collection per request.
+FieldIndex can hold its records packed (see utils/compact.py).
+"""
+
+import base64
+import binascii
+from bisect import bisect_right, insort
+from typing import Optional, Dict, List, Any, Tuple
+
+from utils.storage import get_field
+from utils.compact import RecordRows, PackedRows
+
+
+def encode_cursor(seq: int) -> str:
+    """Opaque pagination cursor for a record sequence number"""
+    return base64.urlsafe_b64encode(f"s{seq}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """Sequence number from a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        if not raw.startswith('s'):
+            raise ValueError
+        return int(raw[1:])
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+class CollectionIndex:
+    """Base class for derived per-collection structures"""
+    
+    def __init__(self, key_field: str):
+        self.key_field = key_field
+    
+    def build(self, records: List[Dict]) -> None:
+        """Populate from the full collection"""
+        for record in records:
+            self.add(record)
+    
+    def add(self, record: Dict) -> None:
+        """Index a new record"""
+        raise NotImplementedError
+    
+    def discard(self, key: Any) -> None:
+        """Remove a record by key (no-op if unknown)"""
+        raise NotImplementedError
+    
+    def replace(self, record: Dict) -> None:
+        """Re-index a record after it changed"""
+        self.discard(record.get(self.key_field))
+        self.add(record)
+    
+    def size(self) -> int:
+        """Number of indexed records"""
+        raise NotImplementedError
+
+
+class FieldIndex(CollectionIndex):
+    """
+    Equality index on a few fields plus a stable record order for cursors
+    
+    Each record gets a sequence number (storage order on build, increasing
+    on insert). Every indexed value maps to a sorted list of sequence
+    numbers, so a filtered page is a bisect plus a walk of at most the
+    smallest matching list.
+    
+    With compact=True records are stored packed (indexed fields as
+    columns, the rest as JSON blobs) and parsed again when returned.
+    """
+    
+    def __init__(self, key_field: str, fields: Dict[str, str], compact: bool = False):
+        """
+        Args:
+            key_field: Primary key field of the collection
+            fields: Filter name -> dotted record field (e.g. 'role' -> 'access_credentials.role')
+            compact: Hold records packed instead of as the given dicts
+        """
+        super().__init__(key_field)
+        self.fields = fields
+        self.compact = compact
+        self._next_seq = 0
+        self._seq_by_key: Dict[Any, int] = {}
+        self._rows = (PackedRows if compact else RecordRows)(len(fields))
+        self._all: List[int] = []
+        self._values: Dict[str, Dict[Any, List[int]]] = {name: {} for name in fields}
+    
+    def _hashable(self, value: Any) -> Any:
+        return value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+    
+    def _insert(self, seq: int, record: Dict) -> None:
+        values = tuple(self._hashable(get_field(record, path)) for path in self.fields.values())
+        self._rows.put(seq, record, values)
+        insort(self._all, seq)
+        for name, value in zip(self.fields, values):
+            insort(self._values[name].setdefault(value, []), seq)
+    
+    def _remove(self, seq: int) -> None:
+        def drop(seqs: List[int]) -> None:
+            pos = bisect_right(seqs, seq) - 1
+            if pos >= 0 and seqs[pos] == seq:
+                del seqs[pos]
+        
+        drop(self._all)
+        for name, value in zip(self.fields, self._rows.values(seq)):
+            seqs = self._values[name].get(value)
+            if seqs is not None:
+                drop(seqs)
+                if not seqs:
+                    del self._values[name][value]
+        self._rows.remove(seq)
+    
+    def add(self, record: Dict) -> None:
+        key = record.get(self.key_field)
+        if key is not None and key in self._seq_by_key:
+            self.replace(record)
+            return
+        seq = self._next_seq
+        self._next_seq += 1
+        # Records without a key are still listed, under a private per-seq key
+        self._seq_by_key[key if key is not None else ('#', seq)] = seq
+        self._insert(seq, record)
+    
+    def discard(self, key: Any) -> None:
+        seq = self._seq_by_key.pop(key, None)
+        if seq is not None:
+            self._remove(seq)
+    
+    def replace(self, record: Dict) -> None:
+        # Keep the sequence number so cursors stay valid across updates
+        seq = self._seq_by_key.get(record.get(self.key_field))
+        if seq is None:
+            self.add(record)
+            return
+        self._remove(seq)
+        self._insert(seq, record)
+    
+    def size(self) -> int:
+        return len(self._rows)
+    
+    def get(self, key: Any) -> Optional[Dict]:
+        seq = self._seq_by_key.get(key)
+        return self._rows.record(seq) if seq is not None else None
+    
+    def find(self, name: str, value: Any) -> Optional[Dict]:
+        """First record (in storage order) whose indexed field equals value"""
+        seqs = self._values[name].get(self._hashable(value))
+        return self._rows.record(seqs[0]) if seqs else None
+    
+    def count(self, name: str, value: Any) -> int:
+        """Number of records whose indexed field equals value"""
+        return len(self._values[name].get(self._hashable(value), ()))
+    
+    def values(self, name: str) -> Dict[Any, int]:
+        """Distinct values of an indexed field with their record counts"""
+        return {value: len(seqs) for value, seqs in self._values[name].items()}
+    
+    def page(
+        self,
+        filters: Dict[str, Any],
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Records matching all filters, in storage order
+        
+        Returns:
+            (records, next_cursor) - next_cursor is None on the last page
+        """
+        unknown = set(filters) - set(self.fields)
+        if unknown:
+            raise ValueError(f"Unsupported filter: {', '.join(sorted(unknown))}")
+        
+        # Walk the most selective list and check the other filters per record
+        candidates = self._all
+        for name, value in filters.items():
+            seqs = self._values[name].get(self._hashable(value), [])
+            if len(seqs) < len(candidates):
+                candidates = seqs
+        
+        names = list(self.fields)
+        checks = [(names.index(name), self._hashable(value)) for name, value in filters.items()]
+        start = bisect_right(candidates, decode_cursor(cursor)) if cursor else 0
+        
+        rows = self._rows
+        results: List[Dict] = []
+        last_seq = None
+        for i in range(start, len(candidates)):
+            seq = candidates[i]
+            if all(rows.value(seq, position) == value for position, value in checks):
+                if limit is not None and len(results) == limit:
+                    return results, encode_cursor(last_seq)
+                results.append(rows.record(seq))
+                last_seq = seq
+        
+        return results, None
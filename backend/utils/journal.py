@@ -0,0 +1,327 @@
+"""
+Document Journal
+Append-only mutation log for tenant collection documents
+
+A collection document (e.g. users.json) is stored as a snapshot plus a
+journal file next to it (users.journal). Every mutation is appended to the
+journal as one JSON line; readers see the snapshot with the journal replayed
+on top. Once the journal grows past a threshold, a background task writes a
+fresh snapshot (atomically renamed into place) and truncates the journal.
+"""
+
+import asyncio
+import contextlib
+import copy
+import json
+import logging
+import os
+import time
+import aiofiles
+from pathlib import Path
+from typing import Optional, Dict, List, Any, AsyncContextManager, Callable, Awaitable, Tuple
+
+from utils import codec
+
+
+Signature = Optional[Tuple[int, int, int]]
+
+# Loads retried when another process compacts while we read
+LOAD_ATTEMPTS = 5
+
+# Seconds before a failed background compaction is tried again
+COMPACTION_RETRY_SECONDS = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(path: Path) -> Signature:
+    """(inode, mtime_ns, size) of a file, None if missing"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # The inode changes on every atomic rename, so same-size rewrites within
+    # one mtime tick are still detected
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class DocumentJournal:
+    """Snapshot + journal storage for a single collection document"""
+    
+    def __init__(
+        self,
+        snapshot_path: Path,
+        collection: str,
+        key_field: str,
+        read_snapshot: Callable[[Path], Awaitable[Dict]],
+        write_snapshot: Callable[[Path, Dict], Awaitable[None]],
+        compact_threshold: int = 1000,
+        write_lock: Optional[Callable[[], AsyncContextManager[None]]] = None,
+        fsync: bool = True
+    ):
+        """
+        Args:
+            write_lock: Cross-process lock for the document; mutations are
+                expected to run under it already, compaction takes it itself
+            fsync: Sync every append to disk before acknowledging it (off:
+                faster writes, but the last appends can be lost on power
+                failure; a process crash alone loses nothing)
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path.with_suffix('.journal')
+        self.collection = collection
+        self.key_field = key_field
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self._read_snapshot = read_snapshot
+        self._write_snapshot = write_snapshot
+        self._write_lock = write_lock or contextlib.nullcontext
+        self._lock = asyncio.Lock()
+        self._compaction: Optional[asyncio.Task] = None
+        self._compaction_failed_at: Optional[float] = None
+        self.compaction_failures = 0
+        
+        # Materialized state (snapshot + replayed journal)
+        self._document: Optional[Dict] = None
+        self._positions: Dict[Any, int] = {}
+        self._max_id = 0
+        self._entries = 0
+        self._signature: Tuple[Signature, Signature] = (None, None)
+        self._generation = 0
+    
+    # =====================================================
+    # MATERIALIZATION
+    # =====================================================
+    
+    def _current_signature(self) -> Tuple[Signature, Signature]:
+        return (file_signature(self.snapshot_path), file_signature(self.journal_path))
+    
+    def _track(self, record: Dict, position: int) -> None:
+        """Index a record position and keep the running max numeric ID"""
+        key = record.get(self.key_field)
+        self._positions[key] = position
+        if isinstance(key, int) and key > self._max_id:
+            self._max_id = key
+    
+    def _apply(self, entry: Dict) -> Dict:
+        """Apply one journal entry to the materialized document"""
+        self._generation += 1
+        records = self._document.setdefault(self.collection, [])
+        op = entry.get('op')
+        
+        if op == 'insert':
+            record = entry['record']
+            key = record.get(self.key_field)
+            position = self._positions.get(key)
+            # Inserts are idempotent so replaying over a fresh snapshot is safe
+            if position is None:
+                records.append(record)
+                position = len(records) - 1
+            else:
+                records[position] = record
+            self._track(record, position)
+            return record
+        
+        if op == 'update':
+            position = self._positions.get(entry.get('key'))
+            if position is None:
+                raise ValueError(f"Journal update for unknown key {entry.get('key')}")
+            records[position].update(entry.get('changes', {}))
+            return records[position]
+        
+        raise ValueError(f"Unknown journal operation: {op}")
+    
+    async def _read_files(self) -> Tuple[Tuple[Signature, Signature], Dict, List[str]]:
+        """
+        Snapshot and journal lines that belong together
+        
+        Reads take no cross-process lock. If another worker compacts
+        between our snapshot and journal reads, the journal we read already
+        belongs to its new snapshot (and may update records ours lacks), so
+        the snapshot is re-checked afterwards and the read retried.
+        """
+        for _ in range(LOAD_ATTEMPTS):
+            signature = self._current_signature()
+            document = await self._read_snapshot(self.snapshot_path)
+            try:
+                async with aiofiles.open(self.journal_path, 'r', encoding='utf-8') as f:
+                    lines = (await f.read()).splitlines()
+            except FileNotFoundError:
+                lines = []
+            if file_signature(self.snapshot_path) == signature[0]:
+                return signature, document, lines
+        raise ValueError(f"{self.snapshot_path} kept changing while being read")
+    
+    async def _load(self) -> None:
+        """Read the snapshot and replay the journal on top of it"""
+        signature, document, lines = await self._read_files()
+        
+        self._document = document
+        self._generation += 1
+        self._positions = {}
+        self._max_id = 0
+        self._entries = 0
+        for position, record in enumerate(document.get(self.collection, [])):
+            self._track(record, position)
+        
+        for line_no, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                entry = codec.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line is what a crash mid-append leaves behind
+                if line_no == len(lines) - 1:
+                    break
+                raise ValueError(f"Corrupt journal entry in {self.journal_path}:{line_no + 1}")
+            self._apply(entry)
+            self._entries += 1
+        
+        self._signature = signature
+    
+    async def _ensure_loaded(self) -> None:
+        if self._document is None or self._current_signature() != self._signature:
+            await self._load()
+    
+    # =====================================================
+    # PUBLIC API
+    # =====================================================
+    
+    async def read(self) -> Dict:
+        """Materialized document (shared object, treat as read-only)"""
+        async with self._lock:
+            await self._ensure_loaded()
+            return self._document
+    
+    async def version(self) -> int:
+        """Counter that changes whenever the materialized document changes"""
+        async with self._lock:
+            await self._ensure_loaded()
+            return self._generation
+    
+    async def release(self) -> None:
+        """
+        Drop the materialized document to free memory
+        
+        Appended entries are already on disk; the next access replays the
+        snapshot and journal again (with a new version).
+        """
+        async with self._lock:
+            self._document = None
+            self._positions = {}
+    
+    async def get(self, key: Any) -> Optional[Dict]:
+        """Single record lookup by key"""
+        async with self._lock:
+            await self._ensure_loaded()
+            position = self._positions.get(key)
+            if position is None:
+                return None
+            return self._document[self.collection][position]
+    
+    async def insert(self, build: Callable[[int], Dict]) -> Dict:
+        """
+        Append a new record
+        
+        Args:
+            build: Called with the next free numeric ID, returns the record
+        """
+        return (await self.insert_many([build]))[0]
+    
+    async def insert_many(self, builds: List[Callable[[int], Dict]]) -> List[Dict]:
+        """Append several records with consecutive IDs in one journal write"""
+        async with self._lock:
+            await self._ensure_loaded()
+            entries = [
+                {"op": "insert", "record": build(self._max_id + offset)}
+                for offset, build in enumerate(builds, start=1)
+            ]
+            await self._append(*entries)
+            return [self._apply(copy.deepcopy(entry)) for entry in entries]
+    
+    async def update(self, key: Any, changes: Dict) -> Dict:
+        """
+        Append an update (shallow merge) for an existing record
+        
+        Raises:
+            KeyError: If no record has the given key
+        """
+        async with self._lock:
+            await self._ensure_loaded()
+            if key not in self._positions:
+                raise KeyError(key)
+            entry = {"op": "update", "key": key, "changes": changes}
+            await self._append(entry)
+            return self._apply(copy.deepcopy(entry))
+    
+    async def update_many(self, updates: List[Tuple[Any, Dict]]) -> List[Optional[Dict]]:
+        """
+        Append several updates in one journal write
+        
+        Returns:
+            Updated records in input order, None for unknown keys
+        """
+        async with self._lock:
+            await self._ensure_loaded()
+            entries = [
+                {"op": "update", "key": key, "changes": changes} if key in self._positions else None
+                for key, changes in updates
+            ]
+            await self._append(*[entry for entry in entries if entry is not None])
+            return [self._apply(copy.deepcopy(entry)) if entry else None for entry in entries]
+    
+    async def _append(self, *entries: Dict) -> None:
+        """Write journal lines in one append and schedule compaction when due"""
+        if not entries:
+            return
+        lines = ''.join(codec.dumps_str(entry) + '\n' for entry in entries)
+        async with aiofiles.open(self.journal_path, 'a', encoding='utf-8') as f:
+            await f.write(lines)
+            await f.flush()
+            if self.fsync:
+                await asyncio.to_thread(os.fsync, f.fileno())
+        
+        self._entries += len(entries)
+        self._signature = self._current_signature()
+        
+        if self._entries >= self.compact_threshold and self._compaction is None and not self._compaction_backoff():
+            self._compaction = asyncio.create_task(self._compact_in_background())
+    
+    def _compaction_backoff(self) -> bool:
+        """True while a failed compaction should not be retried yet"""
+        failed_at = self._compaction_failed_at
+        return failed_at is not None and time.monotonic() - failed_at < COMPACTION_RETRY_SECONDS
+    
+    async def _compact_in_background(self) -> None:
+        try:
+            await self.compact()
+            self._compaction_failed_at = None
+        except Exception:
+            # Appends stay safe in the journal; retry after a pause instead
+            # of on every append
+            self.compaction_failures += 1
+            self._compaction_failed_at = time.monotonic()
+            logger.exception("Compaction of %s failed, retrying in %.0fs", self.snapshot_path, COMPACTION_RETRY_SECONDS)
+        finally:
+            self._compaction = None
+    
+    async def compact(self) -> None:
+        """Fold the journal into a fresh snapshot and truncate the journal"""
+        async with self._write_lock(), self._lock:
+            await self._ensure_loaded()
+            if self._entries == 0:
+                return
+            
+            # The snapshot is swapped in atomically before the journal is
+            # cleared; a crash in between only replays idempotent entries.
+            await self._write_snapshot(self.snapshot_path, self._document)
+            async with aiofiles.open(self.journal_path, 'w', encoding='utf-8') as f:
+                await f.truncate(0)
+            
+            self._entries = 0
+            self._signature = self._current_signature()
+    
+    @property
+    def pending_entries(self) -> int:
+        """Journal entries not yet folded into the snapshot"""
+        return self._entries
@@ -0,0 +1,163 @@
+"""
+Cross-Process Coordination
+Advisory file locks and shared generation counters for multi-worker setups
+
+Several uvicorn workers may serve the same data directory. Writers take a
+per-tenant-collection advisory lock (flock on a file in data/.locks) around
+the whole read-modify-write, so concurrent workers cannot lose each other's
+updates. After writing a cached document, a worker bumps a counter in a
+small memory-mapped file (data/.generations); other workers compare that
+counter on every read, which costs a memory load rather than a stat, and
+reload as soon as it moves.
+
+On platforms without fcntl (Windows) locks are process-local and the
+counters are disabled, which is only safe with a single worker.
+"""
+
+import asyncio
+import mmap
+import os
+import struct
+import time
+import zlib
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional, Dict, AsyncIterator
+
+from utils import metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+COUNTER = struct.Struct("<Q")
+
+
+class LockTimeout(Exception):
+    """A cross-process lock could not be acquired in time"""
+
+
+class LockManager:
+    """
+    Named locks that hold across coroutines and processes
+    
+    Coroutines of one process queue on an asyncio.Lock first, so only one
+    of them polls the file lock at a time. The file lock is taken with
+    non-blocking flock attempts and a short backoff, which keeps the event
+    loop free and lets a waiting request be cancelled.
+    """
+    
+    def __init__(self, lock_dir: Optional[Path] = None, timeout: float = 30.0):
+        """
+        Args:
+            lock_dir: Directory for lock files (None = process-local locks only)
+            timeout: Seconds to wait for another process before LockTimeout
+        """
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.timeout = timeout
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.contended = 0
+        if self.lock_dir is not None:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+    
+    @property
+    def cross_process(self) -> bool:
+        return self.lock_dir is not None
+    
+    async def _acquire_file(self, name: str) -> int:
+        fd = os.open(self.lock_dir / f"{name}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        delay = 0.001
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except BlockingIOError:
+                    pass
+                if delay == 0.001:
+                    self.contended += 1
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"Timed out waiting for lock {name}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        except BaseException:
+            os.close(fd)
+            raise
+    
+    @asynccontextmanager
+    async def lock(self, name: str) -> AsyncIterator[None]:
+        """Hold the named lock for the duration of the block"""
+        local = self._locks.setdefault(name, asyncio.Lock())
+        with metrics.span('lock.wait'):
+            await local.acquire()
+        try:
+            if self.lock_dir is None:
+                yield
+                return
+            with metrics.span('lock.wait'):
+                fd = await self._acquire_file(name)
+            try:
+                yield
+            finally:
+                # Closing the descriptor releases the flock
+                os.close(fd)
+        finally:
+            local.release()
+    
+    def stats(self) -> Dict:
+        return {"cross_process": self.cross_process, "contended": self.contended}
+
+
+class GenerationCounters:
+    """
+    Fixed-size table of 64-bit counters in a shared memory-mapped file
+    
+    Keys are hashed (crc32, stable across processes) into slots; a
+    collision only causes a spurious reload. Counters only ever increase,
+    and each increment holds a byte-range lock on its slot, so a reader
+    that saw a value knows any later change will look different.
+    """
+    
+    def __init__(self, path: Path, slots: int = 4096):
+        self.path = path
+        self.slots = slots
+        size = slots * COUNTER.size
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+    
+    def _offset(self, key: str) -> int:
+        return (zlib.crc32(key.encode('utf-8')) % self.slots) * COUNTER.size
+    
+    def get(self, key: str) -> int:
+        """Current counter for key (no system call)"""
+        return COUNTER.unpack_from(self._map, self._offset(key))[0]
+    
+    def bump(self, key: str) -> int:
+        """Increment the counter for key; call after the change is on disk"""
+        offset = self._offset(key)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, COUNTER.size, offset)
+        try:
+            value = COUNTER.unpack_from(self._map, offset)[0] + 1
+            COUNTER.pack_into(self._map, offset, value)
+            return value
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, COUNTER.size, offset)
+    
+    def close(self) -> None:
+        if self._fd is None:
+            return
+        self._map.close()
+        os.close(self._fd)
+        self._fd = None
+
+
+def create_generation_counters(path: Path) -> Optional[GenerationCounters]:
+    """Shared counters at path, or None where fcntl is unavailable"""
+    if fcntl is None:
+        return None
+    return GenerationCounters(path)
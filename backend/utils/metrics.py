@@ -0,0 +1,327 @@
+"""
+Request Metrics
+Per-route/tenant latency histograms, timing spans and Prometheus export
+
+MetricsMiddleware times every request and labels it with the route
+template (e.g. /api/tenants/{tenant_id}/users), the status and the tenant
+of the authenticated caller (set with tag_tenant(), so requests with bad
+tokens or unknown tenants in the path cannot create new series).
+Code on the request path marks its expensive steps with span():
+
+    with metrics.span('storage.load'):
+        document = await self.backend.load(tenant, collection)
+
+Span times are summed per request, recorded as their own histograms and
+returned to the client in a Server-Timing header, so a slow request shows
+whether it waited on a lock, read a file, parsed JSON or verified a
+password. Spans may nest (e.g. json.parse inside storage.load).
+
+When metrics are disabled span() returns a shared no-op object and the
+middleware is not installed, so instrumented code costs one function call.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Set, Tuple, Callable
+
+# Upper bounds in seconds (Prometheus defaults plus finer sub-10ms steps)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Label for requests that carry no tenant, and for tenants past max_tenants
+NO_TENANT = "-"
+OTHER_TENANT = "_other"
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Response adds the charset
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds"""
+    
+    __slots__ = ("buckets", "counts", "sum", "count")
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestTimings:
+    """Span totals collected while one request is handled"""
+    
+    __slots__ = ("spans", "tenant_id")
+    
+    def __init__(self, tenant_id: Optional[str] = None):
+        self.spans: Dict[str, float] = {}
+        self.tenant_id = tenant_id
+    
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+    
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value (durations in milliseconds)"""
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class MetricsRegistry:
+    """Histograms keyed by label values, rendered as Prometheus text"""
+    
+    REQUEST_LABELS = ("method", "route", "tenant", "status")
+    SPAN_LABELS = ("span", "route", "tenant")
+    
+    def __init__(self, enabled: bool = False, max_tenants: int = 256):
+        """
+        Args:
+            enabled: Record requests and spans
+            max_tenants: Distinct tenant labels before others share "_other"
+        """
+        self.enabled = enabled
+        self.max_tenants = max_tenants
+        self.requests: Dict[Tuple[str, ...], Histogram] = {}
+        self.spans: Dict[Tuple[str, ...], Histogram] = {}
+        self._tenants: Set[str] = set()
+        # name -> (help, type, callback) for values owned by other components
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], float]]] = {}
+    
+    def tenant_label(self, tenant_id: Optional[str]) -> str:
+        """Tenant label value, bounded so arbitrary path values cannot add series"""
+        if not tenant_id:
+            return NO_TENANT
+        if tenant_id in self._tenants:
+            return tenant_id
+        if len(self._tenants) >= self.max_tenants:
+            return OTHER_TENANT
+        self._tenants.add(tenant_id)
+        return tenant_id
+    
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        tenant_id: Optional[str],
+        status: int,
+        seconds: float,
+        spans: Dict[str, float]
+    ) -> None:
+        tenant = self.tenant_label(tenant_id)
+        key = (method, route, tenant, str(status))
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram()
+        histogram.observe(seconds)
+        for name, span_seconds in spans.items():
+            self.observe_span(name, route, tenant, span_seconds)
+    
+    def observe_span(self, name: str, route: str, tenant: str, seconds: float) -> None:
+        key = (name, route, tenant)
+        histogram = self.spans.get(key)
+        if histogram is None:
+            histogram = self.spans[key] = Histogram()
+        histogram.observe(seconds)
+    
+    def add_collector(self, name: str, help_text: str, metric_type: str, callback: Callable[[], float]) -> None:
+        """Export a value read at scrape time (counter or gauge)"""
+        self._collectors[name] = (help_text, metric_type, callback)
+    
+    @staticmethod
+    def _render_histograms(
+        lines: List[str],
+        name: str,
+        help_text: str,
+        label_names: Tuple[str, ...],
+        histograms: Dict[Tuple[str, ...], Histogram]
+    ) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in sorted(histograms.items()):
+            labels = _labels(label_names, key)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        self._render_histograms(
+            lines,
+            "http_request_duration_seconds",
+            "Request latency by route template, tenant and status.",
+            self.REQUEST_LABELS,
+            self.requests
+        )
+        self._render_histograms(
+            lines,
+            "app_span_duration_seconds",
+            "Time per request spent in an instrumented step.",
+            self.SPAN_LABELS,
+            self.spans
+        )
+        for name, (help_text, metric_type, callback) in sorted(self._collectors.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {callback()}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def configure(enabled: bool, max_tenants: int = 256) -> MetricsRegistry:
+    """Enable or disable recording (call once at startup)"""
+    registry.enabled = enabled
+    registry.max_tenants = max_tenants
+    return registry
+
+
+# =====================================================
+# SPANS
+# =====================================================
+
+class _Span:
+    __slots__ = ("name", "started")
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.started
+        timings = _current.get()
+        if timings is not None:
+            timings.add(self.name, elapsed)
+        else:
+            # Outside a request (startup, background compaction)
+            registry.observe_span(self.name, "background", NO_TENANT, elapsed)
+
+
+class _NoSpan:
+    __slots__ = ()
+    
+    def __enter__(self) -> "_NoSpan":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """Context manager timing a step of the current request"""
+    if not registry.enabled:
+        return _NO_SPAN
+    return _Span(name)
+
+
+def tag_tenant(tenant_id: Optional[str]) -> None:
+    """Label the current request with the caller's tenant"""
+    timings = _current.get()
+    if timings is not None:
+        timings.tenant_id = tenant_id
+
+
+# =====================================================
+# MIDDLEWARE
+# =====================================================
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency (and optionally a Server-Timing header)
+    
+    The route label is the matched route's path template (read after
+    routing), or "unmatched". Server-Sent Event streams are not recorded
+    since their duration is the connection lifetime. The Server-Timing
+    header shows internals to any caller, so it is only added when
+    server_timing is set.
+    """
+    
+    def __init__(self, app, registry: MetricsRegistry = registry, server_timing: bool = False):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+        self._routes: Dict[Callable, List] = {}
+    
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        candidates = self._routes.get(endpoint)
+        if candidates is None:
+            candidates = self._routes[endpoint] = [
+                route for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint
+            ]
+        if len(candidates) == 1:
+            return candidates[0].path
+        # One endpoint behind several routes (e.g. static trees): match the path
+        for candidate in candidates:
+            if candidate.path_regex.match(scope["path"]):
+                return candidate.path
+        return getattr(endpoint, "__name__", "unknown")
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        status = 500
+        streaming_events = False
+        
+        async def timed_send(message):
+            nonlocal status, streaming_events
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                for name, value in headers:
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming_events = True
+                if self.server_timing:
+                    elapsed = time.perf_counter() - started
+                    headers.append((b"server-timing", timings.server_timing(elapsed).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            if not streaming_events:
+                self.registry.observe_request(
+                    scope["method"],
+                    self._route(scope),
+                    timings.tenant_id,
+                    status,
+                    time.perf_counter() - started,
+                    timings.spans
+                )
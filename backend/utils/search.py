@@ -0,0 +1,337 @@
+"""
+Full-Text Search
+Incremental inverted indexes with accent folding and prefix matching
+
+Text is folded before tokenizing (case, accents, ß -> ss), and German
+umlauts are additionally indexed in their ae/oe/ue spelling, so
+"Anhänger", "anhanger" and "anhaenger" all find the same record. The
+vocabulary is kept sorted, so a prefix query is a bisect plus a short
+scan. Every query term matches as a prefix (for type-ahead); whole-token
+matches rank higher.
+"""
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from functools import lru_cache
+from typing import Optional, Dict, List, Any, Set, Tuple, Iterator
+
+from utils.indexes import CollectionIndex
+from utils.storage import get_field
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Umlaut transliterations indexed alongside the accent-folded form
+GERMAN_TRANSLITERATIONS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+
+# Score multiplier for a prefix (rather than whole-token) match
+PREFIX_MATCH_FACTOR = 0.6
+
+# Upper bound on vocabulary entries one prefix term expands to
+MAX_PREFIX_EXPANSION = 256
+
+# Searchable collections: fields (dotted path -> weight) and hit summary fields
+SEARCH_TYPES = {
+    "customers": {
+        "key_field": "id",
+        "fields": {
+            "company_name": 3.0,
+            "contact_person": 2.0,
+            "address.city": 1.0,
+            "email": 1.0,
+            "notes": 0.5,
+        },
+        "title": ["company_name"],
+        "subtitle": ["contact_person", "address.city"],
+    },
+    "equipment": {
+        "key_field": "id",
+        "fields": {
+            "name": 3.0,
+            "type": 2.0,
+            "category": 1.5,
+            "manufacturer": 1.5,
+            "model": 1.5,
+            "serial_number": 1.0,
+            "description": 1.0,
+            "notes": 0.5,
+            "technical_data": 0.5,
+            "specifications": 0.5,
+        },
+        "title": ["name"],
+        "subtitle": ["type", "location"],
+    },
+    "users": {
+        "key_field": "user_id",
+        "fields": {
+            "personal_info.first_name": 3.0,
+            "personal_info.last_name": 3.0,
+            "access_credentials.username": 2.0,
+            "personal_info.company": 1.0,
+            "personal_info.position": 1.0,
+            "personal_info.department": 1.0,
+            "contact_info.email": 1.0,
+        },
+        "title": ["personal_info.first_name", "personal_info.last_name"],
+        "subtitle": ["personal_info.position", "access_credentials.username"],
+    },
+}
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ("Anhänger" -> "anhanger")"""
+    folded = text.casefold()
+    if folded.isascii():
+        return folded
+    decomposed = unicodedata.normalize("NFKD", folded)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=65536)
+def _word_tokens(word: str) -> Tuple[str, ...]:
+    """Folded tokens for one raw word, plus its ae/oe/ue spelling if different"""
+    tokens = TOKEN_PATTERN.findall(fold(word))
+    transliterated = word.casefold().translate(GERMAN_TRANSLITERATIONS)
+    if transliterated != word.casefold():
+        tokens += [t for t in TOKEN_PATTERN.findall(fold(transliterated)) if t not in tokens]
+    return tuple(tokens)
+
+
+def _words(text: str) -> List[str]:
+    if not text.isascii():
+        # Composed form so combining marks do not split words
+        text = unicodedata.normalize("NFC", text)
+    return TOKEN_PATTERN.findall(text)
+
+
+def tokenize(text: str) -> List[str]:
+    """Folded tokens of a query"""
+    return [token for word in _words(text) for token in TOKEN_PATTERN.findall(fold(word))]
+
+
+def index_tokens(text: str) -> Set[str]:
+    """Tokens to index for a field value (folded + umlaut transliterations)"""
+    return {token for word in _words(text) for token in _word_tokens(word)}
+
+
+def _strings(value: Any) -> Iterator[str]:
+    """All string/number leaves of a (nested) field value"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield str(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+class SearchIndex(CollectionIndex):
+    """
+    Weighted inverted index over one collection
+    
+    Postings map a token to {record key: weight}, where the weight is the
+    sum of the weights of the fields the token occurs in. Hits carry a
+    small summary (title/subtitle) rather than the full record.
+    """
+    
+    def __init__(
+        self,
+        kind: str,
+        key_field: str,
+        fields: Dict[str, float],
+        title: List[str],
+        subtitle: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            kind: Result type reported in hits (e.g. 'equipment')
+            key_field: Primary key field of the records
+            fields: Dotted field -> weight (nested dicts/lists are flattened)
+            title: Dotted fields joined into the hit title
+            subtitle: Dotted fields joined into the hit subtitle
+        """
+        super().__init__(key_field)
+        self.kind = kind
+        self.fields = fields
+        self.title = title
+        self.subtitle = subtitle or []
+        self._postings: Dict[str, Dict[Any, float]] = {}
+        # token -> weight -> keys, for top-k single-term queries without a full scan
+        self._levels: Dict[str, Dict[float, Set[Any]]] = {}
+        self._doc_tokens: Dict[Any, Set[str]] = {}
+        self._summaries: Dict[Any, Dict] = {}
+        self._vocabulary: List[str] = []
+        self._building = False
+    
+    def _summary(self, key: Any, record: Dict) -> Dict:
+        def join(paths: List[str]) -> str:
+            parts = [get_field(record, path) for path in paths]
+            return " ".join(str(part) for part in parts if part not in (None, ""))
+        
+        return {"type": self.kind, "id": key, "title": join(self.title), "subtitle": join(self.subtitle)}
+    
+    def build(self, records: List[Dict]) -> None:
+        # Sort the vocabulary once instead of insort per new token
+        self._building = True
+        try:
+            super().build(records)
+        finally:
+            self._building = False
+        self._vocabulary = sorted(self._postings)
+    
+    def add(self, record: Dict) -> None:
+        key = record.get(self.key_field)
+        if key is None:
+            return
+        if key in self._doc_tokens:
+            self.discard(key)
+        
+        weights: Dict[str, float] = {}
+        for path, weight in self.fields.items():
+            tokens: Set[str] = set()
+            for text in _strings(get_field(record, path)):
+                tokens |= index_tokens(text)
+            for token in tokens:
+                weights[token] = weights.get(token, 0.0) + weight
+        
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if not self._building:
+                    insort(self._vocabulary, token)
+            postings[key] = weight
+            self._levels.setdefault(token, {}).setdefault(weight, set()).add(key)
+        self._doc_tokens[key] = set(weights)
+        self._summaries[key] = self._summary(key, record)
+    
+    def discard(self, key: Any) -> None:
+        tokens = self._doc_tokens.pop(key, None)
+        if tokens is None:
+            return
+        del self._summaries[key]
+        for token in tokens:
+            postings = self._postings[token]
+            levels = self._levels[token]
+            weight = postings.pop(key)
+            levels[weight].discard(key)
+            if not levels[weight]:
+                del levels[weight]
+            if not postings:
+                del self._postings[token]
+                del self._levels[token]
+                pos = bisect_left(self._vocabulary, token)
+                if pos < len(self._vocabulary) and self._vocabulary[pos] == token:
+                    del self._vocabulary[pos]
+    
+    def size(self) -> int:
+        return len(self._doc_tokens)
+    
+    def _expand(self, term: str) -> List[str]:
+        """Vocabulary tokens starting with term (the term itself first)"""
+        tokens = [term] if term in self._postings else []
+        pos = bisect_left(self._vocabulary, term)
+        while pos < len(self._vocabulary) and len(tokens) < MAX_PREFIX_EXPANSION:
+            token = self._vocabulary[pos]
+            if not token.startswith(term):
+                break
+            if token != term:
+                tokens.append(token)
+            pos += 1
+        return tokens
+    
+    def _term_scores(
+        self,
+        term: str,
+        tokens: List[str],
+        candidates: Optional[Dict[Any, float]] = None
+    ) -> Dict[Any, float]:
+        """
+        Best score per record for one query term
+        
+        With candidates given, only those records are scored, walking
+        whichever side (postings or candidates) is smaller per token.
+        """
+        scores: Dict[Any, float] = {}
+        for token in tokens:
+            factor = 1.0 if token == term else PREFIX_MATCH_FACTOR
+            postings = self._postings[token]
+            if candidates is not None and len(candidates) < len(postings):
+                matched = ((key, postings[key]) for key in candidates if key in postings)
+            elif candidates is not None:
+                matched = ((key, weight) for key, weight in postings.items() if key in candidates)
+            else:
+                matched = postings.items()
+            for key, weight in matched:
+                score = weight * factor
+                if score > scores.get(key, 0.0):
+                    scores[key] = score
+        return scores
+    
+    def _search_term(self, term: str, limit: int) -> List[Dict]:
+        """
+        Top hits for a single term (the type-ahead case)
+        
+        Walks (token, weight) groups from the highest score down and stops
+        once limit records are collected, instead of scoring every match.
+        A record's first group is its best one.
+        """
+        groups = []
+        for token in self._expand(term):
+            factor = 1.0 if token == term else PREFIX_MATCH_FACTOR
+            for weight, keys in self._levels[token].items():
+                groups.append((weight * factor, len(token), token, keys))
+        groups.sort(key=lambda group: (-group[0], group[1], group[2]))
+        
+        hits: Dict[Any, float] = {}
+        for score, _, _, keys in groups:
+            for key in keys:
+                if key not in hits:
+                    hits[key] = score
+                    if len(hits) == limit:
+                        break
+            if len(hits) == limit:
+                break
+        return [{**self._summaries[key], "score": round(score, 3)} for key, score in hits.items()]
+    
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Hits for records matching every query term, best first
+        
+        Every term matches whole tokens or prefixes (prefix matches rank
+        lower). Hits are {"type", "id", "title", "subtitle", "score"}.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        if len(terms) == 1:
+            return self._search_term(terms[0], limit)
+        
+        # Start from the rarest term and only score its matches for the rest
+        expanded = [(term, self._expand(term)) for term in terms]
+        expanded.sort(key=lambda item: sum(len(self._postings[t]) for t in item[1]))
+        totals: Optional[Dict[Any, float]] = None
+        for term, tokens in expanded:
+            scores = self._term_scores(term, tokens, candidates=totals)
+            totals = scores if totals is None else {key: totals[key] + score for key, score in scores.items()}
+            if not totals:
+                return []
+        
+        best = heapq.nlargest(limit, totals.items(), key=lambda item: item[1])
+        return [{**self._summaries[key], "score": round(score, 3)} for key, score in best]
+
+
+def create_search_index(kind: str) -> SearchIndex:
+    """SearchIndex for one of SEARCH_TYPES"""
+    config = SEARCH_TYPES[kind]
+    return SearchIndex(
+        kind,
+        config["key_field"],
+        config["fields"],
+        title=config["title"],
+        subtitle=config["subtitle"]
+    )
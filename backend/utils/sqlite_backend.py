@@ -0,0 +1,358 @@
+"""
+SQLite Storage Backend
+Indexed storage for tenant collections in a single SQLite database
+
+Each record is stored as its full JSON document plus a few extracted,
+indexed columns used for point lookups and filtered listings. Top-level
+keys of a collection document other than the record list (tenant_name,
+config, ...) are kept in the documents table so load() returns the same
+shape as the JSON files.
+"""
+
+import asyncio
+import sqlite3
+import threading
+from typing import Optional, Dict, List, Any, AsyncIterator, Callable, Hashable, Tuple
+
+from utils import codec
+from utils.storage import StorageBackend, COLLECTION_KEYS, get_field, matches
+from utils.locking import LockManager
+
+# Per collection: indexed column -> dotted field in the record
+INDEXED_COLUMNS = {
+    "users": {
+        "username": "access_credentials.username",
+        "user_type": "user_type",
+        "role": "access_credentials.role",
+    },
+    "equipment": {
+        "status": "status",
+        "type": "type",
+        "location": "location",
+    },
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    tenant_id TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    PRIMARY KEY (tenant_id, collection)
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    tenant_id TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    header TEXT NOT NULL,
+    PRIMARY KEY (tenant_id, collection)
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant_id TEXT NOT NULL,
+    user_id,
+    username TEXT,
+    user_type TEXT,
+    role TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (tenant_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (tenant_id, username);
+CREATE INDEX IF NOT EXISTS idx_users_user_type ON users (tenant_id, user_type);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users (tenant_id, role);
+
+CREATE TABLE IF NOT EXISTS equipment (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant_id TEXT NOT NULL,
+    id,
+    status TEXT,
+    type TEXT,
+    location TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (tenant_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_equipment_status ON equipment (tenant_id, status);
+CREATE INDEX IF NOT EXISTS idx_equipment_type ON equipment (tenant_id, type);
+CREATE INDEX IF NOT EXISTS idx_equipment_location ON equipment (tenant_id, location);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    SQLite (WAL mode) implementation of StorageBackend
+    
+    The key column has no declared type so integer and string IDs keep
+    their JSON type. Queries run in a worker thread on a single shared
+    connection serialized by a lock.
+    """
+    
+    def __init__(self, db_path: str, locks: Optional[LockManager] = None):
+        super().__init__(locks)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+    
+    # =====================================================
+    # INTERNALS
+    # =====================================================
+    
+    async def _run(self, fn: Callable, *args) -> Any:
+        """Run a blocking database function off the event loop"""
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+    
+    @staticmethod
+    def _columns(collection: str) -> Tuple[str, List[str]]:
+        if collection not in COLLECTION_KEYS:
+            raise ValueError(f"Unknown collection: {collection}")
+        return COLLECTION_KEYS[collection], list(INDEXED_COLUMNS[collection])
+    
+    def _row_values(self, collection: str, record: Dict) -> List[Any]:
+        """Extracted column values for a record (key first, data last)"""
+        key_field, columns = self._columns(collection)
+        values = [record.get(key_field)]
+        values += [get_field(record, INDEXED_COLUMNS[collection][c]) for c in columns]
+        values.append(codec.dumps_str(record))
+        return values
+    
+    def _upsert_row(self, tenant_id: str, collection: str, record: Dict) -> None:
+        key_field, columns = self._columns(collection)
+        names = [key_field] + columns + ["data"]
+        placeholders = ", ".join("?" for _ in range(len(names) + 1))
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names[1:])
+        self._conn.execute(
+            f"INSERT INTO {collection} (tenant_id, {', '.join(names)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (tenant_id, {key_field}) DO UPDATE SET {updates}",
+            [tenant_id] + self._row_values(collection, record)
+        )
+    
+    def _bump_revision(self, tenant_id: str, collection: str) -> None:
+        """Advance the collection revision (call inside the write transaction)"""
+        self._conn.execute(
+            "INSERT INTO revisions (tenant_id, collection, revision) VALUES (?, ?, 1) "
+            "ON CONFLICT (tenant_id, collection) DO UPDATE SET revision = revision + 1",
+            (tenant_id, collection)
+        )
+    
+    def _select(self, tenant_id: str, collection: str, where: str = "", params: Tuple = ()) -> List[Dict]:
+        self._columns(collection)
+        rows = self._conn.execute(
+            f"SELECT data FROM {collection} WHERE tenant_id = ? {where} ORDER BY seq",
+            (tenant_id,) + tuple(params)
+        ).fetchall()
+        return [codec.loads(row[0]) for row in rows]
+    
+    # =====================================================
+    # STORAGE BACKEND API
+    # =====================================================
+    
+    async def version(self, tenant: Dict, collection: str) -> Optional[Hashable]:
+        def read_revision():
+            row = self._conn.execute(
+                "SELECT revision FROM revisions WHERE tenant_id = ? AND collection = ?",
+                (tenant['tenant_id'], collection)
+            ).fetchone()
+            return row[0] if row else 0
+        
+        return await self._run(read_revision)
+    
+    async def load(self, tenant: Dict, collection: str) -> Dict:
+        tenant_id = tenant['tenant_id']
+        
+        def load_document():
+            row = self._conn.execute(
+                "SELECT header FROM documents WHERE tenant_id = ? AND collection = ?",
+                (tenant_id, collection)
+            ).fetchone()
+            document = codec.loads(row[0]) if row else {}
+            document[collection] = self._select(tenant_id, collection)
+            return document
+        
+        return await self._run(load_document)
+    
+    async def load_header(self, tenant: Dict, collection: str) -> Dict:
+        def read_header():
+            row = self._conn.execute(
+                "SELECT header FROM documents WHERE tenant_id = ? AND collection = ?",
+                (tenant['tenant_id'], collection)
+            ).fetchone()
+            return codec.loads(row[0]) if row else {}
+        
+        return await self._run(read_header)
+    
+    async def iter_records(
+        self,
+        tenant: Dict,
+        collection: str,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Dict]]:
+        """Keyset-paginated scan so only one batch is in memory at a time"""
+        self._columns(collection)
+        tenant_id = tenant['tenant_id']
+        
+        def fetch_batch(after_seq: int):
+            return self._conn.execute(
+                f"SELECT seq, data FROM {collection} WHERE tenant_id = ? AND seq > ? "
+                f"ORDER BY seq LIMIT ?",
+                (tenant_id, after_seq, batch_size)
+            ).fetchall()
+        
+        after_seq = 0
+        while True:
+            rows = await self._run(fetch_batch, after_seq)
+            if not rows:
+                return
+            after_seq = rows[-1][0]
+            yield [codec.loads(row[1]) for row in rows]
+    
+    async def get(self, tenant: Dict, collection: str, key: Any) -> Optional[Dict]:
+        key_field, _ = self._columns(collection)
+        records = await self._run(
+            self._select, tenant['tenant_id'], collection, f"AND {key_field} = ?", (key,)
+        )
+        return records[0] if records else None
+    
+    async def find(self, tenant: Dict, collection: str, field: str, value: Any) -> Optional[Dict]:
+        records = await self.query(tenant, collection, {field: value})
+        return records[0] if records else None
+    
+    async def query(self, tenant: Dict, collection: str, filters: Dict[str, Any]) -> List[Dict]:
+        key_field, columns = self._columns(collection)
+        by_field = {INDEXED_COLUMNS[collection][c]: c for c in columns}
+        by_field[key_field] = key_field
+        
+        # Indexed fields go to SQL, anything else is filtered in Python
+        clauses, params, remaining = [], [], {}
+        for field, value in filters.items():
+            column = by_field.get(field)
+            if column is None:
+                remaining[field] = value
+            elif value is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        
+        where = "".join(f" AND {clause}" for clause in clauses)
+        records = await self._run(self._select, tenant['tenant_id'], collection, where, tuple(params))
+        if remaining:
+            records = [r for r in records if matches(r, remaining)]
+        return records
+    
+    async def insert(self, tenant: Dict, collection: str, build: Callable[[int], Dict]) -> Dict:
+        return (await self.insert_many(tenant, collection, [build]))[0]
+    
+    async def update(self, tenant: Dict, collection: str, key: Any, changes: Dict) -> Dict:
+        record = (await self.update_many(tenant, collection, [(key, changes)]))[0]
+        if record is None:
+            raise KeyError(key)
+        return record
+    
+    async def insert_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        builds: List[Callable[[int], Dict]]
+    ) -> List[Dict]:
+        key_field, _ = self._columns(collection)
+        tenant_id = tenant['tenant_id']
+        
+        def insert_records():
+            # IMMEDIATE takes the write lock up front so ID assignment is atomic
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT MAX({key_field}) FROM {collection} "
+                    f"WHERE tenant_id = ? AND typeof({key_field}) = 'integer'",
+                    (tenant_id,)
+                ).fetchone()
+                next_id = row[0] or 0
+                records = []
+                for build in builds:
+                    next_id += 1
+                    record = build(next_id)
+                    self._upsert_row(tenant_id, collection, record)
+                    records.append(record)
+                self._bump_revision(tenant_id, collection)
+                self._conn.execute("COMMIT")
+                return records
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        return await self._run(insert_records)
+    
+    async def update_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        updates: List[Tuple[Any, Dict]]
+    ) -> List[Optional[Dict]]:
+        key_field, _ = self._columns(collection)
+        tenant_id = tenant['tenant_id']
+        
+        def update_records():
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                results: List[Optional[Dict]] = []
+                for key, changes in updates:
+                    row = self._conn.execute(
+                        f"SELECT data FROM {collection} WHERE tenant_id = ? AND {key_field} = ?",
+                        (tenant_id, key)
+                    ).fetchone()
+                    if row is None:
+                        results.append(None)
+                        continue
+                    record = codec.loads(row[0])
+                    record.update(changes)
+                    self._upsert_row(tenant_id, collection, record)
+                    results.append(record)
+                if any(record is not None for record in results):
+                    self._bump_revision(tenant_id, collection)
+                self._conn.execute("COMMIT")
+                return results
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        return await self._run(update_records)
+    
+    async def import_document(self, tenant: Dict, collection: str, document: Dict) -> int:
+        """
+        Replace a tenant collection with the contents of a JSON document
+        
+        Returns:
+            Number of records imported
+        """
+        tenant_id = tenant['tenant_id']
+        records = document.get(collection, [])
+        header = {k: v for k, v in document.items() if k != collection}
+        
+        def import_records():
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    f"DELETE FROM {collection} WHERE tenant_id = ?", (tenant_id,)
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents (tenant_id, collection, header) VALUES (?, ?, ?)",
+                    (tenant_id, collection, codec.dumps_str(header))
+                )
+                for record in records:
+                    self._upsert_row(tenant_id, collection, record)
+                self._bump_revision(tenant_id, collection)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return len(records)
+        
+        return await self._run(import_records)
+    
+    async def close(self) -> None:
+        await self._run(self._conn.close)
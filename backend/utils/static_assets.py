@@ -0,0 +1,270 @@
+"""
+Static Assets
+Login page and tenant dashboards served with precompression and caching
+
+AssetTable reads the static trees once (index.html, frontend_js/,
+frontend_css/, dashboards/<tenant_id>/...) and keeps every file in memory
+with
+
+    - a content hash, used as the strong ETag and in a fingerprinted URL
+      (login.css -> login.3f9a0c1d2e.css) that is served as immutable
+    - gzip and, with the optional brotli package, brotli variants,
+      compressed once at build time instead of per response
+    - HTML rewritten so local stylesheet/script/image references point at
+      the fingerprinted URLs; pages keep their own URL and are revalidated
+      on every load (If-None-Match -> 304)
+
+so a returning browser revalidates a page with one small request and
+takes everything else from its cache. Compressed variants can be kept in
+a directory keyed by content hash (STATIC_CACHE_DIR): build_static.py
+fills it at deploy time and every worker then only reads it.
+"""
+
+import gzip
+import hashlib
+import os
+import posixpath
+import re
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip only without it
+    brotli = None
+
+# Served trees below the static root (files or directories)
+STATIC_TREES = ("index.html", "frontend_js", "frontend_css", "dashboards")
+
+# Tenant dashboards live in dashboards/<tenant_id>/
+DASHBOARDS_TREE = "dashboards"
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".json": "application/json",
+    ".map": "application/json",
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".ico": "image/x-icon",
+    ".woff": "font/woff",
+    ".woff2": "font/woff2",
+}
+
+# Text formats worth compressing (images and fonts already are)
+COMPRESSIBLE = {".html", ".css", ".js", ".json", ".map", ".svg"}
+
+# Smaller files are sent as they are
+MIN_COMPRESS_BYTES = 256
+
+# Hex digits of the content hash in fingerprinted URLs
+FINGERPRINT_LENGTH = 10
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Preference order among equally weighted encodings
+ENCODINGS = ("br", "gzip")
+_SUFFIXES = {"br": "br", "gzip": "gz"}
+
+# href="..." / src="..." attribute values in HTML
+_REFERENCE = re.compile(r'''(\b(?:href|src)\s*=\s*)(["'])([^"'#?]*)([^"']*)\2''', re.IGNORECASE)
+_SCHEME = re.compile(r'^[a-z][a-z0-9+.-]*:', re.IGNORECASE)
+
+
+class StaticAsset:
+    """One served file with its precompressed variants"""
+    
+    __slots__ = ("path", "content_type", "digest", "fingerprinted", "variants", "tenant_id")
+    
+    def __init__(self, path: str, content_type: str, body: bytes, tenant_id: Optional[str] = None):
+        self.path = path
+        self.content_type = content_type
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        stem, ext = posixpath.splitext(path)
+        self.fingerprinted = f"{stem}.{self.digest[:FINGERPRINT_LENGTH]}{ext}"
+        self.variants: Dict[str, bytes] = {"identity": body}
+        self.tenant_id = tenant_id
+    
+    def etag(self, encoding: str) -> str:
+        """Strong ETag per representation (each encoding has its own bytes)"""
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+    
+    def headers(self, encoding: str, fingerprinted: bool) -> Dict[str, str]:
+        headers = {
+            "ETag": self.etag(encoding),
+            "Cache-Control": IMMUTABLE if fingerprinted else REVALIDATE,
+            "Content-Type": self.content_type,
+        }
+        if len(self.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return headers
+
+
+def resolve_reference(page: str, reference: str) -> Optional[str]:
+    """URL path a relative/absolute reference on page points to, None if external"""
+    if not reference or reference.startswith("//") or _SCHEME.match(reference):
+        return None
+    path = reference if reference.startswith("/") else posixpath.join(posixpath.dirname(page), reference)
+    # normpath clamps '..' at the root, like browsers do
+    return posixpath.normpath(path)
+
+
+def choose_encoding(asset: StaticAsset, accept_encoding: Optional[str]) -> str:
+    """Best available variant for an Accept-Encoding header"""
+    if len(asset.variants) == 1 or not accept_encoding:
+        return "identity"
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = "identity", 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if encoding in asset.variants and weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header matches the ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+class AssetTable:
+    """All static files by URL path, built once per process"""
+    
+    def __init__(
+        self,
+        root: Path,
+        trees: Tuple[str, ...] = STATIC_TREES,
+        cache_dir: Optional[Path] = None
+    ):
+        """
+        Args:
+            root: Directory holding the static trees (the repository root)
+            cache_dir: Compressed variants by content hash, shared between
+                processes and deploys (None = compress in memory)
+        """
+        self.root = Path(root)
+        self.trees = trees
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._assets: Dict[str, Tuple[StaticAsset, bool]] = {}
+        self.compressed = 0  # variants compressed by this process (not read from cache_dir)
+    
+    def routes(self) -> List[str]:
+        """Route templates covering the trees"""
+        return [
+            f"/{tree}/{{path:path}}" if (self.root / tree).is_dir() else f"/{tree}"
+            for tree in self.trees
+        ]
+    
+    def _files(self) -> List[Path]:
+        files = []
+        for tree in self.trees:
+            path = self.root / tree
+            if path.is_file():
+                files.append(path)
+            elif path.is_dir():
+                files.extend(sorted(
+                    p for p in path.rglob("*")
+                    if p.is_file() and p.suffix.lower() in CONTENT_TYPES
+                    and not any(part.startswith(".") for part in p.relative_to(self.root).parts)
+                ))
+        return files
+    
+    def build(self) -> "AssetTable":
+        """(Re)read all files; HTML last so its references can be fingerprinted"""
+        assets: Dict[str, Tuple[StaticAsset, bool]] = {}
+        files = self._files()
+        pages = [f for f in files if f.suffix.lower() == ".html"]
+        
+        for file in [f for f in files if f.suffix.lower() != ".html"] + pages:
+            path = "/" + file.relative_to(self.root).as_posix()
+            body = file.read_bytes()
+            if file.suffix.lower() == ".html":
+                body = self._rewrite(path, body.decode("utf-8"), assets).encode("utf-8")
+            parts = path.split("/")
+            tenant_id = parts[2] if parts[1] == DASHBOARDS_TREE and len(parts) > 3 else None
+            asset = StaticAsset(path, CONTENT_TYPES[file.suffix.lower()], body, tenant_id)
+            if file.suffix.lower() in COMPRESSIBLE and len(body) >= MIN_COMPRESS_BYTES:
+                self._compress(asset)
+            assets[path] = (asset, False)
+            if file.suffix.lower() != ".html":
+                assets[asset.fingerprinted] = (asset, True)
+        
+        self._assets = assets
+        return self
+    
+    @staticmethod
+    def _rewrite(page: str, html: str, assets: Dict[str, Tuple[StaticAsset, bool]]) -> str:
+        def fingerprint(match: re.Match) -> str:
+            target = resolve_reference(page, match.group(3))
+            entry = assets.get(target) if target else None
+            if entry is None:
+                return match.group(0)
+            prefix, quote, _, suffix = match.groups()
+            # The query string (cache busting) is replaced by the fingerprint
+            fragment = suffix[suffix.find("#"):] if "#" in suffix else ""
+            return f"{prefix}{quote}{entry[0].fingerprinted}{fragment}{quote}"
+        
+        return _REFERENCE.sub(fingerprint, html)
+    
+    def _compress(self, asset: StaticAsset) -> None:
+        body = asset.variants["identity"]
+        for encoding in ENCODINGS:
+            if encoding == "br" and brotli is None:
+                continue
+            cached = self.cache_dir / f"{asset.digest}.{_SUFFIXES[encoding]}" if self.cache_dir else None
+            if cached is not None and cached.exists():
+                variant = cached.read_bytes()
+            else:
+                if encoding == "br":
+                    variant = brotli.compress(body, quality=11)
+                else:
+                    variant = gzip.compress(body, compresslevel=9, mtime=0)
+                self.compressed += 1
+                if cached is not None:
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    temp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+                    temp.write_bytes(variant)
+                    os.replace(temp, cached)
+            if len(variant) < len(body):
+                asset.variants[encoding] = variant
+    
+    def get(self, path: str) -> Tuple[Optional[StaticAsset], bool]:
+        """(asset, served from its fingerprinted URL) for a URL path"""
+        if path.endswith("/"):
+            path += "index.html"
+        return self._assets.get(path, (None, False))
+    
+    def stats(self) -> Dict:
+        """File count and bytes sent per accepted encoding (all files)"""
+        unique = {id(asset): asset for asset, _ in self._assets.values()}.values()
+        sizes = {encoding: 0 for encoding in ("identity",) + ENCODINGS}
+        for asset in unique:
+            for encoding in sizes:
+                sizes[encoding] += len(asset.variants.get(encoding, asset.variants["identity"]))
+        return {"files": len(unique), "bytes": sizes, "brotli": brotli is not None}
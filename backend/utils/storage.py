@@ -0,0 +1,395 @@
+"""
+Storage Backends
+Pluggable persistence for tenant collections (users, equipment)
+
+DataManager talks to a StorageBackend; the backend decides how records are
+laid out on disk. Available backends:
+    json     - one JSON document per collection, rewritten on every change
+    journal  - JSON snapshot + append-only journal (see utils/journal.py)
+    sqlite   - single SQLite database with indexed columns (utils/sqlite_backend.py)
+"""
+
+import asyncio
+import json
+import os
+import aiofiles
+from pathlib import Path
+from typing import Optional, Dict, List, Any, AsyncIterator, AsyncContextManager, Callable, Hashable, Tuple
+
+from utils import codec, metrics
+from utils.journal import DocumentJournal, file_signature
+from utils.locking import LockManager
+
+# Collection name -> primary key field
+COLLECTION_KEYS = {
+    "users": "user_id",
+    "equipment": "id",
+}
+
+
+async def read_json(file_path: Path) -> Dict:
+    """Read JSON file asynchronously (parsed with the active codec)"""
+    try:
+        with metrics.span('file.read'):
+            async with aiofiles.open(file_path, 'rb') as f:
+                content = await f.read()
+        with metrics.span('json.parse'):
+            return codec.loads(content)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in {file_path}: {e}")
+
+
+async def write_json(file_path: Path, data: Dict) -> None:
+    """Write JSON file asynchronously (temp file + atomic rename)"""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    with metrics.span('json.encode'):
+        content = codec.dumps_document(data)
+    with metrics.span('file.write'):
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            await f.write(content)
+            await f.flush()
+            await asyncio.to_thread(os.fsync, f.fileno())
+        await asyncio.to_thread(os.replace, tmp_path, file_path)
+
+
+def get_field(record: Dict, field: str) -> Any:
+    """Resolve a dotted field path (e.g. 'access_credentials.username')"""
+    value: Any = record
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def project(record: Dict, fields: List[str]) -> Dict:
+    """Copy of record with only the given (dotted) fields"""
+    projected: Dict = {}
+    for field in fields:
+        value: Any = record
+        parts = field.split('.')
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
+
+def matches(record: Dict, filters: Dict[str, Any]) -> bool:
+    """True if every dotted field in filters equals the given value"""
+    return all(get_field(record, field) == value for field, value in filters.items())
+
+
+class StorageBackend:
+    """
+    Interface for tenant collection storage
+    
+    Records returned by a backend may be shared with its caches and must be
+    treated as read-only by callers. Writes (insert/update) must run inside
+    write_lock() for the collection so other worker processes are excluded.
+    """
+    
+    # True if loaded documents stay in memory between calls (until release())
+    holds_documents = False
+    
+    def __init__(self, locks: Optional[LockManager] = None):
+        self.locks = locks or LockManager()
+    
+    async def version(self, tenant: Dict, collection: str) -> Optional[Hashable]:
+        """
+        Token that changes whenever the collection changes
+        
+        None means the backend cannot tell cheaply, and derived in-memory
+        indexes are not kept for it.
+        """
+        return None
+    
+    def write_lock(self, tenant: Dict, collection: str) -> AsyncContextManager[None]:
+        """Exclusive (cross-process) lock for a read-modify-write of a collection"""
+        return self.locks.lock(f"{tenant['tenant_id']}.{collection}")
+    
+    async def load(self, tenant: Dict, collection: str) -> Dict:
+        """Full collection document ({..., collection: [records]})"""
+        raise NotImplementedError
+    
+    async def load_header(self, tenant: Dict, collection: str) -> Dict:
+        """Top-level document fields other than the record list"""
+        document = await self.load(tenant, collection)
+        return {k: v for k, v in document.items() if k != collection}
+    
+    async def iter_records(
+        self,
+        tenant: Dict,
+        collection: str,
+        batch_size: int = 500
+    ) -> AsyncIterator[List[Dict]]:
+        """Records in storage order, in batches (for streaming exports)"""
+        document = await self.load(tenant, collection)
+        records = document.get(collection, [])
+        for start in range(0, len(records), batch_size):
+            yield records[start:start + batch_size]
+    
+    async def get(self, tenant: Dict, collection: str, key: Any) -> Optional[Dict]:
+        """Single record by primary key"""
+        key_field = COLLECTION_KEYS[collection]
+        document = await self.load(tenant, collection)
+        for record in document.get(collection, []):
+            if record.get(key_field) == key:
+                return record
+        return None
+    
+    async def find(self, tenant: Dict, collection: str, field: str, value: Any) -> Optional[Dict]:
+        """First record whose dotted field equals value"""
+        document = await self.load(tenant, collection)
+        for record in document.get(collection, []):
+            if get_field(record, field) == value:
+                return record
+        return None
+    
+    async def query(self, tenant: Dict, collection: str, filters: Dict[str, Any]) -> List[Dict]:
+        """All records matching the equality filters, in storage order"""
+        document = await self.load(tenant, collection)
+        return [r for r in document.get(collection, []) if matches(r, filters)]
+    
+    async def insert(self, tenant: Dict, collection: str, build: Callable[[int], Dict]) -> Dict:
+        """
+        Add a record
+        
+        Args:
+            build: Called with the next free numeric ID, returns the record
+        """
+        raise NotImplementedError
+    
+    async def update(self, tenant: Dict, collection: str, key: Any, changes: Dict) -> Dict:
+        """
+        Shallow-merge changes into an existing record
+        
+        Raises:
+            KeyError: If no record has the given key
+        """
+        raise NotImplementedError
+    
+    async def insert_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        builds: List[Callable[[int], Dict]]
+    ) -> List[Dict]:
+        """
+        Add several records in one write
+        
+        Args:
+            builds: One builder per record, called with consecutive free IDs
+        """
+        return [await self.insert(tenant, collection, build) for build in builds]
+    
+    async def update_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        updates: List[Tuple[Any, Dict]]
+    ) -> List[Optional[Dict]]:
+        """
+        Apply several (key, changes) updates in one write
+        
+        Returns:
+            Updated records in input order, None for keys that do not exist
+        """
+        results: List[Optional[Dict]] = []
+        for key, changes in updates:
+            try:
+                results.append(await self.update(tenant, collection, key, changes))
+            except KeyError:
+                results.append(None)
+        return results
+    
+    async def release(self, tenant: Dict) -> None:
+        """Drop a tenant's in-memory state (reloaded on next access)"""
+    
+    async def close(self) -> None:
+        """Flush pending state and release resources"""
+
+
+class JsonFileBackend(StorageBackend):
+    """One JSON document per tenant collection (data/tenants/<id>/<collection>.json)"""
+    
+    def __init__(self, data_dir: Path, locks: Optional[LockManager] = None):
+        super().__init__(locks)
+        self.data_dir = data_dir
+    
+    def _path(self, tenant: Dict, collection: str) -> Path:
+        return self.data_dir / tenant['data_path'] / f"{collection}.json"
+    
+    async def version(self, tenant: Dict, collection: str) -> Optional[Hashable]:
+        return file_signature(self._path(tenant, collection))
+    
+    async def load(self, tenant: Dict, collection: str) -> Dict:
+        return await read_json(self._path(tenant, collection))
+    
+    async def insert(self, tenant: Dict, collection: str, build: Callable[[int], Dict]) -> Dict:
+        return (await self.insert_many(tenant, collection, [build]))[0]
+    
+    async def update(self, tenant: Dict, collection: str, key: Any, changes: Dict) -> Dict:
+        record = (await self.update_many(tenant, collection, [(key, changes)]))[0]
+        if record is None:
+            raise KeyError(key)
+        return record
+    
+    async def insert_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        builds: List[Callable[[int], Dict]]
+    ) -> List[Dict]:
+        file_path = self._path(tenant, collection)
+        key_field = COLLECTION_KEYS[collection]
+        data = await read_json(file_path)
+        records = data.setdefault(collection, [])
+        
+        # Generate new IDs (numeric keys only; imported string IDs are skipped)
+        existing_ids = [r.get(key_field) for r in records]
+        new_id = max((k for k in existing_ids if isinstance(k, int)), default=0)
+        created = []
+        for build in builds:
+            new_id += 1
+            created.append(build(new_id))
+        
+        records.extend(created)
+        await write_json(file_path, data)
+        return created
+    
+    async def update_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        updates: List[Tuple[Any, Dict]]
+    ) -> List[Optional[Dict]]:
+        file_path = self._path(tenant, collection)
+        key_field = COLLECTION_KEYS[collection]
+        data = await read_json(file_path)
+        by_key = {record.get(key_field): record for record in data.get(collection, [])}
+        
+        results: List[Optional[Dict]] = []
+        for key, changes in updates:
+            record = by_key.get(key)
+            if record is not None:
+                record.update(changes)
+            results.append(record)
+        
+        if any(record is not None for record in results):
+            await write_json(file_path, data)
+        return results
+
+
+class JournalBackend(JsonFileBackend):
+    """JSON snapshots with append-only journals and background compaction"""
+    
+    holds_documents = True
+    
+    def __init__(
+        self,
+        data_dir: Path,
+        compact_threshold: int = 1000,
+        locks: Optional[LockManager] = None,
+        fsync: bool = True
+    ):
+        super().__init__(data_dir, locks)
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self._journals: Dict[Path, DocumentJournal] = {}
+    
+    def _journal(self, tenant: Dict, collection: str) -> DocumentJournal:
+        """Get (or create) the journal for a collection document"""
+        file_path = self._path(tenant, collection)
+        journal = self._journals.get(file_path)
+        if journal is None:
+            journal = DocumentJournal(
+                file_path,
+                collection,
+                COLLECTION_KEYS[collection],
+                read_json,
+                write_json,
+                compact_threshold=self.compact_threshold,
+                write_lock=lambda: self.write_lock(tenant, collection),
+                fsync=self.fsync
+            )
+            self._journals[file_path] = journal
+        return journal
+    
+    async def version(self, tenant: Dict, collection: str) -> Optional[Hashable]:
+        return await self._journal(tenant, collection).version()
+    
+    async def load(self, tenant: Dict, collection: str) -> Dict:
+        return await self._journal(tenant, collection).read()
+    
+    async def get(self, tenant: Dict, collection: str, key: Any) -> Optional[Dict]:
+        return await self._journal(tenant, collection).get(key)
+    
+    async def insert(self, tenant: Dict, collection: str, build: Callable[[int], Dict]) -> Dict:
+        return await self._journal(tenant, collection).insert(build)
+    
+    async def update(self, tenant: Dict, collection: str, key: Any, changes: Dict) -> Dict:
+        return await self._journal(tenant, collection).update(key, changes)
+    
+    async def insert_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        builds: List[Callable[[int], Dict]]
+    ) -> List[Dict]:
+        return await self._journal(tenant, collection).insert_many(builds)
+    
+    async def update_many(
+        self,
+        tenant: Dict,
+        collection: str,
+        updates: List[Tuple[Any, Dict]]
+    ) -> List[Optional[Dict]]:
+        return await self._journal(tenant, collection).update_many(updates)
+    
+    async def release(self, tenant: Dict) -> None:
+        await super().release(tenant)
+        for collection in COLLECTION_KEYS:
+            journal = self._journals.get(self._path(tenant, collection))
+            if journal is not None:
+                await journal.release()
+    
+    async def compact(self) -> None:
+        """Fold all pending journal entries into their snapshots"""
+        for journal in list(self._journals.values()):
+            await journal.compact()
+    
+    async def close(self) -> None:
+        await self.compact()
+
+
+def create_backend(
+    storage_mode: str,
+    data_dir: Path,
+    journal_compact_threshold: int = 1000,
+    sqlite_path: Optional[str] = None,
+    locks: Optional[LockManager] = None,
+    journal_fsync: bool = True
+) -> StorageBackend:
+    """Build the backend selected by STORAGE_MODE"""
+    if storage_mode == "json":
+        return JsonFileBackend(data_dir, locks=locks)
+    if storage_mode == "journal":
+        return JournalBackend(
+            data_dir,
+            compact_threshold=journal_compact_threshold,
+            locks=locks,
+            fsync=journal_fsync
+        )
+    if storage_mode == "sqlite":
+        from utils.sqlite_backend import SQLiteBackend
+        return SQLiteBackend(sqlite_path or str(data_dir / "production.db"), locks=locks)
+    raise ValueError(f"Unknown storage mode: {storage_mode}")
@@ -0,0 +1,92 @@
+"""
+Tenant Registry
+In-memory, indexed view of tenants.json
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Optional, Dict, List, Callable, Awaitable, Tuple
+
+
+class TenantRegistry:
+    """
+    Holds the parsed tenant registry in memory with a dict index by tenant_id
+    
+    The file is re-read only when its mtime/size signature changes or when
+    reload() is called explicitly. The signature itself is checked at most
+    once per check_interval seconds, so lookups between checks do no disk I/O.
+    """
+    
+    def __init__(
+        self,
+        tenants_file: Path,
+        loader: Callable[[Path], Awaitable[Dict]],
+        check_interval: float = 2.0
+    ):
+        self.tenants_file = tenants_file
+        self.check_interval = check_interval
+        self._loader = loader
+        self._lock = asyncio.Lock()
+        self._tenants: List[Dict] = []
+        self._index: Dict[str, Dict] = {}
+        self._config: Dict = {}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._loaded = False
+        self._checked_at = 0.0
+    
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) of the registry file, None if missing"""
+        try:
+            stat = os.stat(self.tenants_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    async def _ensure_fresh(self) -> None:
+        """Reload the registry if it was never loaded or the file changed"""
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < self.check_interval:
+            return
+        
+        signature = self._stat_signature()
+        self._checked_at = now
+        if self._loaded and signature == self._signature:
+            return
+        
+        await self.reload()
+    
+    async def reload(self) -> None:
+        """Force a re-read of tenants.json and rebuild the index"""
+        async with self._lock:
+            signature = self._stat_signature()
+            data = await self._loader(self.tenants_file)
+            tenants = data.get('tenants', [])
+            
+            self._tenants = tenants
+            self._index = {t.get('tenant_id'): t for t in tenants}
+            self._config = data.get('config', {})
+            self._signature = signature
+            self._loaded = True
+            self._checked_at = time.monotonic()
+    
+    def invalidate(self) -> None:
+        """Mark the registry stale so the next access re-checks the file"""
+        self._checked_at = 0.0
+        self._signature = None
+    
+    async def all(self) -> List[Dict]:
+        """All registered tenants (shared objects, treat as read-only)"""
+        await self._ensure_fresh()
+        return self._tenants
+    
+    async def get(self, tenant_id: str) -> Optional[Dict]:
+        """O(1) tenant lookup by ID"""
+        await self._ensure_fresh()
+        return self._index.get(tenant_id)
+    
+    async def config(self) -> Dict:
+        """Global tenant configuration block"""
+        await self._ensure_fresh()
+        return self._config
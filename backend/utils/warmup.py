@@ -0,0 +1,94 @@
+"""
+Startup Warm-up
+Preloading caches before a worker reports ready
+
+A fresh worker has empty caches: the first requests for each tenant parse
+its collections and build the indexes, the first login loads the bcrypt
+backend and starts the hashing threads. Warmup runs those steps
+concurrently in the background after startup and tracks when they are
+done, so a readiness probe (/api/ready) keeps a rolling deploy from
+routing traffic to a worker that is still cold. Liveness (/api/health)
+is answered the whole time.
+
+A failed step is recorded and does not keep the worker unready; whatever
+it did not load is loaded lazily by the first request that needs it.
+"""
+
+import asyncio
+import time
+from typing import Optional, Dict, List, Any, Callable, Awaitable, Tuple
+
+# Warm-up states
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+
+WarmupStep = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class Warmup:
+    """Background warm-up steps and the resulting readiness"""
+    
+    def __init__(self):
+        self.state = PENDING
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+    
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[Any]], slots: asyncio.Semaphore) -> None:
+        async with slots:
+            started = time.perf_counter()
+            result: Dict[str, Any] = {}
+            try:
+                detail = await step()
+                if detail is not None:
+                    result["detail"] = detail
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            self.steps[name] = result
+    
+    async def run(self, steps: List[WarmupStep], concurrency: int = 4) -> None:
+        """Run the steps, at most concurrency at a time, then mark ready"""
+        self.state = WARMING
+        self.started_at = time.time()
+        slots = asyncio.Semaphore(max(1, concurrency))
+        try:
+            await asyncio.gather(*(self._run_step(name, step, slots) for name, step in steps))
+        finally:
+            self.finished_at = time.time()
+            self.state = READY
+    
+    def start(self, steps: List[WarmupStep], concurrency: int = 4) -> None:
+        """Run the steps in a background task"""
+        self._task = asyncio.create_task(self.run(steps, concurrency))
+    
+    def skip(self) -> None:
+        """Warm-up disabled: ready right away"""
+        self.started_at = self.finished_at = time.time()
+        self.state = READY
+    
+    async def stop(self) -> None:
+        """Cancel a warm-up still running (shutdown)"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+    
+    def stats(self) -> Dict:
+        seconds = None
+        if self.started_at is not None:
+            seconds = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {
+            "state": self.state,
+            "seconds": seconds,
+            "steps": dict(self.steps),
+            "failed": sum(1 for step in self.steps.values() if "error" in step),
+        }